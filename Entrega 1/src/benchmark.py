@@ -0,0 +1,533 @@
+# ------------------------------------------------------------------------------
+#| Benchmark reprodutível das etapas do pipeline + oráculo de equivalência.     |
+#|                                                                              |
+#| Benchmark: imagens sintéticas de tamanho crescente (64² ... 4096², geradas   |
+#| com semente fixa) e as imagens do repositório (totoro_rebaixado.jpg,         |
+#| jiji.jpg). Cada etapa (grafo, pesos, MST, segmentação, arborescência) é      |
+#| medida com src/instrumentacao.py em vizinhança 4 e 8; o melhor de N          |
+#| repetições vai para um JSON, junto com o ambiente e o expoente de escala     |
+#| (tempo ~ pixels^expoente) de cada etapa. Dois JSONs podem ser comparados.    |
+#|                                                                              |
+#| Oráculo: confere um motor novo contra as implementações de referência        |
+#| (kruskal_mst, segmentar_mst, EdmondsCore com o solver de Tarjan):            |
+#|  - peso total da MST idêntico (soma exata com math.fsum);                    |
+#|  - rotulos_map idêntico em todos os limiares;                                |
+#|  - custo da arborescência idêntico (soma exata) e resultado válido;          |
+#|  - refinamento da pirâmide válido com mais nós que pixels.                   |
+#|                                                                              |
+#| Exemplos:                                                                    |
+#|   python benchmark.py --lados 64 128 256 512 1024 --saida base.json          |
+#|   python benchmark.py --saida novo.json --comparar base.json                 |
+#|   python benchmark.py --oraculo                                              |
+# ------------------------------------------------------------------------------
+
+import argparse
+import contextlib
+import io
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import time
+
+import cv2
+import numpy as np
+
+import caminhos  # noqa: F401  (torna src/ importável)
+from Edmonds import EdmondsCore, arborescencia_por_rodadas, rotular_ciclos
+from grade import ArestasSimetricas, arestas_para_arrays, gerar_arestas_grade
+from hierarquia import HierarquiaSegmentacao
+from instrumentacao import Instrumentacao, etapa
+from mst_algoritmo import MOTORES_MST, kruskal_mst
+from mst_ladrilhos import mst_ladrilhos
+from pesos import calcular_pesos
+from piramide import refinar_nivel
+from preprocs import preprocessar_imagem
+from segmentacao import segmentar_mst
+
+DIR_RAIZ = os.path.dirname(caminhos.DIR_SRC)
+IMAGENS_REPOSITORIO = ("totoro_rebaixado.jpg", "jiji.jpg")
+
+LADOS_PADRAO = (64, 128, 256, 512, 1024)   # 2048 e 4096 via --lados (minutos e GBs de RAM)
+VIZINHANCAS_PADRAO = ("4", "8")
+LIMIAR_PADRAO = 0.015
+LIMIARES_ORACULO = (0.0, 0.005, 0.015, 0.05, 0.1, 0.2, math.inf)
+ETAPAS = ("preprocessamento", "grafo", "pesos", "mst", "segmentacao", "grafo_arborescencia",
+          "arborescencia")
+
+
+# ==========================================================
+# Imagens
+# ==========================================================
+def imagem_sintetica(lado: int, semente: int = 0) -> np.ndarray:
+    """
+    Imagem lado x lado x 3 (float32 em [0, 1]) determinística: blocos de cor
+    (regiões), um gradiente suave e ruído, quantizada em 1/255 como uma foto
+    de 8 bits (o que gera empates de peso, como nas imagens reais).
+    """
+    rng = np.random.default_rng(semente)
+    blocos = rng.random((8, 8, 3), dtype=np.float32)
+    indices = np.arange(lado) * 8 // lado
+    imagem = 0.6 * blocos[indices[:, None], indices[None, :]]
+
+    gradiente = np.linspace(0.0, 0.3, lado, dtype=np.float32)
+    imagem += (gradiente[:, None] + gradiente[None, :])[:, :, None] / 2
+    imagem += rng.normal(0.0, 0.02, size=imagem.shape).astype(np.float32)
+    return (np.round(np.clip(imagem, 0.0, 1.0) * 255) / 255).astype(np.float32)
+
+
+def imagens_repositorio(max_lado=None):
+    """
+    (nome, imagem Lab normalizada) das imagens do repositório que existirem;
+    max_lado reduz a imagem (INTER_AREA) para o oráculo.
+    """
+    imagens = []
+    for nome in IMAGENS_REPOSITORIO:
+        caminho = os.path.join(DIR_RAIZ, nome)
+        if not os.path.exists(caminho):
+            continue
+        with contextlib.redirect_stdout(io.StringIO()):
+            imagem = preprocessar_imagem(caminho)
+        if imagem is None:
+            continue
+        if max_lado is not None and max(imagem.shape[:2]) > max_lado:
+            escala = max_lado / max(imagem.shape[:2])
+            tamanho = (max(1, round(imagem.shape[1] * escala)), max(1, round(imagem.shape[0] * escala)))
+            imagem = cv2.resize(imagem, tamanho, interpolation=cv2.INTER_AREA)
+        imagens.append((nome, imagem))
+    return imagens
+
+
+# ==========================================================
+# Benchmark
+# ==========================================================
+def _executar_etapas(imagem, vizinhanca, motor, limiar, arborescencia, caminho=None):
+    """
+    Uma passada completa do pipeline sob uma Instrumentacao nova.
+    Retorna o relatório (medidas por etapa).
+    """
+    with Instrumentacao() as inst, contextlib.redirect_stdout(io.StringIO()):
+        if caminho is not None:
+            imagem = preprocessar_imagem(caminho)
+        altura, largura = imagem.shape[:2]
+        num_pixels = altura * largura
+
+        with etapa("grafo"):
+            u, v = gerar_arestas_grade(altura, largura, vizinhanca)
+        with etapa("pesos"):
+            w = calcular_pesos(imagem, u, v)
+        mst = MOTORES_MST[motor]((w, u, v), num_pixels)
+        segmentar_mst(mst, limiar, num_pixels, (altura, largura))
+
+        if arborescencia:
+            core = EdmondsCore(num_pixels, raiz=0)
+            # Construção (CSR) e resolução medidas à parte; a resolução já é
+            # a etapa "arborescencia" (medir_etapa em EdmondsCore)
+            with etapa("grafo_arborescencia"):
+                core.construir_grafo_entrada(ArestasSimetricas(u, v, w))
+            core.resolver_arborescencia()
+    return inst.relatorio()
+
+
+def medir_imagem(nome, imagem, vizinhanca, motor="kruskal", limiar=LIMIAR_PADRAO,
+                 repeticoes=3, arborescencia=False, caminho=None, sintetica=True):
+    """
+    Mede todas as etapas `repeticoes` vezes e guarda o melhor tempo de cada
+    uma (o menos afetado por ruído do sistema). Retorna uma linha por etapa.
+    """
+    relatorios = [_executar_etapas(imagem, vizinhanca, motor, limiar, arborescencia, caminho)
+                  for _ in range(repeticoes)]
+    altura, largura = imagem.shape[:2]
+    linhas = []
+    for nome_etapa in ETAPAS:
+        medidas = [r["etapas"][nome_etapa] for r in relatorios if nome_etapa in r["etapas"]]
+        if not medidas:
+            continue
+        linhas.append({
+            "imagem": nome, "sintetica": sintetica, "altura": altura, "largura": largura,
+            "pixels": altura * largura, "vizinhanca": vizinhanca, "motor": motor, "etapa": nome_etapa,
+            "parede_s": min(m["parede_s"] for m in medidas),
+            "cpu_s": min(m["cpu_s"] for m in medidas),
+            "rss_pico_mb": max(m.get("rss_pico_mb") or 0.0 for m in medidas),
+            "contadores": medidas[-1]["contadores"],
+        })
+    return linhas
+
+
+def expoentes_escala(linhas):
+    """
+    Ajuste log-log de tempo x pixels nas imagens sintéticas, por
+    (vizinhança, motor, etapa): 1.0 é linear; ~1.1 é n log n.
+    """
+    grupos = {}
+    for linha in linhas:
+        if linha["sintetica"] and linha["parede_s"] > 0:
+            chave = f"{linha['vizinhanca']}/{linha['motor']}/{linha['etapa']}"
+            grupos.setdefault(chave, []).append((linha["pixels"], linha["parede_s"]))
+
+    expoentes = {}
+    for chave, pontos in grupos.items():
+        if len({p for p, _ in pontos}) < 2:
+            continue
+        x, y = np.log([p for p, _ in pontos]), np.log([t for _, t in pontos])
+        expoentes[chave] = float(np.polyfit(x, y, 1)[0])
+    return expoentes
+
+
+def _ambiente():
+    ambiente = {"python": platform.python_version(), "numpy": np.__version__,
+                "opencv": cv2.__version__, "plataforma": platform.platform(),
+                "processador": platform.processor(), "cpus": os.cpu_count(),
+                "data": time.strftime("%Y-%m-%d %H:%M:%S")}
+    try:
+        ambiente["commit"] = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=DIR_RAIZ,
+                                            capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        ambiente["commit"] = None
+    return ambiente
+
+
+def executar_benchmark(lados=LADOS_PADRAO, vizinhancas=VIZINHANCAS_PADRAO, motor="kruskal",
+                       limiar=LIMIAR_PADRAO, repeticoes=3, incluir_repositorio=True,
+                       arborescencia_ate=128, semente=0, ao_medir=None):
+    """
+    Roda o benchmark completo e retorna o dicionário de resultados
+    ({"ambiente", "parametros", "linhas", "escala"}).
+
+    - arborescencia_ate: lado máximo das imagens sintéticas em que a
+      arborescência (Edmonds, bem mais cara) também é medida.
+    - ao_medir(linhas): chamado a cada imagem x vizinhança medida.
+    """
+    ao_medir = ao_medir or (lambda linhas: None)
+    linhas = []
+    for vizinhanca in vizinhancas:
+        for lado in lados:
+            imagem = imagem_sintetica(lado, semente)
+            medidas = medir_imagem(f"sintetica_{lado}", imagem, vizinhanca, motor, limiar,
+                                   repeticoes, arborescencia=lado <= arborescencia_ate)
+            linhas.extend(medidas)
+            ao_medir(medidas)
+        if incluir_repositorio:
+            for nome, imagem in imagens_repositorio():
+                medidas = medir_imagem(nome, imagem, vizinhanca, motor, limiar, repeticoes,
+                                       caminho=os.path.join(DIR_RAIZ, nome), sintetica=False)
+                linhas.extend(medidas)
+                ao_medir(medidas)
+
+    parametros = {"lados": list(lados), "vizinhancas": list(vizinhancas), "motor": motor,
+                  "limiar": limiar, "repeticoes": repeticoes, "semente": semente,
+                  "arborescencia_ate": arborescencia_ate}
+    return {"ambiente": _ambiente(), "parametros": parametros,
+            "linhas": linhas, "escala": expoentes_escala(linhas)}
+
+
+def salvar_resultados(resultados, caminho):
+    with open(caminho, "w", encoding="utf-8") as f:
+        json.dump(resultados, f, indent=2, ensure_ascii=False)
+
+
+def carregar_resultados(caminho):
+    with open(caminho, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def comparar_resultados(base, novo, tolerancia=0.10):
+    """
+    Razão novo/base do tempo de parede de cada (imagem, vizinhança, motor, etapa)
+    presente nos dois. Retorna a lista de (chave, t_base, t_novo, razao, situacao),
+    com situacao "regressão" / "melhora" quando a razão passa de 1 ± tolerancia.
+    """
+    def indexar(resultados):
+        return {(l["imagem"], l["vizinhanca"], l["motor"], l["etapa"]): l["parede_s"]
+                for l in resultados["linhas"]}
+
+    tempos_base, tempos_novo = indexar(base), indexar(novo)
+    comparacao = []
+    for chave in tempos_novo:
+        if chave not in tempos_base or tempos_base[chave] <= 0:
+            continue
+        razao = tempos_novo[chave] / tempos_base[chave]
+        situacao = "regressão" if razao > 1 + tolerancia else "melhora" if razao < 1 - tolerancia else ""
+        comparacao.append((chave, tempos_base[chave], tempos_novo[chave], razao, situacao))
+    return comparacao
+
+
+# ==========================================================
+# Oráculo de equivalência
+# ==========================================================
+def peso_total(mst) -> float:
+    """
+    Soma exata (math.fsum) dos pesos: independe da ordem das arestas.
+    """
+    pesos, _, _ = arestas_para_arrays(mst)
+    return math.fsum(np.asarray(pesos, dtype=np.float64).tolist())
+
+
+def custo_arborescencia(pais, raiz, u, v, w) -> float:
+    """
+    Valida a arborescência (todo nó exceto a raiz tem pai, sem ciclos, só
+    arcos existentes) e devolve a soma exata dos custos dos arcos escolhidos
+    (o menor, se houver arcos repetidos). Levanta ValueError se for inválida.
+    """
+    pais = np.asarray(pais, dtype=np.int64)
+    u, v = np.asarray(u, dtype=np.int64), np.asarray(v, dtype=np.int64)
+    w = np.asarray(w, dtype=np.float64)
+    num_nos = len(pais)
+
+    filhos = np.flatnonzero(np.arange(num_nos) != raiz)
+    if pais[raiz] != -1 or np.any(pais[filhos] < 0):
+        raise ValueError("arborescência incompleta: nó sem pai ou raiz com pai")
+    if np.any(rotular_ciclos(pais) >= 0):
+        raise ValueError("arborescência com ciclo")
+
+    # Menor custo de cada arco (u, v): ordena por (chave, peso) e fica com o primeiro
+    chaves = u * num_nos + v
+    ordem = np.lexsort((w, chaves))
+    chaves, w = chaves[ordem], w[ordem]
+    primeiro = np.r_[True, chaves[1:] != chaves[:-1]]
+    chaves, w = chaves[primeiro], w[primeiro]
+
+    procuradas = pais[filhos] * num_nos + filhos
+    posicoes = np.minimum(np.searchsorted(chaves, procuradas), len(chaves) - 1)
+    if np.any(chaves[posicoes] != procuradas):
+        raise ValueError("arborescência usa um arco que não existe no grafo")
+    return math.fsum(w[posicoes].tolist())
+
+
+def _segmentar_hierarquia(mst, limiares, num_pixels, dimensoes):
+    return list(HierarquiaSegmentacao.da_mst(mst, dimensoes).varrer_limiares(limiares))
+
+
+def _segmentar_referencia(mst, limiares, num_pixels, dimensoes):
+    return [segmentar_mst(mst, limiar, num_pixels, dimensoes) for limiar in limiares]
+
+
+def motores_mst_candidatos():
+    """
+    Motores exatos conhecidos, no formato motor((w, u, v), num_nos, imagem, vizinhanca)
+    (a imagem é usada pelos que calculam os próprios pesos, como mst_ladrilhos).
+    """
+    candidatos = {nome: (lambda m: lambda arestas, num_nos, imagem, vizinhanca: m(arestas, num_nos))(motor)
+                  for nome, motor in MOTORES_MST.items() if not nome.endswith("_aprox")}
+    # Ladrilhos pequenos e um processo: muitas costuras, sem pool no teste
+    candidatos["ladrilhos"] = lambda arestas, num_nos, imagem, vizinhanca: \
+        mst_ladrilhos(imagem, vizinhanca, tamanho_ladrilho=17, num_processos=1)
+    return candidatos
+
+
+def verificar_equivalencia(imagem, vizinhanca="8", motores_mst=None, segmentadores=None,
+                           solvers_arborescencia=None, limiares=LIMIARES_ORACULO, nome="imagem"):
+    """
+    Confere os candidatos contra a referência numa imagem.
+
+    - motores_mst: {nome: motor((w, u, v), num_nos, imagem, vizinhanca)}
+      (padrão: motores_mst_candidatos()).
+    - segmentadores: {nome: f(mst, limiares, num_pixels, dimensoes) -> [rotulos_map, ...]}
+      (padrão: a hierarquia); todo motor é segmentado pela referência também.
+    - solvers_arborescencia: {nome: f(num_nos, raiz, u, v, w) -> (pais, custo)}
+      (padrão: arborescencia_por_rodadas).
+
+    Retorna a lista de divergências (strings); vazia = tudo equivalente.
+    """
+    if motores_mst is None:
+        motores_mst = motores_mst_candidatos()
+    if segmentadores is None:
+        segmentadores = {"hierarquia": _segmentar_hierarquia}
+    if solvers_arborescencia is None:
+        solvers_arborescencia = {"rodadas": arborescencia_por_rodadas}
+
+    altura, largura = imagem.shape[:2]
+    num_pixels, dimensoes = altura * largura, (altura, largura)
+    u, v = gerar_arestas_grade(altura, largura, vizinhanca)
+    w = calcular_pesos(imagem, u, v)
+    divergencias = []
+    prefixo = f"{nome} ({altura}x{largura}, vizinhança {vizinhanca})"
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        # Referência
+        mst_referencia = kruskal_mst((w, u, v), num_pixels)
+        peso_referencia = peso_total(mst_referencia)
+        rotulos_referencia = _segmentar_referencia(mst_referencia, limiares, num_pixels, dimensoes)
+
+        for nome_motor, motor in motores_mst.items():
+            try:
+                mst = motor((w, u, v), num_pixels, imagem, vizinhanca)
+                peso = peso_total(mst)
+                if len(arestas_para_arrays(mst)[0]) != len(arestas_para_arrays(mst_referencia)[0]):
+                    divergencias.append(f"{prefixo}: MST '{nome_motor}' tem outro número de arestas")
+                if peso != peso_referencia:
+                    divergencias.append(f"{prefixo}: MST '{nome_motor}' pesa {peso!r} "
+                                        f"(referência {peso_referencia!r})")
+                rotulos = _segmentar_referencia(mst, limiares, num_pixels, dimensoes)
+            except Exception as erro:
+                divergencias.append(f"{prefixo}: MST '{nome_motor}' falhou: {type(erro).__name__}: {erro}")
+                continue
+            for limiar, esperado, obtido in zip(limiares, rotulos_referencia, rotulos):
+                if not np.array_equal(esperado, obtido):
+                    divergencias.append(f"{prefixo}: rotulos_map da MST '{nome_motor}' difere no limiar {limiar}")
+
+        for nome_segmentador, segmentador in segmentadores.items():
+            try:
+                rotulos = segmentador(mst_referencia, limiares, num_pixels, dimensoes)
+            except Exception as erro:
+                divergencias.append(f"{prefixo}: segmentador '{nome_segmentador}' falhou: "
+                                    f"{type(erro).__name__}: {erro}")
+                continue
+            for limiar, esperado, obtido in zip(limiares, rotulos_referencia, rotulos):
+                if not np.array_equal(esperado, obtido):
+                    divergencias.append(f"{prefixo}: segmentador '{nome_segmentador}' difere no limiar {limiar}")
+
+        # Arborescência: grafo direcionado simétrico da grade, raiz no pixel 0
+        core = EdmondsCore(num_pixels, raiz=0)
+        core.construir_grafo_entrada(ArestasSimetricas(u, v, w))
+        arcos = (core.origem, core.destino, core.peso)
+        pais_referencia, _ = core.resolver_arborescencia()
+        custo_referencia = custo_arborescencia(pais_referencia, core.raiz, *arcos)
+
+        for nome_solver, solver in solvers_arborescencia.items():
+            try:
+                pais, _ = solver(num_pixels, core.raiz, *arcos)
+                custo = custo_arborescencia(pais, core.raiz, *arcos)
+            except Exception as erro:
+                divergencias.append(f"{prefixo}: arborescência '{nome_solver}' inválida: "
+                                    f"{type(erro).__name__}: {erro}")
+                continue
+            if custo != custo_referencia:
+                divergencias.append(f"{prefixo}: arborescência '{nome_solver}' custa {custo!r} "
+                                    f"(referência {custo_referencia!r})")
+    return divergencias
+
+
+def verificar_limiares_float32(limiares=LIMIARES_ORACULO, segmentadores=None):
+    """
+    MST em caminho com pesos float32 iguais aos próprios limiares (float32(0.1)
+    > 0.1): segmentar_mst arredonda o limiar para float32 ao comparar, e os
+    segmentadores têm de fazer o mesmo.
+    """
+    if segmentadores is None:
+        segmentadores = {"hierarquia": _segmentar_hierarquia}
+    pesos = np.asarray([l for l in limiares if math.isfinite(l)], dtype=np.float32)
+    num_nos = len(pesos) + 1
+    mst = (pesos, np.arange(num_nos - 1, dtype=np.int32), np.arange(1, num_nos, dtype=np.int32))
+    dimensoes = (1, num_nos)
+    divergencias = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        esperados = _segmentar_referencia(mst, limiares, num_nos, dimensoes)
+        for nome_segmentador, segmentador in segmentadores.items():
+            obtidos = segmentador(mst, limiares, num_nos, dimensoes)
+            for limiar, esperado, obtido in zip(limiares, esperados, obtidos):
+                if not np.array_equal(esperado, obtido):
+                    divergencias.append(f"pesos float32 = limiares: segmentador '{nome_segmentador}' "
+                                        f"difere no limiar {limiar}")
+    return divergencias
+
+
+def verificar_piramide(vizinhanca="8", lado=64, semente=0):
+    """
+    Refinamento da pirâmide (piramide.refinar_nivel) num nível grosso com um
+    segmento por pixel em 80% da imagem e um segmento liso no resto: os nós
+    (faixa + segmentos grossos) passam do número de pixels. O resultado tem
+    de ser um rotulos_map válido (IDs 0..N-1 em ordem raster de aparição) e
+    o interior do segmento liso, um segmento só.
+    """
+    rng = np.random.default_rng(semente)
+    imagem = rng.random((lado, lado, 3), dtype=np.float32)
+    corte = lado * 4 // 5
+    rotulos_grossos = np.arange(lado * lado).reshape(lado, lado)
+    rotulos_grossos[corte:] = corte * lado
+    prefixo = f"pirâmide ({lado}x{lado}, vizinhança {vizinhanca})"
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            rotulos = refinar_nivel(imagem, rotulos_grossos, 0.0, vizinhanca=vizinhanca)
+    except Exception as erro:
+        return [f"{prefixo}: refinar_nivel falhou: {type(erro).__name__}: {erro}"]
+    _, primeiras = np.unique(rotulos.ravel(), return_index=True)
+    if not np.array_equal(rotulos.ravel()[np.sort(primeiras)], np.arange(len(primeiras))):
+        return [f"{prefixo}: rotulos_map fora do formato de segmentar_mst"]
+    if len(np.unique(rotulos[-1, :])) != 1:
+        return [f"{prefixo}: interior do segmento grosso liso foi partido"]
+    return []
+
+
+def executar_oraculo(lados=(16, 33, 64), vizinhancas=VIZINHANCAS_PADRAO, max_lado_repositorio=48,
+                     semente=0, **candidatos):
+    """
+    verificar_equivalencia em imagens sintéticas pequenas (lados ímpares
+    incluídos, para ladrilhos incompletos) e nas do repositório reduzidas.
+    """
+    imagens = [(f"sintetica_{lado}", imagem_sintetica(lado, semente)) for lado in lados]
+    imagens += imagens_repositorio(max_lado=max_lado_repositorio)
+    divergencias = verificar_limiares_float32(segmentadores=candidatos.get("segmentadores"))
+    for vizinhanca in vizinhancas:
+        for nome, imagem in imagens:
+            divergencias += verificar_equivalencia(imagem, vizinhanca, nome=nome, **candidatos)
+        divergencias += verificar_piramide(vizinhanca, semente=semente)
+    return divergencias
+
+
+# ==========================================================
+# Linha de comando
+# ==========================================================
+def _ler_argumentos(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Benchmark das etapas do pipeline e oráculo de equivalência dos motores.")
+    parser.add_argument("--lados", type=int, nargs="+", default=list(LADOS_PADRAO),
+                        help="lados das imagens sintéticas (padrão: 64 128 256 512 1024)")
+    parser.add_argument("--vizinhancas", nargs="+", default=list(VIZINHANCAS_PADRAO),
+                        help="vizinhanças medidas (padrão: 4 8)")
+    parser.add_argument("--motor", default="kruskal", choices=sorted(MOTORES_MST),
+                        help="algoritmo da MST (padrão: kruskal)")
+    parser.add_argument("--limiar", "-k", type=float, default=LIMIAR_PADRAO,
+                        help=f"limiar K da segmentação (padrão: {LIMIAR_PADRAO})")
+    parser.add_argument("--repeticoes", "-r", type=int, default=3,
+                        help="repetições por medida; vale a mais rápida (padrão: 3)")
+    parser.add_argument("--arborescencia-ate", type=int, default=128,
+                        help="lado máximo em que a arborescência é medida (padrão: 128)")
+    parser.add_argument("--sem-repositorio", action="store_true",
+                        help="não mede totoro_rebaixado.jpg / jiji.jpg")
+    parser.add_argument("--saida", "-o", default="resultados_benchmark.json",
+                        help="arquivo JSON de resultados (padrão: resultados_benchmark.json)")
+    parser.add_argument("--comparar", default=None,
+                        help="JSON de uma execução anterior para comparar os tempos")
+    parser.add_argument("--oraculo", action="store_true",
+                        help="só roda o oráculo de equivalência (sai com 1 se houver divergência)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = _ler_argumentos(argv)
+
+    if args.oraculo:
+        divergencias = executar_oraculo(vizinhancas=args.vizinhancas)
+        for divergencia in divergencias:
+            print(f"DIVERGÊNCIA: {divergencia}")
+        print("Oráculo: todos os motores equivalentes à referência." if not divergencias
+              else f"Oráculo: {len(divergencias)} divergência(s).")
+        return 1 if divergencias else 0
+
+    def ao_medir(linhas):
+        for linha in linhas:
+            print(f"{linha['imagem']:<22}{linha['vizinhanca']:>3}  {linha['etapa']:<18}"
+                  f"{linha['parede_s']:>10.4f}s")
+
+    resultados = executar_benchmark(args.lados, args.vizinhancas, args.motor, args.limiar,
+                                    args.repeticoes, not args.sem_repositorio,
+                                    args.arborescencia_ate, ao_medir=ao_medir)
+    salvar_resultados(resultados, args.saida)
+    print(f"\nResultados salvos em {args.saida}")
+    print("Expoentes de escala (tempo ~ pixels^e):")
+    for chave, expoente in sorted(resultados["escala"].items()):
+        print(f"  {chave:<30}{expoente:6.2f}")
+
+    if args.comparar:
+        print(f"\nComparação com {args.comparar} (novo / base):")
+        for chave, t_base, t_novo, razao, situacao in comparar_resultados(carregar_resultados(args.comparar),
+                                                                          resultados):
+            print(f"  {' '.join(chave):<44}{t_base:>9.4f}s {t_novo:>9.4f}s {razao:6.2f}x  {situacao}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
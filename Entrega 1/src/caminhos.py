@@ -0,0 +1,14 @@
+# ------------------------------------------------------------------------------
+#| Os módulos compartilhados entre as entregas (grade do grafo, pesos, ...)     |
+#| ficam em src/ na raiz do repositório. Importar este arquivo coloca essa      |
+#| pasta no sys.path, para que os módulos da Entrega 1 possam usá-los.          |
+# ------------------------------------------------------------------------------
+
+import os
+import sys
+
+DIR_SRC = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "src"))
+
+# append (e não insert(0)): módulos desta pasta continuam tendo prioridade
+if DIR_SRC not in sys.path:
+    sys.path.append(DIR_SRC)
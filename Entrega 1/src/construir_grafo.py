@@ -5,6 +5,11 @@
 #| em uma grade (imagem), conectando pixels vizinhos.                           |
 # ------------------------------------------------------------------------------
 
+import caminhos  # noqa: F401  (torna src/ importável)
+from grade import gerar_arestas_grade
+from instrumentacao import contar, medir_etapa
+
+@medir_etapa("grafo")
 def criar_grafo_adjacencia(altura, largura):
     """
     Cria a estrutura de adjacência (as arestas) de um grafo
@@ -20,41 +25,17 @@ def criar_grafo_adjacencia(altura, largura):
     @Return:
     - list: Uma lista de tuplas, onde cada tupla (u, v) representa
             uma aresta entre o pixel com ID 'u' e o pixel com ID 'v'.
+
+    Para trabalhar direto com arrays int32 (sem lista de tuplas), use
+    grade.gerar_arestas_grade(altura, largura, "8").
     """
     print(f"Criando grafo para uma imagem de {altura}x{largura}...")
 
-    arestas = []
-
-    for linha in range(altura):
-        for coluna in range(largura):
-
-            # Id unico do pixel atual: 
-            # Esta fórumila nos garante que todo  pixel terá um ID diferente
-            id_atual = (linha * largura) + coluna
-
-            # 1. Vizinho da DIREITA (Horizontal)
-            # Checa se não está na última coluna
-            if coluna + 1 < largura:
-                id_vizinho_R = id_atual + 1
-                arestas.append((id_atual, id_vizinho_R))
-
-            # 2. Vizinho de BAIXO-ESQUERDA (Diagonal)
-            # Checa se não está na última linha E não está na primeira coluna
-            if (linha + 1 < altura) and (coluna - 1 >= 0):
-                id_vizinho_BL = (linha + 1) * largura + (coluna - 1)
-                arestas.append((id_atual, id_vizinho_BL))
-
-            # 3. Vizinho de BAIXO (Vertical)
-            # Checa se não está na última linha
-            if linha + 1 < altura:
-                id_vizinho_B = id_atual + largura
-                arestas.append((id_atual, id_vizinho_B))
-
-            # 4. Vizinho de BAIXO-DIREITA (Diagonal)
-            # Checa se não está na última linha E não está na última coluna
-            if (linha + 1 < altura) and (coluna + 1 < largura):
-                id_vizinho_BR = (linha + 1) * largura + (coluna + 1)
-                arestas.append((id_atual, id_vizinho_BR))
+    # As arestas são geradas de forma vetorizada (ver src/grade.py), na mesma
+    # ordem do antigo laço: pixel a pixel, Direita, Baixo-Esq., Baixo, Baixo-Dir.
+    u, v = gerar_arestas_grade(altura, largura, vizinhanca="8")
+    arestas = list(zip(u.tolist(), v.tolist()))
+    contar("arestas", len(arestas))
 
     print(f"Grafo estrutural 8-vizinhos criado com {len(arestas)} arestas.")
     
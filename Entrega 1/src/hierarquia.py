@@ -0,0 +1,200 @@
+# ------------------------------------------------------------------------------
+#| Hierarquia de segmentação (dendrograma de ligação simples) construída uma    |
+#| única vez a partir da MST. Cortar a MST no limiar K é o mesmo que executar   |
+#| as primeiras fusões (em ordem de peso) desse dendrograma, então depois de    |
+#| construída a hierarquia responde qualquer limiar sem refazer as uniões.      |
+#|                                                                              |
+#| Com o cache de etapas (src/cache_etapas.py), hierarquia_em_cache guarda a    |
+#| hierarquia sob o hash da imagem + vizinhança, espaço de cor, métrica e       |
+#| motor: execuções seguintes com a mesma imagem e parâmetros pulam grafo,      |
+#| pesos e MST.                                                                 |
+# ------------------------------------------------------------------------------
+
+import numpy as np
+from typing import Callable, Dict, Iterable, Tuple
+
+import caminhos  # noqa: F401  (torna src/ importável)
+from cache_etapas import hash_arquivo
+from grade import arestas_para_arrays
+from segmentacao import compactar_rotulos
+
+
+class HierarquiaSegmentacao:
+    """
+    Guarda o dendrograma de forma "achatada":
+
+    - ordem_folhas: os pixels numa ordem em que todo segmento de qualquer
+      nível da hierarquia ocupa um trecho contíguo;
+    - cortes[i]: índice da fusão que junta ordem_folhas[i] e ordem_folhas[i+1]
+      (a fusão j é a j-ésima aresta da MST em ordem crescente de peso);
+    - pesos_fusao[j]: peso da fusão j.
+
+    Com os j primeiros merges feitos, os segmentos são exatamente os trechos
+    separados pelas posições com cortes >= j, então uma consulta custa O(pixels),
+    o tamanho da própria saída.
+    """
+
+    def __init__(self, ordem_folhas: np.ndarray, cortes: np.ndarray,
+                 pesos_fusao: np.ndarray, dimensoes: Tuple[int, int]):
+        self.ordem_folhas = ordem_folhas
+        self.cortes = cortes
+        self.pesos_fusao = pesos_fusao
+        self.dimensoes = tuple(int(d) for d in dimensoes)
+        self.num_nos = len(ordem_folhas)
+
+    @classmethod
+    def da_mst(cls, mst, dimensoes: Tuple[int, int]) -> "HierarquiaSegmentacao":
+        """
+        Constrói a hierarquia a partir da MST (lista de (peso, u, v), tupla de
+        arrays (w, u, v) ou o resultado de qualquer motor de mst_algoritmo.MOTORES_MST).
+        """
+        altura, largura = dimensoes
+        num_nos = altura * largura
+
+        pesos, u, v = arestas_para_arrays(mst)
+        ordem = np.argsort(pesos, kind="stable")
+        pesos, u, v = pesos[ordem], u[ordem].tolist(), v[ordem].tolist()
+
+        # Cada conjunto mantém a sua lista de folhas encadeada (inicio -> ... -> fim).
+        # Fundir A e B é só ligar fim(A) -> inicio(B); o "elo" criado guarda o
+        # índice da fusão. Union-Find com listas locais, como em union_find.py.
+        parent = list(range(num_nos))
+        size = [1] * num_nos
+        inicio = list(range(num_nos))
+        fim = list(range(num_nos))
+        proximo = [-1] * num_nos
+        corte_apos = [-1] * num_nos   # corte entre a folha e a seguinte
+
+        pesos_fusao = []
+        for peso, a, b in zip(pesos.tolist(), u, v):
+            while parent[a] != a:
+                parent[a] = parent[parent[a]]
+                a = parent[a]
+            while parent[b] != b:
+                parent[b] = parent[parent[b]]
+                b = parent[b]
+            if a == b:
+                continue
+            j = len(pesos_fusao)
+            pesos_fusao.append(peso)
+            proximo[fim[a]] = inicio[b]
+            corte_apos[fim[a]] = j
+            novo_inicio, novo_fim = inicio[a], fim[b]
+            if size[a] < size[b]:
+                a, b = b, a
+            parent[b] = a
+            size[a] += size[b]
+            inicio[a], fim[a] = novo_inicio, novo_fim
+
+        # Componentes que nunca se juntam (MST de grafo desconexo) são
+        # encadeados com um corte "infinito" (nenhum limiar os une).
+        num_fusoes = len(pesos_fusao)
+        raizes = [r for r in range(num_nos) if parent[r] == r]
+        for r_a, r_b in zip(raizes, raizes[1:]):
+            proximo[fim[r_a]] = inicio[r_b]
+            corte_apos[fim[r_a]] = num_fusoes
+
+        ordem_folhas = np.empty(num_nos, dtype=np.int32)
+        cortes = np.empty(max(num_nos - 1, 0), dtype=np.int32)
+        folha = inicio[raizes[0]] if raizes else -1
+        for i in range(num_nos):
+            ordem_folhas[i] = folha
+            if i < num_nos - 1:
+                cortes[i] = corte_apos[folha]
+            folha = proximo[folha]
+
+        # No dtype dos pesos da MST: fusoes_ate compara como segmentar_mst
+        return cls(ordem_folhas, cortes, np.asarray(pesos_fusao, dtype=pesos.dtype), dimensoes)
+
+    # --------------------------------------------------------------------------
+    # Consultas
+    # --------------------------------------------------------------------------
+    @property
+    def num_fusoes(self) -> int:
+        return len(self.pesos_fusao)
+
+    def fusoes_ate(self, limiar: float) -> int:
+        """
+        Quantas fusões têm peso <= limiar (as que segmentar_mst faria).
+        O limiar é arredondado para o dtype dos pesos, como em `pesos <= limiar`
+        com pesos float32.
+        """
+        limiar = self.pesos_fusao.dtype.type(limiar)
+        return int(np.searchsorted(self.pesos_fusao, limiar, side="right"))
+
+    def num_segmentos(self, limiar: float) -> int:
+        return self.num_nos - self.fusoes_ate(limiar)
+
+    def _rotulos_com_fusoes(self, num_fusoes: int) -> np.ndarray:
+        # Segmento de cada posição da ordem de folhas: conta as fronteiras até ela
+        grupo = np.zeros(self.num_nos, dtype=np.int64)
+        np.cumsum(self.cortes >= num_fusoes, out=grupo[1:])
+        rotulos = np.empty(self.num_nos, dtype=np.int64)
+        rotulos[self.ordem_folhas] = grupo
+
+        # Renumera na ordem raster de primeira aparição (mesma saída de segmentar_mst)
+        return compactar_rotulos(rotulos, self.dimensoes)
+
+    def rotulos_no_limiar(self, limiar: float) -> np.ndarray:
+        """
+        'rotulos_map' idêntico a segmentar_mst(mst, limiar, ...).
+        """
+        return self._rotulos_com_fusoes(self.fusoes_ate(limiar))
+
+    def rotulos_para_n_segmentos(self, n: int) -> np.ndarray:
+        """
+        'rotulos_map' com n segmentos (ou o mais próximo possível, se a MST
+        não permitir tão poucos/tantos).
+        """
+        num_fusoes = min(max(self.num_nos - n, 0), self.num_fusoes)
+        return self._rotulos_com_fusoes(num_fusoes)
+
+    def varrer_limiares(self, limiares: Iterable[float]) -> np.ndarray:
+        """
+        Segmentações para vários limiares de uma vez: array (L, altura, largura).
+        """
+        limiares = list(limiares)
+        dtype = np.min_scalar_type(max(self.num_nos - 1, 0))
+        saida = np.empty((len(limiares),) + self.dimensoes, dtype=dtype)
+        for i, limiar in enumerate(limiares):
+            saida[i] = self.rotulos_no_limiar(limiar)
+        return saida
+
+    # --------------------------------------------------------------------------
+    # Persistência (sem pickle)
+    # --------------------------------------------------------------------------
+    def como_arrays(self) -> Dict[str, np.ndarray]:
+        return {"ordem_folhas": self.ordem_folhas, "cortes": self.cortes, "pesos_fusao": self.pesos_fusao,
+                "dimensoes": np.asarray(self.dimensoes, dtype=np.int64)}
+
+    @classmethod
+    def de_arrays(cls, d) -> "HierarquiaSegmentacao":
+        return cls(d["ordem_folhas"], d["cortes"], d["pesos_fusao"], tuple(d["dimensoes"]))
+
+    def salvar(self, caminho_npz: str):
+        np.savez_compressed(caminho_npz, **self.como_arrays())
+        print(f"Hierarquia com {self.num_fusoes} fusões salva em {caminho_npz}")
+
+    @classmethod
+    def carregar(cls, caminho_npz: str) -> "HierarquiaSegmentacao":
+        return cls.de_arrays(np.load(caminho_npz))
+
+
+def chave_hierarquia(cache, caminho_imagem: str, vizinhanca="8", espaco_cor: str = "lab",
+                     metrica: str = "euclidiana", motor: str = "kruskal") -> str:
+    """
+    Chave da hierarquia no cache de etapas: hash da imagem + os parâmetros
+    que mudam a MST (a mesma chave em segmentar_lote e no Pipeline).
+    """
+    return cache.chave("hierarquia", hash_arquivo(caminho_imagem), espaco_cor=espaco_cor,
+                       vizinhanca=vizinhanca, metrica=metrica, motor=motor)
+
+
+def hierarquia_em_cache(cache, chave: str,
+                        construir: Callable[[], HierarquiaSegmentacao]) -> HierarquiaSegmentacao:
+    """
+    Hierarquia do cache (cache_etapas.CacheEtapas) sob `chave`; numa falta,
+    construir() (grafo, pesos, MST e da_mst) e grava. Um acerto pula tudo isso.
+    """
+    return HierarquiaSegmentacao.de_arrays(
+        cache.arrays_npz(chave, lambda: construir().como_arrays(), etapa="hierarquia"))
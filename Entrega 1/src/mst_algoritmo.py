@@ -5,53 +5,259 @@
 #| todos os pixels com o menor custo total.                                     |
 # ------------------------------------------------------------------------------
 
-class UnionFind:
-    
-    def __init__(self, n):
-        self.parent = list(range(n))
-        self.rank = [0] * n
+import numpy as np
 
-    def find(self, x):
-        if self.parent[x] != x:
-            self.parent[x] = self.find(self.parent[x]) 
-        return self.parent[x]
+import caminhos  # noqa: F401  (torna src/ importável)
+from grade import arestas_para_arrays, gerar_arestas_grade
+from instrumentacao import contar, etapa, medir_etapa
+from mst_ladrilhos import TAMANHO_LADRILHO_PADRAO, mst_ladrilhos
+from pesos import calcular_pesos
+from union_find import UnionFind
 
-    def union(self, x, y):
-        raiz_x = self.find(x)
-        raiz_y = self.find(y)
+@medir_etapa("mst")
+def kruskal_mst(arestas_ponderadas, num_nos=None, barra_progresso=None):
+    """
+    Aceita a lista de tuplas (peso, u, v), uma tupla de arrays (w, u, v),
+    um grade.GridGraph com pesos calculados ou um grafo aberto de um arquivo
+    .grafo (armazenamento_grafo.GrafoMapeado); nos dois últimos, num_nos é opcional.
+    Retorna a MST como lista de (peso, u, v) em ordem crescente de peso.
+    """
+    if num_nos is None:
+        num_nos = arestas_ponderadas.num_nos
 
-        if raiz_x == raiz_y:
-            return False  # já estão no mesmo conjunto → criaria ciclo
+    # Ordena as arestas pelo peso (ordenação estável, como o sorted() original);
+    # um .grafo salvo com a permutação pronta pula a ordenação
+    w, u, v = arestas_para_arrays(arestas_ponderadas)
+    ordem = getattr(arestas_ponderadas, "ordem", None)
+    if ordem is None:
+        ordem = np.argsort(w, kind="stable")
 
-        # União por rank (mantém árvore balanceada)
-        if self.rank[raiz_x] < self.rank[raiz_y]:
-            self.parent[raiz_x] = raiz_y
-        elif self.rank[raiz_x] > self.rank[raiz_y]:
-            self.parent[raiz_y] = raiz_x
-        else:
-            self.parent[raiz_y] = raiz_x
-            self.rank[raiz_x] += 1
+    return _kruskal_ordenado(w, u, v, ordem, num_nos, barra_progresso)
 
-        return True
 
-
-def kruskal_mst(arestas_ponderadas, num_nos, barra_progresso=None):
-    # Ordena as arestas pelo peso
-    arestas_ordenadas = sorted(arestas_ponderadas, key=lambda x: x[0])
+def _kruskal_ordenado(w, u, v, ordem, num_nos, barra_progresso=None):
+    """
+    Núcleo do Kruskal: percorre as arestas na ordem dada e monta a MST.
+    """
+    w, u, v = w[ordem], u[ordem], v[ordem]
 
     uf = UnionFind(num_nos)
-    mst = []
-
-    #Percorrer as arestas em ordem crescente de peso
-    for peso, u, v in arestas_ordenadas:
-        # Se u e v pertencem a conjuntos diferentes → não forma ciclo
-        if uf.union(u, v):
-            mst.append((peso, u, v))
-            # Critério de parada: uma MST tem (num_nos - 1) arestas
-            if len(mst) == num_nos - 1:
-                break
 
-        if barra_progresso:
-            barra_progresso.update(1)
+    # Percorrer as arestas em ordem crescente de peso: a aresta entra na MST se
+    # u e v pertencem a conjuntos diferentes (não forma ciclo).
+    # Critério de parada: uma MST tem (num_nos - 1) arestas
+    unidas = uf.union_many(u, v, max_unioes=num_nos - 1)
+    mst = list(zip(w[unidas].tolist(), u[unidas].tolist(), v[unidas].tolist()))
+    contar("arestas_ordenadas", len(w))
+    contar("arestas_mst", len(mst))
+
+    if barra_progresso:
+        processadas = len(w)
+        if len(mst) == num_nos - 1 and len(mst) > 0:
+            processadas = int(np.flatnonzero(unidas)[-1]) + 1
+        barra_progresso.update(processadas)
 
     return mst
+
+# ------------------------------------------------------------------------------
+#| Kruskal com ordenação por baldes (counting/radix sort).                      |
+#| Os pesos são distâncias de cor num intervalo conhecido (no máximo √3 para    |
+#| RGB/Lab normalizados), então não é preciso uma ordenação por comparação:     |
+#| a ordem das arestas sai em O(E).                                             |
+# ------------------------------------------------------------------------------
+
+def _ordem_radix(chaves):
+    """
+    Radix sort LSD estável sobre chaves inteiras sem sinal, 16 bits por passada.
+    Cada passada usa a ordenação estável do NumPy sobre uint16, que é um
+    radix/counting sort (O(n)). Passadas com dígito constante são puladas.
+    """
+    chaves = np.asarray(chaves)
+    ordem = np.arange(len(chaves))
+    num_bits = chaves.dtype.itemsize * 8
+    for deslocamento in range(0, num_bits, 16):
+        digito = ((chaves[ordem] >> deslocamento) & 0xFFFF).astype(np.uint16)
+        if len(digito) and digito.min() == digito.max():
+            continue
+        ordem = ordem[np.argsort(digito, kind="stable")]
+    return ordem
+
+
+def ordenar_por_baldes(pesos, num_baldes=4096, peso_max=None, exato=True):
+    """
+    Ordem (índices) das arestas por peso crescente, sem ordenação por comparação.
+
+    - exato=True: radix sort sobre a representação binária dos pesos (para
+      floats não-negativos ela é monótona). Resultado idêntico ao argsort
+      estável: empates mantêm a ordem de entrada.
+    - exato=False: os pesos são quantizados em `num_baldes` baldes de largura
+      peso_max / num_baldes e só o índice do balde é ordenado (uma passada de
+      counting sort). Dentro de um balde vale a ordem de entrada.
+    """
+    pesos = np.asarray(pesos)
+    if len(pesos) == 0:
+        return np.arange(0)
+    if pesos.min() < 0:
+        raise ValueError("ordenar_por_baldes espera pesos não-negativos (distâncias)")
+
+    if exato:
+        if pesos.dtype != np.float64:
+            pesos = pesos.astype(np.float32)
+        # + 0.0 transforma -0.0 em 0.0 (o bit de sinal estragaria a ordem)
+        bits = (pesos + pesos.dtype.type(0)).view(np.uint64 if pesos.dtype == np.float64 else np.uint32)
+        return _ordem_radix(bits)
+
+    if peso_max is None:
+        peso_max = float(pesos.max())
+    escala = num_baldes / peso_max if peso_max > 0 else 0.0
+    baldes = np.minimum(pesos * escala, num_baldes - 1).astype(np.uint32)
+    return _ordem_radix(baldes)
+
+
+@medir_etapa("mst")
+def kruskal_mst_baldes(arestas_ponderadas, num_nos=None, barra_progresso=None,
+                       num_baldes=4096, peso_max=None, exato=True):
+    """
+    Kruskal com ordenação O(E) por baldes (ver ordenar_por_baldes).
+
+    No modo exato a MST é exatamente a mesma de kruskal_mst (mesmas arestas,
+    mesma ordem). No modo aproximado, arestas de um mesmo balde são tratadas
+    como empatadas: o peso total fica no máximo (num_nos - 1) * largura do
+    balde acima do ótimo.
+
+    Retorna a MST no mesmo contrato de kruskal_mst: lista de (peso, u, v).
+    """
+    if num_nos is None:
+        num_nos = arestas_ponderadas.num_nos
+
+    w, u, v = arestas_para_arrays(arestas_ponderadas)
+    ordem = ordenar_por_baldes(w, num_baldes=num_baldes, peso_max=peso_max, exato=exato)
+
+    return _kruskal_ordenado(w, u, v, ordem, num_nos, barra_progresso)
+
+
+# ------------------------------------------------------------------------------
+#| Borůvka vetorizado: em cada rodada, todo componente escolhe sua aresta de    |
+#| saída mais barata e os componentes ligados por essas arestas são contraídos. |
+#| São O(log V) rodadas, cada uma feita com poucas operações NumPy sobre os     |
+#| arrays de arestas (argmin por segmento, reetiquetagem, filtragem).           |
+# ------------------------------------------------------------------------------
+
+@medir_etapa("mst")
+def boruvka_mst(arestas_ponderadas, num_nos=None, barra_progresso=None):
+    """
+    MST por Borůvka, no mesmo contrato de kruskal_mst: lista de (peso, u, v)
+    em ordem crescente de peso.
+
+    Empates são desfeitos pela posição da aresta na entrada (a mesma regra
+    do sort estável do Kruskal). Com essa ordem total a MST é única, então o
+    resultado é idêntico ao de kruskal_mst, e não só o peso total.
+    """
+    if num_nos is None:
+        num_nos = arestas_ponderadas.num_nos
+
+    w, u, v = arestas_para_arrays(arestas_ponderadas)
+    num_arestas = len(w)
+
+    # posto[i] = posição da aresta i na ordem (peso, índice): comparar postos
+    # é comparar pesos com desempate determinístico.
+    ordem = np.argsort(w, kind="stable")
+    posto = np.empty(num_arestas, dtype=np.int64)
+    posto[ordem] = np.arange(num_arestas)
+
+    componente = np.arange(num_nos, dtype=np.int64)
+    num_componentes = num_nos
+    escolhidas = []
+
+    # Só arestas entre componentes diferentes continuam vivas
+    vivas = np.flatnonzero(u != v)
+    while len(vivas) > 0:
+        contar("rodadas")
+        cu = componente[u[vivas]]
+        cv = componente[v[vivas]]
+        p = posto[vivas]
+
+        # Menor aresta de saída de cada componente (argmin por segmento via minimum.at)
+        menor = np.full(num_componentes, num_arestas, dtype=np.int64)
+        np.minimum.at(menor, cu, p)
+        np.minimum.at(menor, cv, p)
+        tem_saida = menor < num_arestas
+        if not tem_saida.any():
+            break
+
+        # Cada componente "aponta" para o componente do outro lado da sua aresta mínima
+        comps = np.flatnonzero(tem_saida)
+        arestas_min = ordem[menor[comps]]
+        escolhidas.append(np.unique(arestas_min))
+        outro = componente[u[arestas_min]]
+        outro = np.where(outro == comps, componente[v[arestas_min]], outro)
+        aponta = np.arange(num_componentes, dtype=np.int64)
+        aponta[comps] = outro
+
+        # Pares que escolheram a mesma aresta formam ciclos de tamanho 2:
+        # o de menor ID vira a raiz. Depois, pointer jumping até estabilizar.
+        mutuos = aponta[aponta] == np.arange(num_componentes)
+        raiz = mutuos & (np.arange(num_componentes) < aponta)
+        aponta[raiz] = np.flatnonzero(raiz)
+        while True:
+            proximo = aponta[aponta]
+            if np.array_equal(proximo, aponta):
+                break
+            aponta = proximo
+
+        # Reetiqueta para 0..C-1 e descarta as arestas que ficaram internas
+        raizes, novo_rotulo = np.unique(aponta, return_inverse=True)
+        componente = novo_rotulo[componente]
+        num_componentes = len(raizes)
+        vivas = vivas[componente[u[vivas]] != componente[v[vivas]]]
+
+    if escolhidas:
+        indices = np.concatenate(escolhidas)
+        indices = indices[np.argsort(posto[indices])]
+    else:
+        indices = np.empty(0, dtype=np.int64)
+
+    if barra_progresso:
+        barra_progresso.update(num_arestas)
+    contar("arestas_mst", len(indices))
+
+    return list(zip(w[indices].tolist(), u[indices].tolist(), v[indices].tolist()))
+
+
+# Motores de MST disponíveis, selecionáveis pelo nome no pipeline
+MOTORES_MST = {
+    "kruskal": kruskal_mst,
+    "kruskal_baldes": kruskal_mst_baldes,
+    "kruskal_baldes_aprox": lambda arestas, num_nos=None, barra_progresso=None:
+        kruskal_mst_baldes(arestas, num_nos, barra_progresso, exato=False),
+    "boruvka": boruvka_mst,
+}
+
+# Motores que recebem a própria imagem e calculam só os pesos de que precisam,
+# sem montar a lista completa de arestas: motor(imagem, vizinhanca, metrica, **opcoes)
+MOTORES_MST_IMAGEM = {
+    "ladrilhos": mst_ladrilhos,
+}
+
+
+def mst_da_imagem(imagem, vizinhanca="8", metrica="euclidiana", motor="kruskal",
+                  tamanho_ladrilho=TAMANHO_LADRILHO_PADRAO, processos_ladrilhos=None):
+    """
+    MST do grafo em grade de `imagem` (H x W x C, já no espaço de cor dos
+    pesos) com qualquer motor, pelo nome: os de MOTORES_MST recebem o grafo e
+    os pesos completos; os de MOTORES_MST_IMAGEM ("ladrilhos", para imagens de
+    dezenas de megapixels), a imagem, com tamanho_ladrilho e processos_ladrilhos.
+    """
+    if motor in MOTORES_MST_IMAGEM:
+        return MOTORES_MST_IMAGEM[motor](imagem, vizinhanca, metrica, tamanho_ladrilho=tamanho_ladrilho,
+                                         num_processos=processos_ladrilhos)
+    if motor not in MOTORES_MST:
+        raise ValueError(f"Motor de MST '{motor}' desconhecido. "
+                         f"Disponíveis: {sorted(MOTORES_MST) + sorted(MOTORES_MST_IMAGEM)}")
+    altura, largura = imagem.shape[:2]
+    with etapa("grafo"):
+        u, v = gerar_arestas_grade(altura, largura, vizinhanca)
+        contar("arestas", len(u))
+    with etapa("pesos"):
+        w = calcular_pesos(imagem, u, v, metrica=metrica)
+    return MOTORES_MST[motor]((w, u, v), altura * largura)
@@ -0,0 +1,191 @@
+# ------------------------------------------------------------------------------
+#| MST em ladrilhos, com vários processos, para imagens grandes.                |
+#| A imagem é dividida em ladrilhos; cada processo calcula a floresta geradora  |
+#| mínima das arestas internas do seu ladrilho (Kruskal local) e devolve também |
+#| as arestas de costura (que ligam dois ladrilhos). Um Kruskal final só sobre  |
+#| florestas + costuras dá a MST EXATA da imagem inteira: pela propriedade do   |
+#| ciclo, uma aresta interna descartada no ladrilho é a mais pesada de um ciclo |
+#| e também não estaria na MST global.                                          |
+# ------------------------------------------------------------------------------
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Optional, Tuple
+
+import numpy as np
+
+import caminhos  # noqa: F401  (torna src/ importável)
+from grade import offsets_vizinhanca
+from instrumentacao import contar, medir_etapa
+from pesos import calcular_pesos
+from union_find import UnionFind
+
+TAMANHO_LADRILHO_PADRAO = 512
+
+# Colunas da floresta gravadas pelos processos na memória compartilhada de saída
+_COLUNAS_SAIDA = (("w", np.float32), ("u", np.int32), ("v", np.int32), ("chave", np.int64))
+
+
+def dividir_em_ladrilhos(altura: int, largura: int, tamanho_ladrilho: int = TAMANHO_LADRILHO_PADRAO):
+    """
+    Ladrilhos que se encostam (sem sobreposição) cobrindo a imagem, em ordem raster.
+    Retorna uma lista de (linha_inicio, linha_fim, coluna_inicio, coluna_fim).
+    """
+    return [(l0, min(l0 + tamanho_ladrilho, altura), c0, min(c0 + tamanho_ladrilho, largura))
+            for l0 in range(0, altura, tamanho_ladrilho)
+            for c0 in range(0, largura, tamanho_ladrilho)]
+
+
+def _arestas_ladrilho(altura, largura, offsets, ladrilho):
+    """
+    Arestas (u, v, chave) cuja origem está no ladrilho, separadas em internas
+    (destino no mesmo ladrilho) e de costura (destino em outro ladrilho).
+
+    chave = u * k + índice do deslocamento: é a posição relativa da aresta na
+    lista completa de gerar_arestas_grade (ordem raster x deslocamento), usada
+    para desempatar pesos iguais exatamente como o argsort estável de kruskal_mst.
+    """
+    l0, l1, c0, c1 = ladrilho
+    linhas = np.arange(l0, l1)[:, None, None]
+    colunas = np.arange(c0, c1)[None, :, None]
+    dl, dc = offsets[:, 0], offsets[:, 1]
+
+    linha_v = linhas + dl
+    coluna_v = colunas + dc
+    valido = (linha_v >= 0) & (linha_v < altura) & (coluna_v >= 0) & (coluna_v < largura)
+    interno = (linha_v >= l0) & (linha_v < l1) & (coluna_v >= c0) & (coluna_v < c1)
+
+    forma = valido.shape
+    u = np.broadcast_to((linhas * largura + colunas).astype(np.int64), forma)
+    v = np.broadcast_to(linha_v * largura + coluna_v, forma)
+    chave = u * len(offsets) + np.arange(len(offsets))
+
+    mascaras = (valido & interno, valido & ~interno)
+    return [(u[m].astype(np.int32), v[m].astype(np.int32), chave[m]) for m in mascaras]
+
+
+def _floresta_ladrilho(tarefa):
+    """
+    Trabalho de um processo: Kruskal nas arestas internas do ladrilho.
+    A floresta vai direto para a memória compartilhada de saída, a partir de
+    'deslocamento' (um ladrilho com p pixels tem no máximo p - 1 arestas na floresta);
+    as arestas de costura voltam pelo retorno (são só as da borda).
+    """
+    (nome_imagem, forma_imagem, nomes_saida, num_saida,
+     ladrilho, deslocamento, vizinhanca, metrica) = tarefa
+
+    memorias = [shared_memory.SharedMemory(name=nome_imagem)]
+    try:
+        imagem = np.ndarray(forma_imagem, dtype=np.float32, buffer=memorias[0].buf)
+        saida = {}
+        for (coluna, dtype), nome in zip(_COLUNAS_SAIDA, nomes_saida):
+            memorias.append(shared_memory.SharedMemory(name=nome))
+            saida[coluna] = np.ndarray((num_saida,), dtype=dtype, buffer=memorias[-1].buf)
+
+        altura, largura = forma_imagem[:2]
+        offsets = np.asarray(offsets_vizinhanca(vizinhanca, direcionado=False), dtype=np.int64)
+        (u, v, chave), (u_c, v_c, chave_c) = _arestas_ladrilho(altura, largura, offsets, ladrilho)
+
+        w = calcular_pesos(imagem, u, v, metrica=metrica)
+        ordem = np.lexsort((chave, w))
+        w, u, v, chave = w[ordem], u[ordem], v[ordem], chave[ordem]
+
+        # Union-Find só do ladrilho, com IDs locais
+        l0, l1, c0, c1 = ladrilho
+        largura_ladrilho = c1 - c0
+        num_local = (l1 - l0) * largura_ladrilho
+        u_local = (u // largura - l0) * largura_ladrilho + (u % largura - c0)
+        v_local = (v // largura - l0) * largura_ladrilho + (v % largura - c0)
+        unidas = UnionFind(num_local).union_many(u_local, v_local, max_unioes=num_local - 1)
+
+        num_floresta = int(unidas.sum())
+        fim = deslocamento + num_floresta
+        saida["w"][deslocamento:fim] = w[unidas]
+        saida["u"][deslocamento:fim] = u[unidas]
+        saida["v"][deslocamento:fim] = v[unidas]
+        saida["chave"][deslocamento:fim] = chave[unidas]
+
+        w_c = calcular_pesos(imagem, u_c, v_c, metrica=metrica)
+        return deslocamento, num_floresta, (w_c, u_c, v_c, chave_c)
+    finally:
+        for memoria in memorias:
+            memoria.close()
+
+
+@medir_etapa("mst")
+def mst_ladrilhos(imagem: np.ndarray,
+                  vizinhanca: str = "8",
+                  metrica: str = "euclidiana",
+                  tamanho_ladrilho: int = TAMANHO_LADRILHO_PADRAO,
+                  num_processos: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    MST do grafo em grade da imagem (H x W x C), calculada por ladrilhos em
+    paralelo e costurada no final.
+
+    O resultado é exatamente a MST de kruskal_mst sobre o grafo completo
+    (criar_grafo_adjacencia + calcular_pesos_arestas com a mesma vizinhança e
+    métrica): mesmas arestas, mesma ordem, mesmo peso total. Ele volta como a
+    tupla de arrays (w, u, v), aceita por segmentar_mst e pela hierarquia, para
+    não criar uma tupla Python por aresta em imagens de dezenas de megapixels.
+
+    Parâmetros:
+    - tamanho_ladrilho: lado (em pixels) de cada ladrilho.
+    - num_processos: tamanho do pool (padrão: os.cpu_count()); 1 roda tudo
+      neste processo, sem pool.
+    """
+    imagem = np.asarray(imagem, dtype=np.float32)
+    if imagem.ndim == 2:
+        imagem = imagem[:, :, None]
+    altura, largura = imagem.shape[:2]
+    num_nos = altura * largura
+    ladrilhos = dividir_em_ladrilhos(altura, largura, tamanho_ladrilho)
+    if num_processos is None:
+        num_processos = os.cpu_count() or 1
+
+    # A imagem vai uma vez para a memória compartilhada (os processos não a copiam)
+    # e cada ladrilho escreve a sua floresta num trecho reservado da saída
+    memorias = []
+    try:
+        memoria_imagem = shared_memory.SharedMemory(create=True, size=max(imagem.nbytes, 1))
+        memorias.append(memoria_imagem)
+        np.ndarray(imagem.shape, dtype=np.float32, buffer=memoria_imagem.buf)[:] = imagem
+
+        saida = {}
+        for coluna, dtype in _COLUNAS_SAIDA:
+            memoria = shared_memory.SharedMemory(create=True, size=max(num_nos * np.dtype(dtype).itemsize, 1))
+            memorias.append(memoria)
+            saida[coluna] = np.ndarray((num_nos,), dtype=dtype, buffer=memoria.buf)
+        nomes_saida = [m.name for m in memorias[1:]]
+
+        tarefas = []
+        deslocamento = 0
+        for ladrilho in ladrilhos:
+            l0, l1, c0, c1 = ladrilho
+            tarefas.append((memoria_imagem.name, imagem.shape, nomes_saida, num_nos,
+                            ladrilho, deslocamento, vizinhanca, metrica))
+            deslocamento += (l1 - l0) * (c1 - c0)
+
+        if num_processos > 1 and len(tarefas) > 1:
+            with ProcessPoolExecutor(max_workers=min(num_processos, len(tarefas))) as pool:
+                resultados = list(pool.map(_floresta_ladrilho, tarefas))
+        else:
+            resultados = [_floresta_ladrilho(tarefa) for tarefa in tarefas]
+
+        # Candidatas: florestas (copiadas para fora da memória compartilhada) + costuras
+        trechos = [np.concatenate([saida[coluna][d:d + n] for d, n, _ in resultados] +
+                                  [costura[i] for _, _, costura in resultados])
+                   for i, (coluna, _) in enumerate(_COLUNAS_SAIDA)]
+    finally:
+        for memoria in memorias:
+            memoria.close()
+            memoria.unlink()
+
+    w, u, v, chave = trechos
+    contar("ladrilhos", len(ladrilhos))
+    contar("arestas_candidatas", len(w))
+    # Mesma ordem de kruskal_mst: peso e, no empate, posição na lista completa
+    ordem = np.lexsort((chave, w))
+    w, u, v = w[ordem], u[ordem], v[ordem]
+    unidas = UnionFind(num_nos).union_many(u, v, max_unioes=num_nos - 1)
+    return w[unidas], u[unidas], v[unidas]
@@ -1,4 +1,3 @@
-
 # ------------------------------------------------------------------------------
 #| Aqui se recebe a matriz gerada da imagem e o array com as arestas.           |
 #| O objetivo é calcular os pesos do grafo por meio da distância euclidiana     |
@@ -7,44 +6,37 @@
 
 import numpy as np
 
-def calcular_pesos_arestas(matriz_imagem, arestas, barra_progresso=None):
+import caminhos  # noqa: F401  (torna src/ importável)
+from instrumentacao import ProgressoEmLotes, contar, medir_etapa
+from pesos import calcular_pesos
+
+@medir_etapa("pesos")
+def calcular_pesos_arestas(matriz_imagem, arestas, barra_progresso=None, metrica="euclidiana"):
     """
     Parâmetros:
     - matriz_imagem (np.ndarray): A matriz 3D (Altura x Largura x 3) 
     - arestas (list): A lista de tuplas (u, v) vinda do grafo básico.
+    - metrica (str): Métrica de cor (ver src/pesos.py). Padrão: euclidiana.
 
     Retorna:
     - list: Uma lista de tuplas no formato (peso, u, v), 
             pronta para ser usada por um algoritmo de AGM (MST).
+
+    Todos os pesos são calculados de uma vez por pesos.calcular_pesos;
+    quem já tem os arrays u/v pode chamá-la direto e ficar com a coluna float32.
     """
 
-    altura, largura, _ = matriz_imagem.shape
-    arestas_com_pesos = []
-    
-    # Percorrer cada aresta (u, v)
-    for u, v in arestas:
-        
-        # Converter os IDs 'u' e 'v' de volta para coordenadas (linha, coluna)
-        
-        # Coordenadas do pixel 'u'
-        linha_u = u // largura
-        coluna_u = u % largura
-        
-        # Coordenadas do pixel 'v'
-        linha_v = v // largura
-        coluna_v = v % largura
-        
-        # Obter os vetores de cor RGB para cada pixel
-        pixel_u_cor = matriz_imagem[linha_u, coluna_u]
-        pixel_v_cor = matriz_imagem[linha_v, coluna_v]
-        
-        # Calcular a distância Euclidiana (Peso)
-        peso = np.linalg.norm(pixel_u_cor - pixel_v_cor)
-        
-        # Adicionar à lista no formato (w, u, v)
-        arestas_com_pesos.append((peso, u, v))
+    arestas_arr = np.asarray(arestas, dtype=np.int64).reshape(-1, 2)
+    u = arestas_arr[:, 0]
+    v = arestas_arr[:, 1]
+
+    pesos = calcular_pesos(matriz_imagem, u, v, metrica=metrica)
+
+    # Monta a lista no formato (w, u, v)
+    arestas_com_pesos = list(zip(pesos.tolist(), u.tolist(), v.tolist()))
+    contar("arestas", len(arestas_com_pesos))
 
-        if barra_progresso:
-            barra_progresso.update(1)
+    with ProgressoEmLotes(barra_progresso) as progresso:
+        progresso.update(len(arestas_com_pesos))
         
-    return arestas_com_pesos
\ No newline at end of file
+    return arestas_com_pesos
@@ -0,0 +1,408 @@
+# ------------------------------------------------------------------------------
+#| Pipeline preguiçoso: as etapas (decodificação -> cor dos pesos / RGB ->      |
+#| arestas -> pesos -> MST -> rótulos -> imagem segmentada) são declaradas como |
+#| um grafo de dependências e só rodam quando alguém pede o resultado:          |
+#|                                                                              |
+#|   pipeline = Pipeline("totoro_rebaixado.jpg", limiar=0.015)                  |
+#|   pipeline.rotulos                  # roda só o necessário até os rótulos    |
+#|   pipeline.renderizar("saida.png")  # reaproveita os rótulos                 |
+#|   pipeline.configurar(limiar=0.03)  # invalida só rótulos e renderização     |
+#|                                                                              |
+#| - A imagem é decodificada uma vez: o mesmo buffer BGR gera a matriz dos      |
+#|   pesos e a RGB da figura; com pesos em Lab, a cor média dos segmentos é     |
+#|   calculada na própria matriz dos pesos (src/cores.py).                      |
+#| - Um intermediário é liberado assim que todas as etapas que dependem dele    |
+#|   já foram calculadas (exceto as etapas em `manter`).                        |
+#| - relatorio() traz tempo/contadores por etapa (src/instrumentacao.py), a     |
+#|   memória retida pelos intermediários e o pico de memória da execução. As    |
+#|   etapas do pipeline aparecem como "pipeline.<etapa>" (incluindo as          |
+#|   dependências calculadas dentro delas), separadas das etapas "mst",         |
+#|   "segmentacao" etc. que as funções chamadas já medem.                       |
+# ------------------------------------------------------------------------------
+
+import sys
+from contextlib import contextmanager
+from typing import Callable, Dict, NamedTuple, Tuple
+
+import cv2
+import numpy as np
+
+import caminhos  # noqa: F401  (torna src/ importável)
+from cache_etapas import hash_arquivo
+from cores import ESPACOS_LAB, converter_espaco_cor
+from grade import arestas_para_arrays, gerar_arestas_grade
+from hierarquia import HierarquiaSegmentacao, chave_hierarquia, hierarquia_em_cache
+from instrumentacao import Instrumentacao, _rss_pico_mb, etapa
+from mst_algoritmo import MOTORES_MST, MOTORES_MST_IMAGEM
+from mst_ladrilhos import TAMANHO_LADRILHO_PADRAO
+from pesos import calcular_pesos
+from segmentacao import segmentar_mst
+from visualizacao import renderizar_segmentacao, salvar_imagem_rgb, visualizar_segmentacao_lab
+
+
+class Etapa(NamedTuple):
+    funcao: Callable[["Pipeline"], object]
+    dependencias: Tuple[str, ...]   # etapas lidas pela função (via pipeline.obter)
+    parametros: Tuple[str, ...]     # parâmetros do pipeline que mudam o resultado
+
+
+def _tamanho_bytes(valor) -> int:
+    """
+    Memória ocupada por um resultado de etapa (arrays, tuplas de arrays ou a
+    lista de tuplas (peso, u, v) da Entrega 1). Arrays mapeados de arquivo
+    (np.memmap) não contam: as páginas pertencem ao cache do sistema.
+    """
+    if isinstance(valor, np.memmap):
+        return 0
+    if isinstance(valor, np.ndarray):
+        return valor.nbytes
+    if isinstance(valor, tuple):
+        return sum(_tamanho_bytes(item) for item in valor)
+    if isinstance(valor, HierarquiaSegmentacao):
+        return _tamanho_bytes(tuple(valor.como_arrays().values()))
+    if isinstance(valor, list):
+        # lista + uma tupla de 3 itens + 3 números por elemento
+        return sys.getsizeof(valor) + len(valor) * (sys.getsizeof((0, 0, 0)) + 3 * 24)
+    return 0
+
+
+class Pipeline:
+    """
+    Parâmetros:
+    - caminho_imagem: arquivo de entrada (decodificado uma vez).
+    - limiar, vizinhanca, espaco_cor, metrica, motor: como em segmentar_lote.
+      Com motor="ladrilhos" a MST sai direto da imagem (sem as etapas de
+      arestas e pesos), com tamanho_ladrilho e processos_ladrilhos.
+    - cache (cache_etapas.CacheEtapas): pesos, MST e a hierarquia de
+      segmentação vêm do cache quando possível; os rótulos saem da hierarquia
+      (um acerto pula grafo, pesos, MST e também a decodificação, se só os
+      rótulos forem pedidos).
+    - manter: etapas que nunca são liberadas (padrão: os produtos finais e a
+      hierarquia, calculada só com cache). Para varrer limiares sem cache e
+      sem recalcular a MST, inclua "mst".
+    - rastrear_memoria: pico de memória medido com tracemalloc (mais preciso,
+      porém mais lento); sem ele, o pico é o RSS máximo do processo.
+    """
+
+    ETAPAS: Dict[str, Etapa] = {}
+
+    def __init__(self, caminho_imagem: str, limiar: float = 0.015, vizinhanca: str = "8",
+                 espaco_cor: str = "lab", metrica: str = "euclidiana", motor: str = "kruskal",
+                 cache=None, manter=("rotulos", "imagem_segmentada", "hierarquia"), rastrear_memoria: bool = False,
+                 tamanho_ladrilho: int = TAMANHO_LADRILHO_PADRAO, processos_ladrilhos: int = None):
+        self.caminho_imagem = caminho_imagem
+        self.limiar = limiar
+        self.vizinhanca = vizinhanca
+        self.espaco_cor = espaco_cor
+        self.metrica = metrica
+        self.motor = motor
+        self.tamanho_ladrilho = tamanho_ladrilho
+        self.processos_ladrilhos = processos_ladrilhos
+        self.cache = cache
+        self.manter = set(manter)
+        self.dimensoes = None
+
+        self.instrumentacao = Instrumentacao(rastrear_memoria=rastrear_memoria)
+        self._valores: Dict[str, object] = {}
+        self._calculadas = set()     # etapas já calculadas (mesmo que liberadas depois)
+        self._profundidade = 0
+        self.memoria_retida_mb = 0.0
+        self.pico_retido_mb = 0.0
+        self.pico_memoria_mb = 0.0
+
+    # --------------------------------------------------------------------------
+    # Avaliação
+    # --------------------------------------------------------------------------
+    def obter(self, nome: str):
+        """
+        Resultado da etapa `nome`, calculando (só) o que faltar.
+        """
+        if nome not in self.ETAPAS:
+            raise KeyError(f"Etapa desconhecida: {nome!r} (disponíveis: {sorted(self.ETAPAS)})")
+        if nome in self._valores:
+            return self._valores[nome]
+
+        # Prefixo próprio: as funções chamadas já medem as etapas "mst",
+        # "segmentacao" etc.; aqui o tempo é o da etapa do pipeline (com cache)
+        with self._medindo(), etapa(f"pipeline.{nome}"):
+            valor = self.ETAPAS[nome].funcao(self)
+        self._valores[nome] = valor
+        self._calculadas.add(nome)
+        self._atualizar_memoria()     # o pico retido inclui o resultado junto com as dependências
+        self._liberar_dependencias(nome)
+        return valor
+
+    @contextmanager
+    def _medindo(self):
+        """
+        Ativa a instrumentação do pipeline; só o bloco mais externo liga e
+        desliga (o tracemalloc não pode reiniciar no meio de uma execução).
+        """
+        if self._profundidade > 0:
+            self._profundidade += 1
+            try:
+                yield
+            finally:
+                self._profundidade -= 1
+            return
+
+        self.instrumentacao.ativar()
+        retida_antes = self.memoria_retida_mb
+        self._profundidade = 1
+        try:
+            yield
+        finally:
+            self._profundidade = 0
+            self.instrumentacao.desativar()
+            if self.instrumentacao.rastrear_memoria:
+                # O tracemalloc só vê o que foi alocado nesta ativação
+                pico = retida_antes + (self.instrumentacao.pico_ativacao_mb or 0.0)
+            else:
+                pico = _rss_pico_mb() or 0.0
+            self.pico_memoria_mb = max(self.pico_memoria_mb, pico)
+
+    def _dependentes(self, nome: str, so_em_uso: bool = False):
+        if not so_em_uso:
+            return [outra for outra, declarada in self.ETAPAS.items() if nome in declarada.dependencias]
+        return [outra for outra in self.ETAPAS if nome in self._dependencias(outra) and self._em_uso(outra)]
+
+    def _dependencias(self, nome: str) -> Tuple[str, ...]:
+        """
+        Dependências que `nome` lê com os parâmetros atuais: a MST lê os pesos
+        ou, com um motor de MOTORES_MST_IMAGEM, a própria imagem dos pesos.
+        """
+        dependencias = self.ETAPAS[nome].dependencias
+        if nome == "mst":
+            lida = "imagem_pesos" if self.motor in MOTORES_MST_IMAGEM else "pesos"
+            return tuple(d for d in dependencias if d == lida)
+        return dependencias
+
+    def _em_uso(self, nome: str) -> bool:
+        # Sem cache os rótulos vêm direto da MST e a hierarquia não é calculada:
+        # ela não pode segurar a MST na memória esperando por ela. Do mesmo
+        # modo, um motor de MOTORES_MST_IMAGEM dispensa as arestas e os pesos
+        if nome == "hierarquia":
+            return self.cache is not None
+        if nome in ("arestas", "pesos"):
+            return self.motor not in MOTORES_MST_IMAGEM
+        return True
+
+    def _liberar_dependencias(self, nome: str):
+        """
+        Libera as dependências de `nome` cujos dependentes já foram todos calculados.
+        """
+        for dependencia in self._dependencias(nome):
+            if dependencia in self.manter or dependencia not in self._valores:
+                continue
+            dependentes = self._dependentes(dependencia, so_em_uso=True)
+            if all(dependente in self._calculadas for dependente in dependentes):
+                del self._valores[dependencia]
+        self._atualizar_memoria()
+
+    def _atualizar_memoria(self):
+        self.memoria_retida_mb = sum(_tamanho_bytes(v) for v in self._valores.values()) / 2**20
+        self.pico_retido_mb = max(self.pico_retido_mb, self.memoria_retida_mb)
+
+    def configurar(self, **parametros):
+        """
+        Muda parâmetros (ex.: limiar=0.03) e invalida só as etapas afetadas
+        e as que dependem delas.
+        """
+        invalidas = set()
+        for nome_parametro, valor in parametros.items():
+            if not any(nome_parametro in e.parametros for e in self.ETAPAS.values()):
+                raise ValueError(f"Parâmetro desconhecido: {nome_parametro!r}")
+            if getattr(self, nome_parametro) != valor:
+                setattr(self, nome_parametro, valor)
+                if nome_parametro == "caminho_imagem":
+                    self.dimensoes = None
+                invalidas |= {nome for nome, e in self.ETAPAS.items() if nome_parametro in e.parametros}
+
+        pendentes = list(invalidas)
+        while pendentes:
+            for dependente in self._dependentes(pendentes.pop()):
+                if dependente not in invalidas:
+                    invalidas.add(dependente)
+                    pendentes.append(dependente)
+        for nome in invalidas:
+            self._valores.pop(nome, None)
+            self._calculadas.discard(nome)
+        # Sem os dependentes, o que foi liberado volta a ser necessário (e recalculado sob demanda)
+        self._atualizar_memoria()
+        return self
+
+    # --------------------------------------------------------------------------
+    # Etapas
+    # --------------------------------------------------------------------------
+    def _decodificar(self) -> np.ndarray:
+        imagem_bgr = cv2.imread(self.caminho_imagem)
+        if imagem_bgr is None:
+            raise ValueError(f"Não foi possível ler a imagem em '{self.caminho_imagem}'")
+        self.dimensoes = imagem_bgr.shape[:2]
+        return imagem_bgr
+
+    def _imagem_pesos(self) -> np.ndarray:
+        return converter_espaco_cor(self.obter("imagem_bgr"), self.espaco_cor)
+
+    def _imagem_rgb(self) -> np.ndarray:
+        return converter_espaco_cor(self.obter("imagem_bgr"), "rgb")
+
+    def _imagem_lab(self) -> np.ndarray:
+        # Com pesos em Lab, a média de cor é feita na própria matriz dos pesos
+        if self.espaco_cor in ESPACOS_LAB:
+            return self.obter("imagem_pesos")
+        return converter_espaco_cor(self.obter("imagem_bgr"), "lab")
+
+    def _arestas(self):
+        if self.dimensoes is None:
+            self.obter("imagem_bgr")
+        return gerar_arestas_grade(*self.dimensoes, self.vizinhanca)
+
+    def _chave_cache(self, nome_etapa: str, **extras) -> str:
+        return self.cache.chave(nome_etapa, hash_arquivo(self.caminho_imagem), espaco_cor=self.espaco_cor,
+                                vizinhanca=self.vizinhanca, metrica=self.metrica, **extras)
+
+    def _pesos(self):
+        def calcular():
+            imagem = self.obter("imagem_pesos")
+            u, v = self.obter("arestas")
+            return calcular_pesos(imagem, u, v, metrica=self.metrica), u, v
+
+        if self.cache is None:
+            return calcular()
+        # Gravado com a ordem do Kruskal: um acerto pula também a ordenação
+        return self.cache.arestas(self._chave_cache("pesos"), lambda: _uvw(calcular()),
+                                  ordem=True, meta=self._meta)
+
+    def _mst(self):
+        def calcular():
+            if self.motor in MOTORES_MST_IMAGEM:
+                return MOTORES_MST_IMAGEM[self.motor](self.obter("imagem_pesos"), self.vizinhanca, self.metrica,
+                                                      tamanho_ladrilho=self.tamanho_ladrilho,
+                                                      num_processos=self.processos_ladrilhos)
+            pesos = self.obter("pesos")
+            altura, largura = self._dimensoes_pesos(pesos)
+            return MOTORES_MST[self.motor](pesos, altura * largura)
+
+        if self.cache is None:
+            return calcular()
+        return self.cache.arestas(self._chave_cache("mst", motor=self.motor),
+                                  lambda: _uvw(calcular()), meta=self._meta)
+
+    def _hierarquia(self) -> HierarquiaSegmentacao:
+        def construir():
+            mst = self.obter("mst")
+            return HierarquiaSegmentacao.da_mst(mst, self._dimensoes_pesos(mst))
+
+        if self.cache is None:
+            return construir()
+        chave = chave_hierarquia(self.cache, self.caminho_imagem, self.vizinhanca, self.espaco_cor,
+                                 self.metrica, self.motor)
+        hierarquia = hierarquia_em_cache(self.cache, chave, construir)
+        self.dimensoes = hierarquia.dimensoes
+        return hierarquia
+
+    def _rotulos(self) -> np.ndarray:
+        if self.cache is not None:
+            # Com cache, os rótulos saem da hierarquia: um acerto pula grafo,
+            # pesos e MST, e outro limiar não refaz as uniões
+            return self.obter("hierarquia").rotulos_no_limiar(self.limiar)
+        mst = self.obter("mst")
+        altura, largura = self._dimensoes_pesos(mst)
+        return segmentar_mst(mst, self.limiar, altura * largura, (altura, largura))
+
+    def _imagem_segmentada(self) -> np.ndarray:
+        return renderizar_segmentacao(None, self.obter("rotulos"), salvar_arquivo=None,
+                                      img_lab=self.obter("imagem_lab"))
+
+    def _meta(self) -> Dict:
+        if self.dimensoes is None:
+            self.obter("imagem_bgr")
+        altura, largura = self.dimensoes
+        return {"altura": altura, "largura": largura, "vizinhanca": self.vizinhanca}
+
+    def _dimensoes_pesos(self, arestas):
+        """
+        (altura, largura): do cabeçalho, se as arestas vieram do cache;
+        senão, da imagem decodificada.
+        """
+        altura, largura = getattr(arestas, "altura", None), getattr(arestas, "largura", None)
+        if altura is not None and largura is not None:
+            self.dimensoes = (altura, largura)
+        elif self.dimensoes is None:
+            self.obter("imagem_bgr")
+        return self.dimensoes
+
+    # --------------------------------------------------------------------------
+    # Produtos
+    # --------------------------------------------------------------------------
+    @property
+    def rotulos(self) -> np.ndarray:
+        return self.obter("rotulos")
+
+    @property
+    def mst(self):
+        return self.obter("mst")
+
+    @property
+    def imagem_rgb(self) -> np.ndarray:
+        return self.obter("imagem_rgb")
+
+    @property
+    def num_segmentos(self) -> int:
+        return int(self.rotulos.max()) + 1
+
+    def renderizar(self, salvar_arquivo: str = None) -> np.ndarray:
+        """
+        Imagem segmentada (cor média de cada segmento), gravada em tamanho
+        real se `salvar_arquivo` for dado.
+        """
+        imagem_segmentada = self.obter("imagem_segmentada")
+        if salvar_arquivo:
+            with self._medindo(), etapa("salvamento"):
+                salvar_imagem_rgb(imagem_segmentada, salvar_arquivo)
+        return imagem_segmentada
+
+    def visualizar(self, salvar_arquivo: str = "resultado_segmentado_lab.png", exibir: bool = True) -> np.ndarray:
+        """
+        Figura lado a lado (original x segmentada) de visualizar_segmentacao_lab.
+        """
+        with self._medindo():
+            return visualizar_segmentacao_lab(self.imagem_rgb, self.rotulos,
+                                              salvar_arquivo=salvar_arquivo, exibir=exibir,
+                                              img_lab=self.obter("imagem_lab"))
+
+    def relatorio(self) -> Dict:
+        relatorio = self.instrumentacao.relatorio()
+        relatorio.update({"memoria_retida_mb": self.memoria_retida_mb, "pico_retido_mb": self.pico_retido_mb,
+                          "pico_memoria_mb": self.pico_memoria_mb,
+                          "pico_medido_por": "tracemalloc" if self.instrumentacao.rastrear_memoria else "rss",
+                          "etapas_retidas": sorted(self._valores)})
+        return relatorio
+
+    def resumo(self) -> str:
+        return (self.instrumentacao.resumo() +
+                f"\nMemória retida: {self.memoria_retida_mb:.1f} MB (pico {self.pico_retido_mb:.1f} MB) | "
+                f"pico da execução: {self.pico_memoria_mb:.1f} MB")
+
+
+def _uvw(arestas_ponderadas):
+    """
+    (w, u, v) em qualquer formato -> colunas (u, v, w) do cache.
+    """
+    w, u, v = arestas_para_arrays(arestas_ponderadas)
+    return u, v, w
+
+
+Pipeline.ETAPAS = {
+    "imagem_bgr": Etapa(Pipeline._decodificar, (), ("caminho_imagem",)),
+    "imagem_pesos": Etapa(Pipeline._imagem_pesos, ("imagem_bgr",), ("espaco_cor",)),
+    "imagem_rgb": Etapa(Pipeline._imagem_rgb, ("imagem_bgr",), ()),
+    "imagem_lab": Etapa(Pipeline._imagem_lab, ("imagem_bgr", "imagem_pesos"), ("espaco_cor",)),
+    "arestas": Etapa(Pipeline._arestas, ("imagem_bgr",), ("vizinhanca",)),
+    "pesos": Etapa(Pipeline._pesos, ("imagem_pesos", "arestas"), ("metrica",)),
+    "mst": Etapa(Pipeline._mst, ("pesos", "imagem_pesos"), ("motor",)),
+    "hierarquia": Etapa(Pipeline._hierarquia, ("mst",), ()),
+    "rotulos": Etapa(Pipeline._rotulos, ("mst", "hierarquia"), ("limiar",)),
+    "imagem_segmentada": Etapa(Pipeline._imagem_segmentada, ("imagem_lab", "rotulos"), ()),
+}
@@ -0,0 +1,230 @@
+# ------------------------------------------------------------------------------
+#| Segmentação em pirâmide (do grosso para o fino). A imagem é reduzida         |
+#| (redimensionar_max_lado, o mesmo max_lado de base_dados) e segmentada        |
+#| inteira só no nível mais grosso. Em cada nível mais fino os rótulos são      |
+#| ampliados e grafo, pesos e uniões são refeitos apenas numa faixa em volta    |
+#| das fronteiras do nível anterior: o interior de cada segmento grosso vira    |
+#| um único nó. O resultado é um 'rotulos_map' em resolução cheia processando   |
+#| uma fração das arestas da grade.                                             |
+#|                                                                              |
+#| Cortar a MST no limiar K une exatamente as componentes conexas das arestas   |
+#| com peso <= K, então nos níveis finos basta unir essas arestas da faixa      |
+#| (sem ordenar nem montar MST). É uma aproximação: detalhes menores que a      |
+#| faixa e que somem na imagem reduzida ficam no segmento grosso em volta.      |
+# ------------------------------------------------------------------------------
+
+import numpy as np
+import cv2
+from typing import List, Tuple
+
+import caminhos  # noqa: F401  (torna src/ importável)
+from base_dados import redimensionar_max_lado
+from cores import converter_espaco_cor
+from grade import gerar_arestas_grade, offsets_vizinhanca
+from instrumentacao import contar, medir_etapa
+from mst_algoritmo import MOTORES_MST, MOTORES_MST_IMAGEM
+from mst_ladrilhos import TAMANHO_LADRILHO_PADRAO
+from pesos import calcular_pesos
+from segmentacao import compactar_rotulos, segmentar_mst
+from union_find import UnionFind
+
+
+# Menor lado aceito no nível mais grosso: abaixo disso o corte grosso quase
+# não tem fronteiras e os níveis finos (que só refazem a faixa em volta
+# delas) devolvem a imagem em poucos segmentos
+LADO_MINIMO = 32
+
+
+def dimensoes_piramide(altura: int, largura: int, niveis: int = 3) -> List[Tuple[int, int]]:
+    """
+    (altura, largura) de cada nível, do mais grosso ao original; cada nível
+    tem metade do max_lado do seguinte. Níveis que deixariam o menor lado
+    abaixo de LADO_MINIMO (ou de um lado da imagem original, se ela já for
+    menor) são descartados.
+    """
+    if niveis < 1:
+        raise ValueError(f"niveis deve ser >= 1 (recebido {niveis})")
+    maior = max(altura, largura)
+    lado_minimo = min(LADO_MINIMO, altura, largura)
+    dimensoes = []
+    for nivel in range(niveis - 1, 0, -1):
+        escala = min(1.0, (maior >> nivel) / maior)
+        dimensoes_nivel = (max(1, int(altura * escala)), max(1, int(largura * escala)))
+        if min(dimensoes_nivel) >= lado_minimo:
+            dimensoes.append(dimensoes_nivel)
+    dimensoes.append((altura, largura))
+    return dimensoes
+
+
+def ampliar_rotulos(rotulos_map: np.ndarray, dimensoes: Tuple[int, int]) -> np.ndarray:
+    """
+    Vizinho mais próximo: cada pixel fino herda o rótulo do pixel grosso que o contém.
+    """
+    altura, largura = rotulos_map.shape
+    linhas = np.arange(dimensoes[0]) * altura // dimensoes[0]
+    colunas = np.arange(dimensoes[1]) * largura // dimensoes[1]
+    return rotulos_map[linhas[:, None], colunas[None, :]]
+
+
+def _pares_deslocados(altura: int, largura: int, dl: int, dc: int):
+    """
+    Fatias (origem, destino) dos pixels que têm vizinho na direção (dl, dc).
+    """
+    origem = (slice(max(0, -dl), altura - max(0, dl)), slice(max(0, -dc), largura - max(0, dc)))
+    destino = (slice(max(0, dl), altura + min(0, dl)), slice(max(0, dc), largura + min(0, dc)))
+    return origem, destino
+
+
+def faixa_fronteira(rotulos_map: np.ndarray, largura_faixa: int = 2, vizinhanca="8") -> np.ndarray:
+    """
+    Máscara dos pixels a até `largura_faixa` pixels de uma fronteira entre
+    rótulos (pixels com um vizinho, na vizinhança dada, de outro rótulo).
+    """
+    altura, largura = rotulos_map.shape
+    fronteira = np.zeros((altura, largura), dtype=np.uint8)
+    for dl, dc in offsets_vizinhanca(vizinhanca):
+        origem, destino = _pares_deslocados(altura, largura, dl, dc)
+        diferente = rotulos_map[origem] != rotulos_map[destino]
+        fronteira[origem] |= diferente
+        fronteira[destino] |= diferente
+    if largura_faixa > 0:
+        nucleo = np.ones((2 * largura_faixa + 1, 2 * largura_faixa + 1), dtype=np.uint8)
+        fronteira = cv2.dilate(fronteira, nucleo)
+    return fronteira.astype(bool)
+
+
+def _arestas_faixa(faixa: np.ndarray, vizinhanca="8") -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Arestas (u, v) da grade com pelo menos uma ponta na faixa, sem gerar as demais.
+    """
+    altura, largura = faixa.shape
+    lista_u, lista_v = [], []
+    for dl, dc in offsets_vizinhanca(vizinhanca):
+        origem, destino = _pares_deslocados(altura, largura, dl, dc)
+        linhas, colunas = np.nonzero(faixa[origem] | faixa[destino])
+        u = ((linhas + origem[0].start) * largura + colunas + origem[1].start).astype(np.int32)
+        lista_u.append(u)
+        lista_v.append(u + np.int32(dl * largura + dc))
+    return np.concatenate(lista_u), np.concatenate(lista_v)
+
+
+def refinar_nivel(imagem: np.ndarray, rotulos_grossos: np.ndarray, limiar: float,
+                  largura_faixa: int = 2, vizinhanca="8", metrica: str = "euclidiana") -> np.ndarray:
+    """
+    Um nível da pirâmide: `rotulos_grossos` (já ampliados para o tamanho de
+    `imagem`) definem a faixa; os pixels dela são nós próprios e o resto de
+    cada segmento grosso vira um nó só. Une as arestas da faixa com peso <= limiar.
+    """
+    altura, largura = rotulos_grossos.shape
+    # A faixa cobre pelo menos o alcance do estêncil ("NxN" liga pixels a N//2 de distância)
+    raio = max(max(abs(dl), abs(dc)) for dl, dc in offsets_vizinhanca(vizinhanca))
+    faixa = faixa_fronteira(rotulos_grossos, max(largura_faixa, raio), vizinhanca)
+
+    # Nó de cada pixel: índice próprio na faixa; fora dela, o nó do segmento grosso
+    num_faixa = int(faixa.sum())
+    nos = (num_faixa + rotulos_grossos.astype(np.int64)).ravel()
+    nos[faixa.ravel()] = np.arange(num_faixa)
+
+    u, v = _arestas_faixa(faixa, vizinhanca)
+    pesos = calcular_pesos(imagem, u, v, metrica=metrica)
+    contar("arestas_piramide", len(u))
+    contar("pixels_faixa", num_faixa)
+
+    num_nos = num_faixa + int(rotulos_grossos.max()) + 1
+    uf = UnionFind(num_nos)
+    abaixo = pesos <= limiar
+    uf.union_many(nos[u[abaixo]], nos[v[abaixo]])
+
+    print(f"Nível {altura}x{largura}: {num_faixa} pixels na faixa ({num_faixa / faixa.size:.1%}), "
+          f"{len(u)} arestas.")
+    # Há até num_faixa + segmentos grossos nós, mais que pixels: compactar_rotulos
+    # espera representantes < num_pixels, então as raízes são renumeradas antes
+    raizes = uf.raizes()[nos]
+    usadas = np.zeros(num_nos, dtype=bool)
+    usadas[raizes] = True
+    densas = (np.cumsum(usadas) - 1)[raizes]
+    return compactar_rotulos(densas, (altura, largura))
+
+
+@medir_etapa("piramide")
+def segmentar_piramide(imagem_bgr: np.ndarray, limiar: float, niveis: int = 3, largura_faixa: int = 2,
+                       vizinhanca="8", espaco_cor: str = "lab", metrica: str = "euclidiana",
+                       motor: str = "kruskal", imagem_pesos: np.ndarray = None,
+                       tamanho_ladrilho: int = TAMANHO_LADRILHO_PADRAO, processos_ladrilhos: int = None) -> np.ndarray:
+    """
+    Segmentação do grosso para o fino de uma imagem BGR uint8 (cv2.imread).
+
+    Args:
+        limiar: o K de segmentar_mst, usado em todos os níveis.
+        niveis: número de níveis (1 = segmentação direta em resolução cheia);
+            limitado para o nível mais grosso ter pelo menos LADO_MINIMO de lado.
+        largura_faixa: raio, em pixels de cada nível, da faixa refeita em
+            volta das fronteiras (no mínimo o raio da vizinhança).
+        vizinhanca, espaco_cor, metrica, motor: como em segmentar_lote; o
+            motor só é usado no nível mais grosso.
+        imagem_pesos: a imagem em `espaco_cor` na resolução cheia, se quem
+            chama já a tem (ex.: cores.ImagemCores); evita convertê-la de novo.
+        tamanho_ladrilho, processos_ladrilhos: opções do motor "ladrilhos".
+
+    Returns:
+        'rotulos_map' em resolução cheia, no formato de segmentar_mst.
+    """
+    altura, largura = imagem_bgr.shape[:2]
+    dimensoes = dimensoes_piramide(altura, largura, niveis)
+    if len(dimensoes) < niveis:
+        print(f"Aviso: {niveis} níveis deixariam o nível mais grosso com menos de {LADO_MINIMO} "
+              f"pixels de lado; usando {len(dimensoes)}.")
+    print(f"Iniciando segmentação em pirâmide ({len(dimensoes)} níveis) com limiar = {limiar}...")
+
+    def imagem_nivel(dimensoes_nivel):
+        if dimensoes_nivel == (altura, largura):
+            if imagem_pesos is not None:
+                return imagem_pesos
+            return converter_espaco_cor(imagem_bgr, espaco_cor)
+        return converter_espaco_cor(redimensionar_max_lado(imagem_bgr, max(dimensoes_nivel)), espaco_cor)
+
+    # Nível mais grosso: grafo completo, MST e corte, como no pipeline normal
+    imagem = imagem_nivel(dimensoes[0])
+    altura_g, largura_g = imagem.shape[:2]
+    if motor in MOTORES_MST_IMAGEM:
+        mst = MOTORES_MST_IMAGEM[motor](imagem, vizinhanca, metrica, tamanho_ladrilho=tamanho_ladrilho,
+                                        num_processos=processos_ladrilhos)
+    else:
+        u, v = gerar_arestas_grade(altura_g, largura_g, vizinhanca)
+        pesos = calcular_pesos(imagem, u, v, metrica=metrica)
+        contar("arestas_piramide", len(u))
+        mst = MOTORES_MST[motor]((pesos, u, v), altura_g * largura_g)
+    rotulos_map = segmentar_mst(mst, limiar, altura_g * largura_g, (altura_g, largura_g))
+
+    for dimensoes_nivel in dimensoes[1:]:
+        imagem = imagem_nivel(dimensoes_nivel)
+        rotulos_map = refinar_nivel(imagem, ampliar_rotulos(rotulos_map, imagem.shape[:2]), limiar,
+                                    largura_faixa, vizinhanca, metrica)
+
+    print(f"Número total de segmentos encontrados: {int(rotulos_map.max()) + 1}")
+    contar("segmentos", int(rotulos_map.max()) + 1)
+    return rotulos_map
+
+
+# --- Teste local  ---
+if __name__ == "__main__":
+    import sys
+    import time
+
+    from instrumentacao import Instrumentacao
+
+    caminho = sys.argv[1] if len(sys.argv) > 1 else "totoro_rebaixado.jpg"
+    limiar = float(sys.argv[2]) if len(sys.argv) > 2 else 0.015
+    imagem_bgr = cv2.imread(caminho)
+    if imagem_bgr is None:
+        sys.exit(f"Não foi possível ler a imagem em '{caminho}'")
+    total_arestas = len(gerar_arestas_grade(*imagem_bgr.shape[:2], "8")[0])
+
+    for niveis in (1, 2, 3, 4):
+        with Instrumentacao() as medicao:
+            inicio = time.perf_counter()
+            rotulos = segmentar_piramide(imagem_bgr, limiar, niveis=niveis)
+            segundos = time.perf_counter() - inicio
+        arestas = medicao.etapas["piramide"]["contadores"]["arestas_piramide"]
+        print(f"--> {niveis} nível(is): {int(rotulos.max()) + 1} segmentos, {segundos:.2f}s, "
+              f"{arestas / total_arestas:.1%} das arestas\n")
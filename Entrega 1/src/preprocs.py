@@ -6,8 +6,14 @@
 # ------------------------------------------------------------------------------
 
 import cv2
-import numpy as np
 
+import caminhos  # noqa: F401  (torna src/ importável)
+# Espaços de cor (rgb, lab, lab32, hsv, ycrcb) ficam em src/cores.py;
+# reexportados aqui para quem já importava de preprocs
+from cores import ESPACOS_COR, converter_espaco_cor  # noqa: F401
+from instrumentacao import contar, medir_etapa
+
+@medir_etapa("preprocessamento")
 def preprocessar_imagem(caminho_imagem, aplicar_blur=True, kernel_blur=(5, 5)):
 
     """
@@ -27,10 +33,9 @@ def preprocessar_imagem(caminho_imagem, aplicar_blur=True, kernel_blur=(5, 5)):
         print(f"Erro: Não foi possível ler a imagem em '{caminho_imagem}'")
         return None
 
-    imagem_lab_cv2 = cv2.cvtColor(imagem_bgr, cv2.COLOR_BGR2Lab)
-
-    # Normalizar os valores (0-1)
-    imagem_normalizada = imagem_lab_cv2.astype(np.float32) / 255.0
+    # Converter para Lab e normalizar os valores (0-1)
+    imagem_normalizada = converter_espaco_cor(imagem_bgr, "lab")
+    contar("pixels", imagem_normalizada.shape[0] * imagem_normalizada.shape[1])
 
     return imagem_normalizada
 
@@ -6,67 +6,19 @@
 # ------------------------------------------------------------------------------
  
 import numpy as np
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 
-class UnionFind:
-    
-    #Usada para agrupar pixels em segmentos.
-    
-    def __init__(self, n: int):
-        """
-        Inicializa a estrutura para 'n' elementos (pixels).
-        Cada pixel começa em seu próprio conjunto.
-        """
-        # 'parent[i]' armazena o pai do elemento 'i'.
-        # Se parent[i] == i, então 'i' é a raiz de um conjunto.
-        self.parent = list(range(n))
-        
-        # 'size[i]' armazena o tamanho do conjunto cuja raiz é 'i'.
-        # Usado para a otimização "union by size".
-        self.size = [1] * n
-        
-        # O número de conjuntos distintos (segmentos).
-        self.num_components = n
-
-    def find(self, i: int) -> int:
-        """
-        Encontra a raiz (representante) do conjunto ao qual 'i' pertence.
-        Aplica "path compression" no processo.
-        """
-        if self.parent[i] == i:
-            return i
-        
-        # Path Compression: Faz com que 'i' e seus ancestrais
-        # apontem diretamente para a raiz.
-        self.parent[i] = self.find(self.parent[i])
-        return self.parent[i]
-
-    def union(self, i: int, j: int) -> bool:
-        """
-        Une os conjuntos que contêm 'i' e 'j'.
-        Usa "union by size": o conjunto menor é anexado ao maior.
-        Retorna True se uma união foi realizada, False se 'i' e 'j'
-        já estavam no mesmo conjunto.
-        """
-        root_i = self.find(i)
-        root_j = self.find(j)
-
-        if root_i != root_j:
-            # Union by Size: Anexa a árvore menor à raiz da árvore maior.
-            if self.size[root_i] < self.size[root_j]:
-                root_i, root_j = root_j, root_i 
-            
-            self.parent[root_j] = root_i
-            self.size[root_i] += self.size[root_j]
-            self.num_components -= 1
-            return True
-        
-        return False
+import caminhos  # noqa: F401  (torna src/ importável)
+from grade import GridGraph, arestas_para_arrays
+from instrumentacao import contar, medir_etapa
+from mst_algoritmo import kruskal_mst
+from union_find import UnionFind
 
+@medir_etapa("segmentacao")
 def segmentar_mst(mst: List[Tuple[float, int, int]], 
                   limiar: float, 
-                  num_pixels: int, 
-                  dimensoes: Tuple[int, int]) -> np.ndarray:
+                  num_pixels: Optional[int] = None, 
+                  dimensoes: Optional[Tuple[int, int]] = None) -> np.ndarray:
     """
     Transforma a Árvore Geradora Mínima (MST) em uma segmentação.
 
@@ -76,7 +28,9 @@ def segmentar_mst(mst: List[Tuple[float, int, int]],
 
     Args:
         mst: A lista de arestas da MST (da Pessoa 4), 
-             formato [(peso, u, v), ...].
+             formato [(peso, u, v), ...]. Também aceita um grade.GridGraph
+             com pesos calculados: a MST dele é calculada aqui mesmo e
+             num_pixels/dimensoes passam a ser opcionais.
         limiar: O valor máximo de peso de aresta para considerar
                 dois pixels como parte do mesmo segmento.
         num_pixels: O número total de pixels (altura * largura).
@@ -89,38 +43,146 @@ def segmentar_mst(mst: List[Tuple[float, int, int]],
     
     print(f"Iniciando segmentação com limiar = {limiar}...")
     
-    altura, largura = dimensoes
-    
+    if isinstance(mst, GridGraph):
+        grafo = mst
+        num_pixels = grafo.num_nos if num_pixels is None else num_pixels
+        dimensoes = grafo.dimensoes if dimensoes is None else dimensoes
+        mst = kruskal_mst(grafo, grafo.num_nos)
+
     # 1. Criar uma nova estrutura Union-Find
     uf = UnionFind(num_pixels)
     
     # 2. & 3. Percorrer a MST e unir conjuntos se o peso <= limiar
-    arestas_unidas = 0
-    for peso, u, v in mst:
-        # 4. Se o peso for baixo o suficiente, une os pixels no mesmo segmento
-        if peso <= limiar:
-            uf.union(u, v)
-            arestas_unidas += 1
+    # 4. Se o peso for baixo o suficiente, une os pixels no mesmo segmento
+    pesos, u, v = arestas_para_arrays(mst)
+    abaixo = pesos <= limiar
+    uf.union_many(u[abaixo], v[abaixo])
+    arestas_unidas = int(abaixo.sum())
 
     print(f"Segmentação concluída. {arestas_unidas} arestas da MST unidas.")
     print(f"Número total de segmentos encontrados: {uf.num_components}")
+    contar("segmentos", uf.num_components)
 
-    rotulos_map = np.zeros(dimensoes, dtype=int)
-    
-    segmento_id_map = {}
-    id_atual = 0
-    
-    for linha in range(altura):
-        for coluna in range(largura):
-
-            pixel_id = linha * largura + coluna
-            
-            raiz = uf.find(pixel_id)
-            
-            if raiz not in segmento_id_map:
-                segmento_id_map[raiz] = id_atual
-                id_atual += 1
-            
-            rotulos_map[linha, coluna] = segmento_id_map[raiz]
-            
-    return rotulos_map
\ No newline at end of file
+    return compactar_rotulos(uf.raizes(), dimensoes)
+
+
+def compactar_rotulos(raizes: np.ndarray, dimensoes: Tuple[int, int]) -> np.ndarray:
+    """
+    Transforma o representante de cada pixel (ex.: UnionFind.raizes()) no
+    'rotulos_map': IDs de 0 a N-1 numerados na ordem raster em que cada
+    segmento aparece pela primeira vez. Tudo em operações de array.
+
+    O dtype é o menor inteiro que comporta N-1 (uint8 até 256 segmentos, ...).
+    """
+    raizes = np.asarray(raizes).ravel()
+    num_pixels = raizes.size
+    posicoes = np.arange(num_pixels)
+
+    # Primeira posição raster de cada representante
+    primeira = np.full(num_pixels, num_pixels, dtype=np.int64)
+    np.minimum.at(primeira, raizes, posicoes)
+
+    # Os pixels "primeiros" de cada segmento, em ordem raster, recebem 0, 1, 2, ...
+    e_primeira = primeira[raizes] == posicoes
+    num_segmentos = int(e_primeira.sum())
+    dtype = np.min_scalar_type(max(num_segmentos - 1, 0))
+    novo_id = np.empty(num_pixels, dtype=dtype)
+    novo_id[raizes[e_primeira]] = np.arange(num_segmentos, dtype=dtype)
+
+    return novo_id[raizes].reshape(dimensoes)
+
+
+@medir_etapa("segmentacao")
+def segmentar_adaptativo(arestas_ponderadas,
+                         k: float,
+                         num_pixels: Optional[int] = None,
+                         dimensoes: Optional[Tuple[int, int]] = None,
+                         tamanho_minimo: int = 0) -> np.ndarray:
+    """
+    Segmentação adaptativa (Felzenszwalb–Huttenlocher) numa única passada.
+
+    Em vez de montar a MST inteira e depois cortá-la com um limiar global,
+    percorre as arestas do grafo em ordem crescente de peso e une dois
+    segmentos C1, C2 quando
+
+        peso <= min(Int(C1) + k/|C1|, Int(C2) + k/|C2|)
+
+    onde Int(C) é a diferença interna do segmento (maior peso da sua MST,
+    que é justamente o peso da última aresta que o uniu) e |C| seu tamanho.
+    Segmentos pequenos toleram diferenças maiores; k controla a escala
+    (k maior → segmentos maiores). A MST intermediária nunca é guardada.
+
+    Args:
+        arestas_ponderadas: lista de (peso, u, v), tupla de arrays (w, u, v)
+            ou grade.GridGraph com pesos (então num_pixels/dimensoes são opcionais).
+        k: constante de escala do critério.
+        num_pixels: O número total de pixels (altura * largura).
+        dimensoes: Uma tupla (altura, largura) da imagem.
+        tamanho_minimo: se > 0, uma segunda passada nas mesmas arestas junta
+            segmentos menores que isso ao vizinho da aresta mais barata.
+
+    Returns:
+        'rotulos_map' no mesmo formato de segmentar_mst.
+    """
+    print(f"Iniciando segmentação adaptativa com k = {k}...")
+
+    if isinstance(arestas_ponderadas, GridGraph):
+        num_pixels = arestas_ponderadas.num_nos if num_pixels is None else num_pixels
+        dimensoes = arestas_ponderadas.dimensoes if dimensoes is None else dimensoes
+
+    pesos, u, v = arestas_para_arrays(arestas_ponderadas)
+    ordem = np.argsort(pesos, kind="stable")
+    pesos, u, v = pesos[ordem].tolist(), u[ordem].tolist(), v[ordem].tolist()
+
+    uf = UnionFind(num_pixels)
+
+    # O laço é sequencial: usa listas locais (mesma técnica de
+    # UnionFind.union_many) e devolve o resultado ao Union-Find no fim.
+    parent = uf.parent.tolist()
+    size = uf.size.tolist()
+    limite = [float(k)] * num_pixels   # Int(C) + k/|C|, mantido na raiz
+    unioes = 0
+
+    for peso, a, b in zip(pesos, u, v):
+        while parent[a] != a:
+            parent[a] = parent[parent[a]]
+            a = parent[a]
+        while parent[b] != b:
+            parent[b] = parent[parent[b]]
+            b = parent[b]
+        if a == b or peso > limite[a] or peso > limite[b]:
+            continue
+        if size[a] < size[b]:
+            a, b = b, a
+        parent[b] = a
+        size[a] += size[b]
+        # arestas chegam em ordem crescente: 'peso' é o novo Int(C)
+        limite[a] = peso + k / size[a]
+        unioes += 1
+
+    if tamanho_minimo > 0:
+        for a, b in zip(u, v):
+            while parent[a] != a:
+                parent[a] = parent[parent[a]]
+                a = parent[a]
+            while parent[b] != b:
+                parent[b] = parent[parent[b]]
+                b = parent[b]
+            if a == b or (size[a] >= tamanho_minimo and size[b] >= tamanho_minimo):
+                continue
+            if size[a] < size[b]:
+                a, b = b, a
+            parent[b] = a
+            size[a] += size[b]
+            unioes += 1
+
+    uf.parent[:] = parent
+    uf.size[:] = size
+    uf.num_components -= unioes
+
+    print(f"Segmentação concluída. {unioes} uniões realizadas.")
+    print(f"Número total de segmentos encontrados: {uf.num_components}")
+    contar("unioes", unioes)
+    contar("segmentos", uf.num_components)
+
+    return compactar_rotulos(uf.raizes(), dimensoes)
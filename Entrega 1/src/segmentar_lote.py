@@ -0,0 +1,449 @@
+# ------------------------------------------------------------------------------
+#| Ponto de entrada de linha de comando: segmenta muitas imagens de uma vez,    |
+#| cada uma num processo do pool (preprocs -> grafo -> pesos -> MST ->          |
+#| segmentação -> imagem de saída).                                             |
+#|                                                                              |
+#| Exemplo:                                                                     |
+#|   python segmentar_lote.py fotos/ "extras/*.jpg" --saida resultados \        |
+#|          --vizinhanca 8 --motor kruskal --limiar 0.015 0.03 -j 4             |
+#|                                                                              |
+#| - Fila limitada: no máximo --fila imagens em andamento (memória sob controle)|
+#| - Falha isolada: o erro numa imagem é registrado e o lote continua; se um    |
+#|   processo morrer, as imagens em andamento no pool viram erro e as demais    |
+#|   seguem num pool novo.                                                      |
+#| - Retomada: imagens com todas as saídas já gravadas são puladas              |
+#|   (--sobrescrever desliga). Parâmetros fora do padrão entram no nome da      |
+#|   saída (ex.: resultado_foto_k0.015_n4_lab.png), assim como a pasta de       |
+#|   imagens de mesmo nome vindas de pastas diferentes.                         |
+#| - --relatorio: JSON com tempo, CPU, memória e contadores de cada etapa,      |
+#|   por imagem (ver src/instrumentacao.py).                                    |
+#| - --niveis N (N > 1): segmentação em pirâmide (piramide.py), que só refaz    |
+#|   as fronteiras em resolução cheia; mais rápida e aproximada.                |
+#| - --superpixels T: agrupa os pixels em superpixels de ~T x T e roda MST e    |
+#|   segmentação no grafo de regiões (src/superpixels.py).                      |
+#| - --motor ladrilhos: MST exata por ladrilhos em paralelo (mst_ladrilhos.py), |
+#|   calculada direto da imagem, sem a lista completa de arestas; para imagens  |
+#|   de dezenas de megapixels (--tamanho-ladrilho, --processos-ladrilhos).      |
+#| - --cache [DIR]: guarda a hierarquia de segmentação de cada imagem no cache  |
+#|   de etapas (src/cache_etapas.py); rodar de novo com outros limiares pula    |
+#|   grafo, pesos e MST.                                                        |
+# ------------------------------------------------------------------------------
+
+import argparse
+import contextlib
+import glob
+import io
+import json
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+import caminhos  # noqa: F401  (torna src/ importável)
+from cache_etapas import CacheEtapas
+from cores import ImagemCores
+from hierarquia import HierarquiaSegmentacao, chave_hierarquia, hierarquia_em_cache
+from instrumentacao import Instrumentacao, etapa
+from mst_algoritmo import MOTORES_MST, MOTORES_MST_IMAGEM, mst_da_imagem
+from mst_ladrilhos import TAMANHO_LADRILHO_PADRAO
+from pesos import METRICAS
+from piramide import segmentar_piramide
+from preprocs import ESPACOS_COR
+from segmentacao import compactar_rotulos, segmentar_mst
+from superpixels import AGREGACOES, grafo_regioes, num_regioes, projetar_rotulos, superpixels_slic
+from visualizacao import renderizar_segmentacao
+
+EXTENSOES_IMAGEM = (".jpg", ".jpeg", ".png", ".bmp", ".tif", ".tiff", ".webp")
+
+
+def listar_imagens(entradas, extensoes=EXTENSOES_IMAGEM):
+    """
+    Expande arquivos, diretórios (sem recursão) e padrões glob numa lista
+    ordenada e sem repetições de imagens.
+    """
+    encontrados = []
+    for entrada in entradas:
+        if os.path.isdir(entrada):
+            candidatos = [os.path.join(entrada, nome) for nome in sorted(os.listdir(entrada))]
+        elif os.path.isfile(entrada):
+            candidatos = [entrada]
+        else:
+            candidatos = sorted(glob.glob(entrada))
+        encontrados += [c for c in candidatos
+                        if os.path.isfile(c) and c.lower().endswith(extensoes)]
+    vistos = set()
+    return [c for c in encontrados if not (os.path.abspath(c) in vistos or vistos.add(os.path.abspath(c)))]
+
+
+def nomes_base(imagens):
+    """
+    Nome de cada imagem nas saídas: o nome do arquivo sem extensão. Imagens
+    de mesmo nome (a/foto.jpg e b/foto.jpg, ou foto.jpg e foto.png) recebem
+    o caminho relativo à pasta comum a elas, com separadores e pontos
+    trocados (a__foto_jpg, b__foto_jpg).
+    """
+    grupos = {}
+    for caminho in imagens:
+        grupos.setdefault(os.path.splitext(os.path.basename(caminho))[0], []).append(caminho)
+    nomes = {}
+    for nome, grupo in grupos.items():
+        if len(grupo) == 1:
+            nomes[grupo[0]] = nome
+            continue
+        absolutos = [os.path.abspath(caminho) for caminho in grupo]
+        raiz = os.path.commonpath([os.path.dirname(absoluto) for absoluto in absolutos])
+        for caminho, absoluto in zip(grupo, absolutos):
+            nomes[caminho] = os.path.relpath(absoluto, raiz).replace(os.sep, "__").replace(".", "_")
+    return nomes
+
+
+def sufixo_parametros(vizinhanca="8", espaco_cor="lab", metrica="euclidiana", motor="kruskal",
+                      niveis=1, superpixels=0, agregacao="media"):
+    """
+    Trecho do nome de saída com os parâmetros fora do padrão (vazio no
+    padrão): rodar de novo com outros parâmetros não pula nem sobrescreve
+    as saídas anteriores.
+    """
+    partes = []
+    if vizinhanca != "8":
+        partes.append(f"n{vizinhanca}")
+    if espaco_cor != "lab":
+        partes.append(espaco_cor)
+    if metrica != "euclidiana":
+        partes.append(metrica)
+    if motor != "kruskal":
+        partes.append(motor)
+    if niveis > 1:
+        partes.append(f"niveis{niveis}")
+    if superpixels > 0:
+        partes.append(f"sp{superpixels}-{agregacao}")
+    return "".join(f"_{parte}" for parte in partes)
+
+
+def formatar_limiar(limiar: float) -> str:
+    """
+    Limiar no nome da saída: curto (0.015) quando isso não perde precisão;
+    senão, todos os dígitos (0.01500001 não vira 0.015).
+    """
+    curto = f"{limiar:g}"
+    return curto if float(curto) == limiar else repr(float(limiar))
+
+
+def caminhos_saida(caminho_imagem, pasta_saida, limiares, nome_base=None, sufixo=""):
+    """
+    Arquivo de saída de cada limiar (mesmo padrão de nome do test_integracao,
+    mais o `sufixo` de sufixo_parametros).
+    """
+    if nome_base is None:
+        nome_base = os.path.splitext(os.path.basename(caminho_imagem))[0]
+    return [os.path.join(pasta_saida, f"resultado_{nome_base}_k{formatar_limiar(limiar)}{sufixo}_lab.png")
+            for limiar in limiares]
+
+
+def segmentar_arquivo(caminho_imagem, saidas, limiares, vizinhanca="8",
+                      espaco_cor="lab", metrica="euclidiana", motor="kruskal", verboso=False,
+                      instrumentar=False, niveis=1, superpixels=0, agregacao="media", cache=None,
+                      tamanho_ladrilho=TAMANHO_LADRILHO_PADRAO, processos_ladrilhos=1):
+    """
+    Trabalho de um processo: segmenta uma imagem para todos os limiares.
+    Nunca levanta exceção: devolve um dicionário com "status" ("ok" ou "erro")
+    e, com instrumentar=True, o "relatorio" da instrumentação.
+    niveis > 1: segmentação em pirâmide (piramide.segmentar_piramide).
+    superpixels > 0: MST e segmentação no grafo de regiões de superpixels
+    desse tamanho (pesos agregados por `agregacao`), projetados nos pixels.
+    cache: diretório do cache de etapas ("" = o padrão) em que a hierarquia
+    de segmentação é guardada; com ela, uma nova execução com a mesma imagem
+    e parâmetros pula grafo, pesos e MST (não vale para pirâmide/superpixels).
+    tamanho_ladrilho, processos_ladrilhos: opções do motor "ladrilhos", que
+    calcula a MST direto da imagem, sem a lista completa de arestas.
+    """
+    opcoes_ladrilhos = {"tamanho_ladrilho": tamanho_ladrilho, "processos_ladrilhos": processos_ladrilhos}
+    inicio = time.perf_counter()
+    # As etapas imprimem bastante; no lote, a saída de cada imagem é descartada
+    saida_etapas = contextlib.nullcontext() if verboso else contextlib.redirect_stdout(io.StringIO())
+    instrumentacao = Instrumentacao() if instrumentar else None
+    try:
+        with saida_etapas, (instrumentacao or contextlib.nullcontext()):
+            # Decodifica uma vez só: a mesma imagem gera os pesos e, na saída, o
+            # Lab das cores médias (o próprio da matriz dos pesos, se ela for Lab)
+            with etapa("preprocessamento"):
+                cores = ImagemCores.de_arquivo(caminho_imagem)
+                matriz_pesos = cores[espaco_cor]
+
+            altura, largura = matriz_pesos.shape[:2]
+            num_pixels = altura * largura
+            if niveis > 1:
+                # A faixa refeita depende dos rótulos grossos, então cada limiar é uma pirâmide
+                mapas = [segmentar_piramide(cores.imagem_bgr, limiar, niveis, vizinhanca=vizinhanca,
+                                            espaco_cor=espaco_cor, metrica=metrica, motor=motor,
+                                            imagem_pesos=matriz_pesos, **opcoes_ladrilhos)
+                         for limiar in limiares]
+            elif cache is not None and superpixels == 0:
+                # Hierarquia do cache de etapas: um acerto pula grafo, pesos e MST
+                cache_etapas = CacheEtapas(cache or None)
+                chave = chave_hierarquia(cache_etapas, caminho_imagem, vizinhanca, espaco_cor, metrica, motor)
+                hierarquia = hierarquia_em_cache(
+                    cache_etapas, chave,
+                    lambda: HierarquiaSegmentacao.da_mst(
+                        mst_da_imagem(matriz_pesos, vizinhanca, metrica, motor, **opcoes_ladrilhos),
+                        (altura, largura)))
+                with etapa("segmentacao"):
+                    mapas = hierarquia.varrer_limiares(limiares)
+            else:
+                if superpixels > 0:
+                    # Os nós do grafo passam a ser as regiões (vistas como uma "imagem" 1 x N)
+                    regioes = superpixels_slic(matriz_pesos, superpixels)
+                    arestas = grafo_regioes(matriz_pesos, regioes, vizinhanca, metrica, agregacao)
+                    num_nos = num_regioes(regioes)
+                    dimensoes_grafo = (1, num_nos)
+                    mst = MOTORES_MST[motor](arestas, num_nos)
+                else:
+                    num_nos, dimensoes_grafo = num_pixels, (altura, largura)
+                    mst = mst_da_imagem(matriz_pesos, vizinhanca, metrica, motor, **opcoes_ladrilhos)
+
+                if len(limiares) == 1:
+                    mapas = [segmentar_mst(mst, limiares[0], num_nos, dimensoes_grafo)]
+                else:
+                    # Vários limiares: a hierarquia responde todos sem refazer as uniões
+                    with etapa("segmentacao"):
+                        mapas = HierarquiaSegmentacao.da_mst(mst, dimensoes_grafo).varrer_limiares(limiares)
+                if superpixels > 0:
+                    mapas = [compactar_rotulos(projetar_rotulos(rotulos_regioes, regioes), (altura, largura))
+                             for rotulos_regioes in mapas]
+
+            num_segmentos = []
+            for rotulos_map, destino in zip(mapas, saidas):
+                # Grava com nome temporário e renomeia: uma saída só existe completa,
+                # então uma execução interrompida é retomada sem arquivos pela metade
+                parcial = destino[:-len(".png")] + ".parcial.png"
+                renderizar_segmentacao(None, rotulos_map, salvar_arquivo=parcial, img_lab=cores.lab())
+                os.replace(parcial, destino)
+                num_segmentos.append(int(rotulos_map.max()) + 1)
+
+        resultado = {"imagem": caminho_imagem, "status": "ok", "segmentos": num_segmentos,
+                     "dimensoes": (altura, largura), "segundos": time.perf_counter() - inicio}
+        if instrumentacao is not None:
+            resultado["relatorio"] = instrumentacao.relatorio()
+        return resultado
+    except Exception as erro:
+        return {"imagem": caminho_imagem, "status": "erro", "erro": f"{type(erro).__name__}: {erro}",
+                "detalhes": traceback.format_exc(), "segundos": time.perf_counter() - inicio}
+
+
+def _chamar(argumentos):
+    return segmentar_arquivo(*argumentos)
+
+
+def processar_lote(imagens, pasta_saida, limiares, vizinhanca="8", espaco_cor="lab",
+                   metrica="euclidiana", motor="kruskal", num_processos=None,
+                   tamanho_fila=None, sobrescrever=False, verboso=False, ao_terminar=None,
+                   instrumentar=False, niveis=1, superpixels=0, agregacao="media", cache=None,
+                   tamanho_ladrilho=TAMANHO_LADRILHO_PADRAO, processos_ladrilhos=None):
+    """
+    Segmenta a lista de imagens no pool de processos.
+
+    - tamanho_fila: máximo de imagens enviadas ao pool ao mesmo tempo
+      (padrão: 2 x num_processos); novas entram conforme as antigas terminam.
+    - sobrescrever=False: pula imagens cujas saídas já existem (retomada).
+      Os nomes das saídas trazem os parâmetros fora do padrão
+      (sufixo_parametros) e distinguem imagens de mesmo nome (nomes_base).
+    - ao_terminar(resultado): chamado no processo principal a cada imagem.
+    - instrumentar: cada resultado traz o "relatorio" de etapas da imagem.
+    - niveis: níveis da segmentação em pirâmide (1 = resolução cheia direto).
+    - superpixels, agregacao: grafo de regiões em vez do grafo de pixels
+      (superpixels = 0 desliga); não se combina com niveis > 1.
+    - cache: diretório do cache de etapas para as hierarquias (ver segmentar_arquivo).
+    - tamanho_ladrilho, processos_ladrilhos: motor "ladrilhos" (mst_ladrilhos);
+      por padrão, os processos do pool dividem as CPUs entre os ladrilhos.
+
+    Retorna a lista de resultados (um dicionário por imagem).
+    """
+    if motor not in MOTORES_MST and motor not in MOTORES_MST_IMAGEM:
+        raise ValueError(f"Motor de MST '{motor}' desconhecido. "
+                         f"Disponíveis: {sorted(MOTORES_MST) + sorted(MOTORES_MST_IMAGEM)}")
+    if niveis > 1 and superpixels > 0:
+        raise ValueError("Pirâmide (niveis > 1) e superpixels são modos alternativos; escolha um.")
+    if superpixels > 0 and motor in MOTORES_MST_IMAGEM:
+        raise ValueError(f"O motor '{motor}' calcula a MST da grade de pixels; não se combina com superpixels.")
+    os.makedirs(pasta_saida, exist_ok=True)
+    num_processos = num_processos or os.cpu_count() or 1
+    if processos_ladrilhos is None:
+        processos_ladrilhos = max(1, (os.cpu_count() or 1) // num_processos)
+    tamanho_fila = tamanho_fila or 2 * num_processos
+    ao_terminar = ao_terminar or (lambda resultado: None)
+
+    nomes = nomes_base(imagens)
+    sufixo = sufixo_parametros(vizinhanca, espaco_cor, metrica, motor, niveis, superpixels, agregacao)
+    saidas_por_imagem = {caminho: caminhos_saida(caminho, pasta_saida, limiares, nomes[caminho], sufixo)
+                         for caminho in imagens}
+    # Duas saídas com o mesmo nome: a segunda seria pulada ou sobrescreveria a primeira
+    if len(set(limiares)) != len(limiares):
+        raise ValueError(f"Limiares repetidos: {list(limiares)}")
+    dona = {}
+    for caminho, saidas in saidas_por_imagem.items():
+        for saida in saidas:
+            if dona.setdefault(saida, caminho) != caminho:
+                raise ValueError(f"'{dona[saida]}' e '{caminho}' gerariam a mesma saída '{saida}'.")
+
+    resultados = []
+    tarefas = []
+    for caminho in imagens:
+        saidas = saidas_por_imagem[caminho]
+        if not sobrescrever and all(os.path.exists(s) for s in saidas):
+            resultado = {"imagem": caminho, "status": "pulada", "segundos": 0.0}
+            resultados.append(resultado)
+            ao_terminar(resultado)
+            continue
+        tarefas.append((caminho, saidas, limiares, vizinhanca, espaco_cor, metrica, motor, verboso,
+                        instrumentar, niveis, superpixels, agregacao, cache,
+                        tamanho_ladrilho, processos_ladrilhos))
+
+    if num_processos == 1:
+        for tarefa in tarefas:
+            resultado = _chamar(tarefa)
+            resultados.append(resultado)
+            ao_terminar(resultado)
+        return resultados
+
+    pendentes = list(reversed(tarefas))   # pop() tira na ordem original
+    pool = ProcessPoolExecutor(max_workers=num_processos)
+    em_andamento = {}
+    quebrado = False
+    try:
+        while True:
+            # Completa a fila até o limite
+            while len(em_andamento) < tamanho_fila and pendentes and not quebrado:
+                tarefa = pendentes.pop()
+                try:
+                    em_andamento[pool.submit(_chamar, tarefa)] = tarefa[0]
+                except BrokenProcessPool:
+                    pendentes.append(tarefa)   # ainda não rodou: vai para o próximo pool
+                    quebrado = True
+            if not em_andamento:
+                if not pendentes:
+                    break
+                # Um processo morto inutiliza o pool inteiro: as imagens que estavam
+                # nele já foram contadas como erro; as restantes seguem num pool novo
+                pool.shutdown(wait=False, cancel_futures=True)
+                pool = ProcessPoolExecutor(max_workers=num_processos)
+                quebrado = False
+                continue
+            prontos, _ = wait(em_andamento, return_when=FIRST_COMPLETED)
+            for futuro in prontos:
+                caminho = em_andamento.pop(futuro)
+                try:
+                    resultado = futuro.result()
+                except Exception as erro:
+                    # Processo do pool morreu (ex.: falta de memória): as imagens em
+                    # andamento nele falham, o lote continua
+                    quebrado = quebrado or isinstance(erro, BrokenProcessPool)
+                    resultado = {"imagem": caminho, "status": "erro",
+                                 "erro": f"{type(erro).__name__}: {erro}", "segundos": 0.0}
+                resultados.append(resultado)
+                ao_terminar(resultado)
+    finally:
+        pool.shutdown()
+    return resultados
+
+
+def _ler_argumentos(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Segmenta imagens (arquivos, pastas ou padrões glob) por MST, em paralelo.")
+    parser.add_argument("entradas", nargs="+", help="imagens, pastas ou padrões glob (ex.: 'fotos/*.jpg')")
+    parser.add_argument("--saida", "-o", default="resultados", help="pasta de saída (padrão: resultados)")
+    parser.add_argument("--vizinhanca", "-n", default="8", help="'4', '8' ou estêncil 'NxN' (padrão: 8)")
+    parser.add_argument("--espaco-cor", default="lab", choices=sorted(ESPACOS_COR),
+                        help="espaço de cor dos pesos (padrão: lab)")
+    parser.add_argument("--metrica", default="euclidiana", choices=sorted(METRICAS),
+                        help="distância de cor entre vizinhos (padrão: euclidiana)")
+    parser.add_argument("--motor", default="kruskal", choices=sorted(MOTORES_MST) + sorted(MOTORES_MST_IMAGEM),
+                        help="algoritmo da MST (padrão: kruskal); 'ladrilhos' calcula a MST exata por "
+                             "ladrilhos em paralelo, sem a lista completa de arestas (imagens enormes)")
+    parser.add_argument("--tamanho-ladrilho", type=int, default=TAMANHO_LADRILHO_PADRAO,
+                        help=f"lado dos ladrilhos com --motor ladrilhos (padrão: {TAMANHO_LADRILHO_PADRAO})")
+    parser.add_argument("--processos-ladrilhos", type=int, default=None,
+                        help="processos por imagem com --motor ladrilhos (padrão: CPUs / --processos)")
+    parser.add_argument("--limiar", "-k", type=float, nargs="+", default=[0.015],
+                        help="um ou mais limiares K (padrão: 0.015)")
+    parser.add_argument("--processos", "-j", type=int, default=None,
+                        help="processos no pool (padrão: número de CPUs)")
+    parser.add_argument("--fila", type=int, default=None,
+                        help="máximo de imagens em andamento (padrão: 2 x processos)")
+    parser.add_argument("--sobrescrever", action="store_true",
+                        help="refaz imagens cujas saídas já existem")
+    parser.add_argument("--verboso", "-v", action="store_true",
+                        help="mostra a saída de cada etapa")
+    parser.add_argument("--relatorio", default=None,
+                        help="grava em JSON as medidas de cada etapa, por imagem")
+    parser.add_argument("--niveis", type=int, default=1,
+                        help="níveis da segmentação em pirâmide, do grosso para o fino "
+                             "(padrão: 1, resolução cheia direto)")
+    parser.add_argument("--superpixels", type=int, default=0, metavar="TAMANHO",
+                        help="lado aproximado dos superpixels; MST e segmentação rodam no grafo "
+                             "de regiões (padrão: 0, desligado)")
+    parser.add_argument("--agregacao", default="media", choices=AGREGACOES,
+                        help="peso entre regiões vizinhas com --superpixels (padrão: media)")
+    parser.add_argument("--cache", nargs="?", const="", default=None, metavar="DIR",
+                        help="guarda a hierarquia de cada imagem no cache de etapas; execuções "
+                             "seguintes pulam grafo, pesos e MST (padrão: ~/.cache/segmentacao_mst)")
+    args = parser.parse_args(argv)
+    if args.niveis < 1:
+        parser.error("--niveis deve ser >= 1")
+    if len(set(args.limiar)) != len(args.limiar):
+        parser.error("--limiar com valores repetidos")
+    if args.niveis > 1 and args.superpixels > 0:
+        parser.error("--niveis e --superpixels são modos alternativos; escolha um")
+    if args.superpixels > 0 and args.motor in MOTORES_MST_IMAGEM:
+        parser.error(f"--motor {args.motor} não se combina com --superpixels")
+    if args.tamanho_ladrilho < 1:
+        parser.error("--tamanho-ladrilho deve ser >= 1")
+    return args
+
+
+def main(argv=None):
+    args = _ler_argumentos(argv)
+    imagens = listar_imagens(args.entradas)
+    if not imagens:
+        print("Nenhuma imagem encontrada nas entradas fornecidas.")
+        return 1
+
+    print(f"{len(imagens)} imagem(ns) | vizinhança {args.vizinhanca} | {args.espaco_cor} | "
+          f"{args.metrica} | {args.motor} | limiares {args.limiar}")
+    contagem = {"ok": 0, "erro": 0, "pulada": 0}
+
+    def ao_terminar(resultado):
+        contagem[resultado["status"]] += 1
+        feitas = sum(contagem.values())
+        if resultado["status"] == "ok":
+            detalhe = f"{resultado['segmentos']} segmentos em {resultado['segundos']:.2f}s"
+        elif resultado["status"] == "pulada":
+            detalhe = "saídas já existem, pulada"
+        else:
+            detalhe = f"ERRO: {resultado['erro']}"
+        print(f"[{feitas}/{len(imagens)}] {resultado['imagem']}: {detalhe}")
+
+    inicio = time.perf_counter()
+    resultados = processar_lote(imagens, args.saida, args.limiar, vizinhanca=args.vizinhanca,
+                                espaco_cor=args.espaco_cor, metrica=args.metrica, motor=args.motor,
+                                num_processos=args.processos, tamanho_fila=args.fila,
+                                sobrescrever=args.sobrescrever, verboso=args.verboso,
+                                ao_terminar=ao_terminar, instrumentar=args.relatorio is not None,
+                                niveis=args.niveis, superpixels=args.superpixels,
+                                agregacao=args.agregacao, cache=args.cache,
+                                tamanho_ladrilho=args.tamanho_ladrilho,
+                                processos_ladrilhos=args.processos_ladrilhos)
+    if args.relatorio:
+        with open(args.relatorio, "w", encoding="utf-8") as f:
+            json.dump([{c: r[c] for c in r if c != "detalhes"} for r in resultados],
+                      f, indent=2, ensure_ascii=False)
+        print(f"Relatório salvo em {args.relatorio}")
+
+    print(f"\nConcluído em {time.perf_counter() - inicio:.1f}s: {contagem['ok']} ok, "
+          f"{contagem['pulada']} puladas, {contagem['erro']} com erro.")
+    return 1 if contagem["erro"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
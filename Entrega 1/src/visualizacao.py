@@ -1,4 +1,3 @@
-
 # ------------------------------------------------------------------------------
 #|Calcula a cor L*a*b* média para cada segmento, pinta a imagem                 |
 #|de saída com essas cores e, em seguida, converte o resultad                   |
@@ -8,74 +7,113 @@
 #|        rotulos_map: Matriz (H, W) da Pessoa 5 (IDs de segmento, int).        |
 #|        salvar_arquivo: Nome do arquivo para salvar a imagem final.           |
 # ------------------------------------------------------------------------------
- 
+
 import numpy as np
-import matplotlib.pyplot as plt
-from skimage import color
-from scipy import ndimage as ndi
+import cv2
 from tqdm import tqdm
 import sys
 
-def visualizar_segmentacao_lab(img_rgb_normalizada: np.ndarray, 
-                               rotulos_map: np.ndarray,
-                               salvar_arquivo: str = "resultado_segmentado_lab.png"):
-    
-    tqdm_write = lambda s: tqdm.write(s, file=sys.stdout)
-    
-    tqdm_write("\n Iniciando visualização...")
-    
-    img_lab = color.rgb2lab(img_rgb_normalizada)
+import caminhos  # noqa: F401  (torna src/ importável)
+from cores import converter_rgb, lab_normalizado_para_rgb
+from instrumentacao import contar, medir_etapa
 
-    #     Identificar todos os IDs de segmento únicos
-    #    'rotulos_map' já deve conter IDs de 0 a N-1
-    segmentos_unicos = np.unique(rotulos_map)
-    num_segmentos = len(segmentos_unicos)
-    tqdm_write(f" Encontrados {num_segmentos} segmentos únicos.")
 
-    #    Usar `scipy.ndimage.mean` é MUITO mais rápido do que um loop
-    #    Ele calcula a média de 'img_lab[canal]' para cada 'label' em 'rotulos_map'
-    tqdm_write("[ Calculando cores médias para cada segmento...")
-    avg_l = ndi.mean(img_lab[:, :, 0], labels=rotulos_map, index=segmentos_unicos)
-    avg_a = ndi.mean(img_lab[:, :, 1], labels=rotulos_map, index=segmentos_unicos)
-    avg_b = ndi.mean(img_lab[:, :, 2], labels=rotulos_map, index=segmentos_unicos)
-
-    cores_medias_lab = np.stack((avg_l, avg_a, avg_b), axis=1)
-
-    tqdm_write(" Pintando a imagem de saída com as cores médias...")
-    img_segmentada_lab = np.zeros_like(img_lab)
-    
-    for i, segmento_id in enumerate(tqdm(segmentos_unicos, 
-                                        desc="Pintando Segmentos", 
-                                        file=sys.stdout, 
-                                        ncols=80)):
-        
-        cor_media = cores_medias_lab[i]
-        
-        img_segmentada_lab[rotulos_map == segmento_id] = cor_media
-
-    img_segmentada_rgb = color.lab2rgb(img_segmentada_lab)
-    
-    # Garante que os valores estejam no intervalo [0, 1]
-    # (Conversões de gamut podem gerar valores ligeiramente fora)
-    img_segmentada_rgb = np.clip(img_segmentada_rgb, 0, 1)
+def cores_medias_segmentos(img: np.ndarray, rotulos_map: np.ndarray) -> np.ndarray:
+    """
+    Cor média de cada segmento, com reduções do tipo bincount
+    (uma passada por canal, sem laço sobre segmentos).
+
+    Retorna:
+    - np.ndarray (N, C): linha i = cor média do segmento i.
+      Supõe rótulos 0..N-1 (formato de segmentar_mst).
+    """
+    rotulos = rotulos_map.ravel()
+    num_segmentos = int(rotulos.max()) + 1 if rotulos.size else 0
+    contagem = np.bincount(rotulos, minlength=num_segmentos)
+    contagem = np.maximum(contagem, 1)  # rótulos sem pixel não dividem por zero
+
+    canais = img.reshape(rotulos.size, -1)
+    cores = np.empty((num_segmentos, canais.shape[1]), dtype=np.float64)
+    for c in range(canais.shape[1]):
+        cores[:, c] = np.bincount(rotulos, weights=canais[:, c], minlength=num_segmentos) / contagem
+    return cores
+
+
+def pintar_segmentos(img_rgb_normalizada: np.ndarray, rotulos_map: np.ndarray,
+                     img_lab: np.ndarray = None) -> np.ndarray:
+    """
+    Imagem RGB [0, 1] onde cada segmento recebe a sua cor L*a*b* média.
+
+    A média é feita em L*a*b*, mas só a paleta (N cores) volta para RGB;
+    a imagem final sai de um único gather cores[rotulos_map].
+
+    img_lab: Lab normalizado já calculado (cores.py, "lab" ou "lab32", ex.: a
+    matriz dos pesos); sem ele, o Lab sai do RGB (uma conversão float32) e
+    img_rgb_normalizada pode ser None quando ele é dado.
+    """
+    if img_lab is None:
+        img_lab = converter_rgb(img_rgb_normalizada, "lab32")
+    cores_medias_lab = cores_medias_segmentos(img_lab, rotulos_map)
+
+    # Fora do gamut, a paleta é cortada em [0, 1]
+    paleta_rgb = lab_normalizado_para_rgb(cores_medias_lab)
+
+    return paleta_rgb[rotulos_map]
+
+
+def salvar_imagem_rgb(img_rgb_normalizada: np.ndarray, caminho: str):
+    """
+    Grava uma imagem RGB float [0, 1] direto em disco (sem matplotlib).
+    """
+    img_u8 = np.round(np.clip(img_rgb_normalizada, 0, 1) * 255).astype(np.uint8)
+    if not cv2.imwrite(caminho, cv2.cvtColor(img_u8, cv2.COLOR_RGB2BGR)):
+        raise ValueError(f"Não foi possível gravar a imagem em '{caminho}'")
+
+
+@medir_etapa("visualizacao")
+def renderizar_segmentacao(img_rgb_normalizada: np.ndarray,
+                           rotulos_map: np.ndarray,
+                           salvar_arquivo: str = "resultado_segmentado_lab.png",
+                           salvar_figura: str = None,
+                           img_lab: np.ndarray = None) -> np.ndarray:
+    """
+    Modo "headless" da visualização, para uso em lote: pinta os segmentos com a
+    cor L*a*b* média e grava a imagem segmentada em tamanho real, sem abrir
+    janela nem montar figura. Se 'salvar_figura' for dado, também gera a
+    figura lado a lado (original x segmentada) nesse arquivo.
+    img_lab: ver pintar_segmentos (reaproveita o Lab já calculado).
+    """
+    img_segmentada_rgb = pintar_segmentos(img_rgb_normalizada, rotulos_map, img_lab)
+    contar("pixels", rotulos_map.size)
+
+    if salvar_arquivo:
+        salvar_imagem_rgb(img_segmentada_rgb, salvar_arquivo)
+    if salvar_figura:
+        _figura_comparacao(img_rgb_normalizada, img_segmentada_rgb,
+                           int(rotulos_map.max()) + 1, salvar_figura, exibir=False)
+
+    return img_segmentada_rgb
+
+
+def _figura_comparacao(img_rgb_normalizada, img_segmentada_rgb, num_segmentos,
+                       salvar_arquivo, exibir=True, tqdm_write=print):
+    # Import tardio: o modo headless não precisa do matplotlib
+    import matplotlib.pyplot as plt
 
-    # 6. Usar Matplotlib para exibir lado a lado
-    tqdm_write(" Exibindo resultado...")
-    
     plt.figure(figsize=(12, 6))
-    
+
     plt.subplot(1, 2, 1)
     plt.imshow(img_rgb_normalizada)
     plt.title("Imagem Original")
     plt.axis('off')
-    
+
     plt.subplot(1, 2, 2)
     plt.imshow(img_segmentada_rgb)
     plt.title(f"Segmentação RGB Média\n{num_segmentos} regiões")
     plt.axis('off')
-    
+
     plt.tight_layout()
-    
+
     # 7. Salvar a imagem final
     if salvar_arquivo:
         try:
@@ -85,6 +123,36 @@ def visualizar_segmentacao_lab(img_rgb_normalizada: np.ndarray,
         except Exception as e:
             tqdm_write(f"AVISO: Não foi possível salvar a imagem. Erro: {e}")
 
-    plt.show()
+    if exibir:
+        plt.show()
+    else:
+        plt.close()
+
+
+@medir_etapa("visualizacao")
+def visualizar_segmentacao_lab(img_rgb_normalizada: np.ndarray,
+                               rotulos_map: np.ndarray,
+                               salvar_arquivo: str = "resultado_segmentado_lab.png",
+                               exibir: bool = True,
+                               img_lab: np.ndarray = None):
+
+    tqdm_write = lambda s: tqdm.write(s, file=sys.stdout)
+
+    tqdm_write("\n Iniciando visualização...")
+
+    #    'rotulos_map' já deve conter IDs de 0 a N-1
+    num_segmentos = int(rotulos_map.max()) + 1
+    tqdm_write(f" Encontrados {num_segmentos} segmentos únicos.")
+
+    #    Médias por segmento com bincount e pintura com um único gather
+    #    (antes: um 'img[rotulos_map == id] = cor' por segmento, O(pixels x segmentos))
+    tqdm_write(" Calculando cores médias e pintando a imagem de saída...")
+    img_segmentada_rgb = pintar_segmentos(img_rgb_normalizada, rotulos_map, img_lab)
+    contar("pixels", rotulos_map.size)
+
+    # 6. Usar Matplotlib para exibir lado a lado
+    tqdm_write(" Exibindo resultado...")
+    _figura_comparacao(img_rgb_normalizada, img_segmentada_rgb, num_segmentos,
+                       salvar_arquivo, exibir=exibir, tqdm_write=tqdm_write)
 
-    return img_segmentada_rgb
\ No newline at end of file
+    return img_segmentada_rgb
@@ -1,54 +1,150 @@
 """
 Algoritmo de Edmond e Chiliu Chuliu Chiuliu
-Descrição: Implementa a fase inicial do algoritmo de Chu-Liu / Edmonds.
+Descrição: Implementa o algoritmo de Chu-Liu / Edmonds.
            1. Seleção Gulosa (Greedy) dos pais de menor custo.
            2. Detecção de Ciclos na seleção feita.
+           3. Solver completo da arborescência mínima/máxima em O(E log V)
+              (contração eficiente de Tarjan/Gabow): Union-Find sobre os
+              super-nós + heaps fundíveis (skew heaps) das arestas de entrada.
+           4. Variante vetorizada por rodadas: todos os ciclos da seleção
+              gulosa são rotulados de uma vez (rotular_ciclos) e contraídos
+              simultaneamente em cada rodada.
 
            RAYSSA E BRUNO, PODEM CONTINUAR NESSE AQUI MSM AAAA
 """
 
 from typing import List, Tuple, Dict, Optional
+import numpy as np
+
+from grade import GridGraph, arestas_direcionadas_para_arrays
+from armazenamento_grafo import EXTENSAO, abrir_grafo
+from instrumentacao import contar, medir_etapa
 
 class EdmondsCore:
     def __init__(self, num_nos: int, raiz: int = 0):
         self.num_nos = num_nos
         self.raiz = raiz
-        # arestas_entrada[v] = lista de tuplas (u, peso)
-        # Significa que existe uma aresta u -> v com custo peso
-        self.arestas_entrada: List[List[Tuple[int, float]]] = [[] for _ in range(num_nos)]
+        # Arestas de entrada em formato CSR (ordenadas pelo nó de destino):
+        # as entradas de v são origem[indptr[v]:indptr[v+1]] com custo peso[...]
+        # Significa que existe uma aresta origem -> v com custo peso
+        self.indptr = np.zeros(num_nos + 1, dtype=np.int64)
+        self.origem = np.empty(0, dtype=np.int32)
+        self.peso = np.empty(0, dtype=np.float32)
 
-    def construir_grafo_entrada(self, lista_arestas_com_peso: List[Tuple[int, int, float]]):
+    @property
+    def destino(self) -> np.ndarray:
+        """
+        Nó de destino de cada posição do CSR (expande o indptr).
         """
-        Recebe a lista bruta da Pessoa 1 (u, v, w) e converte para
-        lista de adjacência invertida para acesso rápido.
+        return np.repeat(np.arange(self.num_nos, dtype=np.int32), np.diff(self.indptr))
+
+    def construir_grafo_entrada(self, lista_arestas_com_peso):
         """
-        print(f"[ChiuLiu] Organizando grafo com {len(lista_arestas_com_peso)} arestas...")
-        for u, v, w in lista_arestas_com_peso:
-            self.arestas_entrada[v].append((u, w))
+        Recebe as arestas da Pessoa 1 e organiza por nó de destino (CSR)
+        para acesso rápido. Aceita, sem criar objetos Python por aresta:
+         - arrays: tupla (u, v, w) ou objeto com atributos u, v, w;
+         - caminho de um .grafo (armazenamento_grafo, mapeado sem cópia) ou
+           de um .npz gerado por base_dados.salvar_arestas_npz;
+         - grade.GridGraph com pesos calculados (se for não-direcionado,
+           cada aresta vira os dois arcos u -> v e v -> u);
+         - grade.ArestasSimetricas (pares guardados uma vez: os dois arcos
+           de cada par são expandidos aqui);
+         - a lista bruta [(u, v, w), ...] (formato antigo).
+        """
+        if isinstance(lista_arestas_com_peso, GridGraph):
+            grafo = lista_arestas_com_peso
+            w, u, v = grafo.arestas_ponderadas()
+            if not grafo.direcionado:
+                u, v, w = np.concatenate([u, v]), np.concatenate([v, u]), np.concatenate([w, w])
+        elif isinstance(lista_arestas_com_peso, str) and lista_arestas_com_peso.endswith(EXTENSAO):
+            u, v, w = arestas_direcionadas_para_arrays(abrir_grafo(lista_arestas_com_peso))
+        elif isinstance(lista_arestas_com_peso, str):
+            # Só u, v e w são lidos (o 'meta' em pickle nem é carregado)
+            with np.load(lista_arestas_com_peso) as dados:
+                u, v, w = dados["u"], dados["v"], dados["w"]
+        else:
+            u, v, w = arestas_direcionadas_para_arrays(lista_arestas_com_peso)
+
+        print(f"[ChiuLiu] Organizando grafo com {len(u)} arestas...")
+        contar("arcos", len(u))
+        # Ordenação estável por destino: dentro de cada nó vale a ordem de entrada
+        ordem = np.argsort(v, kind="stable")
+        self.origem = np.asarray(u)[ordem]
+        self.peso = np.asarray(w)[ordem]
+        self.indptr = np.zeros(self.num_nos + 1, dtype=np.int64)
+        np.cumsum(np.bincount(v, minlength=self.num_nos), out=self.indptr[1:])
+
+    def selecionar_pais_minimos_arrays(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Passo 1 (vetorizado): menor entrada de cada nó com uma redução por
+        segmento do CSR (np.minimum.reduceat). Em empate, vale a primeira
+        entrada, como no min() original.
+        Retorna: (pais, pesos) com pais = -1 na raiz e em nós sem entrada.
+        """
+        pais = np.full(self.num_nos, -1, dtype=np.int64)
+        pesos = np.full(self.num_nos, np.inf, dtype=np.float64)
+
+        # Segmentos não vazios são contíguos no CSR, então o reduceat sobre os
+        # seus inícios cobre exatamente as entradas de cada nó
+        com_entrada = np.flatnonzero(np.diff(self.indptr) > 0)
+        if len(com_entrada) == 0:
+            return pais, pesos
+        minimo_por_no = np.full(self.num_nos, np.inf, dtype=self.peso.dtype)
+        minimo_por_no[com_entrada] = np.minimum.reduceat(self.peso, self.indptr[com_entrada])
+
+        # Primeira posição de cada segmento que atinge o mínimo
+        destino = self.destino
+        atinge = np.flatnonzero(self.peso == minimo_por_no[destino])
+        atinge = atinge[destino[atinge] != self.raiz]
+        primeira = atinge[np.r_[True, destino[atinge][1:] != destino[atinge][:-1]]]
+
+        pais[destino[primeira]] = self.origem[primeira]
+        pesos[destino[primeira]] = self.peso[primeira]
+        return pais, pesos
 
     def selecionar_pais_minimos(self) -> Dict[int, Tuple[int, float]]:
         """
         Passo 1: Para cada nó (exceto raiz), escolhe a aresta de entrada mais barata.
         Retorna: Dicionário {filho: (pai, peso)}
+        (Formato usado por detectar_primeiro_ciclo; o cálculo em si é o de
+        selecionar_pais_minimos_arrays.)
         """
-        pais_escolhidos = {}
-        
-        # Itera sobre todos os nós do grafo
-        for v in range(self.num_nos):
-            if v == self.raiz:
-                continue
-            
-            entradas = self.arestas_entrada[v]
-            if not entradas:
-                continue # Nó isolado (não deveria acontecer na segmentação de img padrão)
-            
-            # Acha a tupla com o menor peso 'w'
-            # x[1] é o peso na tupla (u, w)
-            melhor_pai, menor_peso = min(entradas, key=lambda x: x[1])
-            
-            pais_escolhidos[v] = (melhor_pai, menor_peso)
-            
-        return pais_escolhidos
+        pais, pesos = self.selecionar_pais_minimos_arrays()
+        filhos = np.flatnonzero(pais >= 0)
+        return dict(zip(filhos.tolist(), zip(pais[filhos].tolist(), pesos[filhos].tolist())))
+
+    def detectar_ciclos(self, pais) -> np.ndarray:
+        """
+        Passo 2 (vetorizado): rotula TODOS os ciclos da seleção de uma vez.
+        'pais' pode ser o dicionário de selecionar_pais_minimos ou um array
+        (pais[v] = pai de v, -1 sem pai).
+        Retorna: array com o ID do ciclo de cada nó (-1 fora de ciclo).
+        """
+        if isinstance(pais, dict):
+            array_pais = np.full(self.num_nos, -1, dtype=np.int64)
+            if pais:
+                filhos = np.fromiter(pais.keys(), dtype=np.int64, count=len(pais))
+                array_pais[filhos] = [pai for pai, _ in pais.values()]
+            pais = array_pais
+        return rotular_ciclos(pais)
+
+    @medir_etapa("arborescencia")
+    def resolver_arborescencia(self, maxima: bool = False, metodo: str = "tarjan") -> Tuple[np.ndarray, float]:
+        """
+        Passo completo: arborescência mínima (ou máxima) enraizada em self.raiz.
+        metodo: "tarjan" (arborescencia_minima, O(E log V)) ou "rodadas"
+        (arborescencia_por_rodadas, contrai todos os ciclos a cada rodada).
+        Retorna: (pais, custo) com pais[raiz] = -1.
+        """
+        u, v, w = self.origem, self.destino, self.peso
+
+        print(f"[ChiuLiu] Resolvendo arborescência {'máxima' if maxima else 'mínima'} com {len(u)} arestas...")
+        solver = arborescencia_por_rodadas if metodo == "rodadas" else arborescencia_minima
+        if maxima:
+            # Máxima = mínima com os pesos negados
+            pais, custo = solver(self.num_nos, self.raiz, u, v, -np.asarray(w, dtype=np.float64))
+            return pais, -custo
+        return solver(self.num_nos, self.raiz, u, v, w)
 
     def detectar_primeiro_ciclo(self, pais: Dict[int, Tuple[int, float]]) -> Optional[List[int]]:
         """
@@ -94,4 +190,302 @@ class EdmondsCore:
                 else:
                     curr = None # Chegou na raiz ou nó sem pai
                     
-        return None
\ No newline at end of file
+        return None
+
+# ==========================================================
+# Solver completo: Tarjan/Gabow em O(E log V)
+# ==========================================================
+# Em vez de contrair um ciclo e recomeçar do zero (O(V·E)), cada nó mantém um
+# heap fundível com as suas arestas de entrada. Contrair um ciclo é fundir os
+# heaps dos nós do ciclo (O(log E)) e unir os nós num super-nó no Union-Find.
+# O ajuste de pesos "w - peso da aresta escolhida" vira um delta preguiçoso
+# aplicado à raiz do heap. O Union-Find não faz compressão de caminho para
+# poder ser desfeito (rollback) na fase de reconstrução das arestas escolhidas.
+# Os heaps são guardados em listas paralelas indexadas pelo ID da aresta.
+
+class _HeapsFundiveis:
+    """
+    Skew heaps (mínimo) com soma preguiçosa, um nó por aresta.
+    Todas as operações são iterativas (sem recursão).
+    """
+
+    def __init__(self, pesos: List[float]):
+        self.chave = list(pesos)
+        self.esq = [-1] * len(pesos)
+        self.dir = [-1] * len(pesos)
+        self.delta = [0.0] * len(pesos)
+
+    def _propagar(self, a: int):
+        d = self.delta[a]
+        if d:
+            self.chave[a] += d
+            if self.esq[a] >= 0:
+                self.delta[self.esq[a]] += d
+            if self.dir[a] >= 0:
+                self.delta[self.dir[a]] += d
+            self.delta[a] = 0.0
+
+    def fundir(self, a: int, b: int) -> int:
+        if a < 0:
+            return b
+        if b < 0:
+            return a
+        # Desce pela espinha direita guardando os nós que ficam por cima...
+        caminho = []
+        while a >= 0 and b >= 0:
+            self._propagar(a)
+            self._propagar(b)
+            if self.chave[a] > self.chave[b]:
+                a, b = b, a
+            caminho.append(a)
+            a = self.dir[a]
+        resto = a if a >= 0 else b
+        # ...e sobe pendurando o resultado à esquerda (troca de filhos do skew heap)
+        for no in reversed(caminho):
+            self.dir[no] = self.esq[no]
+            self.esq[no] = resto
+            resto = no
+        return resto
+
+    def topo(self, a: int) -> int:
+        self._propagar(a)
+        return a
+
+    def remover_topo(self, a: int) -> int:
+        self._propagar(a)
+        return self.fundir(self.esq[a], self.dir[a])
+
+
+def arborescencia_minima(num_nos: int, raiz: int, u, v, w) -> Tuple[np.ndarray, float]:
+    """
+    Arborescência geradora mínima enraizada em 'raiz' (Chu-Liu/Edmonds com a
+    contração eficiente de Tarjan/Gabow, O(E log V)).
+
+    Parâmetros:
+    - u, v, w: arestas u -> v com custo w (arrays ou sequências).
+
+    Retorna:
+    - (pais, custo): pais[x] = pai de x na arborescência (-1 na raiz) e o
+      custo total. Levanta ValueError se algum nó não for alcançável da raiz.
+    """
+    u = np.asarray(u).tolist()
+    v = np.asarray(v).tolist()
+    pesos = np.asarray(w, dtype=np.float64).tolist()
+
+    heaps = _HeapsFundiveis(pesos)
+    heap = [-1] * num_nos
+    for e in range(len(u)):
+        if u[e] != v[e]:  # laços nunca entram numa arborescência
+            heap[v[e]] = heaps.fundir(heap[v[e]], e)
+
+    # Union-Find com rollback (union by size, sem compressão de caminho)
+    pai_uf = list(range(num_nos))
+    tamanho = [1] * num_nos
+    historico = []
+
+    def achar(x):
+        while pai_uf[x] != x:
+            x = pai_uf[x]
+        return x
+
+    def unir(a, b):
+        a, b = achar(a), achar(b)
+        if a == b:
+            return False
+        if tamanho[a] < tamanho[b]:
+            a, b = b, a
+        pai_uf[b] = a
+        tamanho[a] += tamanho[b]
+        historico.append((a, b))
+        return True
+
+    def desfazer_ate(marca):
+        while len(historico) > marca:
+            a, b = historico.pop()
+            tamanho[a] -= tamanho[b]
+            pai_uf[b] = b
+
+    visto = [-1] * num_nos
+    visto[raiz] = raiz
+    caminho = [0] * num_nos       # super-nós do caminho atual
+    escolhidas = [0] * num_nos    # aresta escolhida por cada super-nó do caminho
+    entrada = [-1] * num_nos      # aresta de entrada final de cada nó
+    ciclos = []                   # (super-nó, marca do histórico, arestas do ciclo)
+
+    for inicio in range(num_nos):
+        x = inicio
+        qi = 0
+        while visto[x] < 0:
+            if heap[x] < 0:
+                raise ValueError(f"Nó {x} não é alcançável a partir da raiz {raiz}: não existe arborescência")
+            e = heaps.topo(heap[x])
+            # Ajuste de pesos: as demais entradas de x passam a custar w - w(e)
+            heaps.delta[heap[x]] -= heaps.chave[e]
+            heap[x] = heaps.remover_topo(heap[x])
+            escolhidas[qi] = e
+            caminho[qi] = x
+            qi += 1
+            visto[x] = inicio
+            x = achar(u[e])
+            if visto[x] == inicio:
+                # Ciclo encontrado: contrai todos os nós dele num super-nó
+                heap_ciclo = -1
+                fim = qi
+                marca = len(historico)
+                while True:
+                    qi -= 1
+                    y = caminho[qi]
+                    heap_ciclo = heaps.fundir(heap_ciclo, heap[y])
+                    if not unir(x, y):
+                        break
+                x = achar(x)
+                heap[x] = heap_ciclo
+                visto[x] = -1
+                ciclos.append((x, marca, escolhidas[qi:fim]))
+        for i in range(qi):
+            entrada[achar(v[escolhidas[i]])] = escolhidas[i]
+
+    # Reconstrução: expande os ciclos do mais recente para o mais antigo.
+    # Dentro de cada ciclo valem as arestas do ciclo, exceto no nó por onde
+    # a aresta de entrada do super-nó chega.
+    for x, marca, arestas_ciclo in reversed(ciclos):
+        desfazer_ate(marca)
+        aresta_entrada = entrada[x]
+        for e in arestas_ciclo:
+            entrada[achar(v[e])] = e
+        entrada[achar(v[aresta_entrada])] = aresta_entrada
+
+    pais = np.full(num_nos, -1, dtype=np.int64)
+    custo = 0.0
+    for no in range(num_nos):
+        if no != raiz:
+            pais[no] = u[entrada[no]]
+            custo += pesos[entrada[no]]
+    return pais, custo
+
+
+# ==========================================================
+# Ciclos de todos os nós de uma vez + contração por rodadas
+# ==========================================================
+
+def rotular_ciclos(pais) -> np.ndarray:
+    """
+    Rotula todos os ciclos do grafo funcional "v -> pais[v]" numa passada
+    vetorizada (pointer jumping), sem caminhar nó a nó em Python.
+
+    - Após k rodadas de "salto = salto[salto]", salto[x] = pais^(2^k)(x). Com
+      2^k >= n, todo nó já caiu no ciclo do seu caminho (ou na sentinela dos
+      nós sem pai), e a imagem desse salto é exatamente o conjunto de nós em ciclos.
+    - Em paralelo, 'menor' acumula o menor ID ao longo dos mesmos saltos; para
+      um nó de ciclo isso é o menor ID do ciclo, usado como identificador.
+
+    Retorna: ciclo_id[v] em 0..C-1 para nós em ciclos (numerados pela ordem
+    do menor nó de cada ciclo) e -1 para os demais.
+    """
+    pais = np.asarray(pais, dtype=np.int64)
+    n = len(pais)
+    if n == 0:
+        return np.empty(0, dtype=np.int64)
+
+    # Nós sem pai (-1) apontam para a sentinela n, que aponta para si mesma
+    salto = np.append(np.where(pais < 0, n, pais), n)
+    menor = np.arange(n + 1, dtype=np.int64)
+    alcance = 1
+    while alcance < n + 1:
+        menor = np.minimum(menor, menor[salto])
+        salto = salto[salto]
+        alcance *= 2
+
+    em_ciclo = np.zeros(n + 1, dtype=bool)
+    em_ciclo[salto] = True
+    em_ciclo = em_ciclo[:n]
+
+    ciclo_id = np.full(n, -1, dtype=np.int64)
+    representantes = menor[:n][em_ciclo]
+    ciclo_id[em_ciclo] = np.searchsorted(np.unique(representantes), representantes)
+    return ciclo_id
+
+
+def _entradas_minimas(num_nos: int, raiz: int, u: np.ndarray, v: np.ndarray, w: np.ndarray):
+    """
+    Para cada nó, a posição da aresta de entrada mais barata (empate: menor posição)
+    e o seu peso. A raiz e nós sem entrada ficam com -1 / inf.
+    """
+    candidatas = np.flatnonzero(v != raiz)
+    menor_peso = np.full(num_nos, np.inf)
+    np.minimum.at(menor_peso, v[candidatas], w[candidatas])
+
+    empatadas = candidatas[w[candidatas] == menor_peso[v[candidatas]]]
+    escolha = np.full(num_nos, len(u), dtype=np.int64)
+    np.minimum.at(escolha, v[empatadas], empatadas)
+    escolha[escolha == len(u)] = -1
+    return escolha, menor_peso
+
+
+def arborescencia_por_rodadas(num_nos: int, raiz: int, u, v, w) -> Tuple[np.ndarray, float]:
+    """
+    Chu-Liu/Edmonds em rodadas vetorizadas: em cada rodada todo nó escolhe a
+    entrada mais barata, todos os ciclos são rotulados por rotular_ciclos e
+    contraídos ao mesmo tempo, e as arestas que entram num ciclo têm o peso
+    reduzido pelo da entrada escolhida do nó de destino. No fim, as rodadas
+    são desfeitas de trás para frente para recuperar as arestas originais.
+
+    Mesmo contrato de arborescencia_minima: (pais, custo).
+    """
+    u_orig = np.asarray(u, dtype=np.int64)
+    v_orig = np.asarray(v, dtype=np.int64)
+    w_orig = np.asarray(w, dtype=np.float64)
+
+    vivas = u_orig != v_orig
+    cu, cv, cw = u_orig[vivas], v_orig[vivas], w_orig[vivas]
+    indice = np.flatnonzero(vivas)         # aresta original de cada aresta viva
+    n, r = num_nos, raiz
+    no_atual = np.arange(num_nos)          # nó original -> nó do grafo atual
+    rodadas = []
+
+    while True:
+        escolha, menor_peso = _entradas_minimas(n, r, cu, cv, cw)
+        sem_entrada = escolha < 0
+        sem_entrada[r] = False
+        if sem_entrada.any():
+            raise ValueError(f"Existem nós não alcançáveis a partir da raiz {raiz}: não existe arborescência")
+
+        pais = np.where(escolha >= 0, cu[np.maximum(escolha, 0)], -1)
+        pais[r] = -1
+        ciclo = rotular_ciclos(pais)
+        escolha_original = np.where(escolha >= 0, indice[np.maximum(escolha, 0)], -1)
+
+        if (ciclo < 0).all():
+            solucao = escolha_original
+            break
+
+        # Contração simultânea: ciclo c vira o nó c; os demais vêm depois
+        num_ciclos = int(ciclo.max()) + 1
+        fora = np.flatnonzero(ciclo < 0)
+        novo = np.empty(n, dtype=np.int64)
+        novo[ciclo >= 0] = ciclo[ciclo >= 0]
+        novo[fora] = num_ciclos + np.arange(len(fora))
+        rodadas.append((no_atual, novo, ciclo, escolha_original))
+
+        reducao = np.where(ciclo[cv] >= 0, menor_peso[cv], 0.0)
+        nu, nv = novo[cu], novo[cv]
+        manter = nu != nv
+        cu, cv, cw, indice = nu[manter], nv[manter], (cw - reducao)[manter], indice[manter]
+        no_atual = novo[no_atual]
+        r = int(novo[r])
+        n = num_ciclos + len(fora)
+
+    # Expansão: cada super-nó de ciclo recebe a sua aresta de entrada no nó
+    # onde ela de fato chega; os outros nós do ciclo mantêm a aresta do ciclo.
+    for no_atual, novo, ciclo, escolha_original in reversed(rodadas):
+        herdada = solucao[novo]
+        chega_em = np.where(herdada >= 0, no_atual[v_orig[np.maximum(herdada, 0)]], -1)
+        usa_ciclo = (ciclo >= 0) & (chega_em != np.arange(len(novo)))
+        solucao = np.where(usa_ciclo, escolha_original, herdada)
+
+    pais = np.full(num_nos, -1, dtype=np.int64)
+    tem_pai = solucao >= 0
+    pais[tem_pai] = u_orig[solucao[tem_pai]]
+    pais[raiz] = -1
+    custo = float(w_orig[solucao[tem_pai & (np.arange(num_nos) != raiz)]].sum())
+    return pais, custo
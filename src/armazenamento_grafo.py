@@ -0,0 +1,199 @@
+"""
+armazenamento_grafo.py
+Formato em disco (versionado) para grafos de arestas, aberto com np.memmap.
+
+Substitui o par .npz comprimido + list(zip(...)) de base_dados: carregar um
+grafo salvo não descomprime nada nem cria tuplas Python; as colunas são
+mapeadas direto do arquivo (cópia zero) e só as páginas lidas vão para a RAM.
+
+Layout de um arquivo .grafo:
+ - 8 bytes: assinatura b"GRAFOSEG";
+ - 4 bytes: tamanho do cabeçalho (uint32 little-endian);
+ - cabeçalho JSON (UTF-8): versão, número de arestas, metadados e, para cada
+   coluna, dtype e deslocamento no arquivo;
+ - colunas brutas little-endian, cada uma alinhada em 64 bytes:
+   u (int32), v (int32), w (float32) e, opcionalmente, `ordem` (int64), a
+   permutação que ordena as arestas por peso (argsort estável de w).
+
+Grafos direcionados simétricos (grade.ArestasSimetricas) são gravados uma vez
+por par, com meta["simetrico"] = True e as colunas extras `direcao` (int8) e,
+só para métricas assimétricas, `w_reverso` (float32); arcos() devolve os
+dois sentidos.
+
+Sem pickle: os metadados precisam ser serializáveis em JSON.
+"""
+
+import json
+from typing import Dict, Optional, Tuple, Union
+import numpy as np
+
+from grade import arcos_simetricos
+
+ASSINATURA = b"GRAFOSEG"
+VERSAO = 1
+EXTENSAO = ".grafo"
+_ALINHAMENTO = 64
+
+_DTYPES = {"u": "<i4", "v": "<i4", "w": "<f4", "ordem": "<i8",
+           "w_reverso": "<f4", "direcao": "<i1"}
+
+
+def _alinhar(posicao: int) -> int:
+    return -(-posicao // _ALINHAMENTO) * _ALINHAMENTO
+
+
+class GrafoMapeado:
+    """
+    Grafo aberto de um arquivo .grafo.
+
+    Atributos u, v, w (e ordem, ou None) são np.memmap somente leitura por
+    padrão; o objeto é aceito em todo lugar que aceita as colunas (u, v, w):
+    EdmondsCore.construir_grafo_entrada, base_dados.colunas_arestas e, no
+    formato (w, u, v), grade.arestas_para_arrays / kruskal_mst.
+    """
+
+    def __init__(self, caminho: str, cabecalho: Dict, colunas: Dict[str, np.ndarray]):
+        self.caminho = caminho
+        self.versao = cabecalho["versao"]
+        self.num_arestas = cabecalho["num_arestas"]
+        self.meta = cabecalho.get("meta", {})
+        self.u = colunas["u"]
+        self.v = colunas["v"]
+        self.w = colunas["w"]
+        self.ordem: Optional[np.ndarray] = colunas.get("ordem")
+        self.w_reverso: Optional[np.ndarray] = colunas.get("w_reverso")
+        self.direcao: Optional[np.ndarray] = colunas.get("direcao")
+
+    def __len__(self) -> int:
+        return self.num_arestas
+
+    @property
+    def altura(self) -> Optional[int]:
+        return self.meta.get("altura")
+
+    @property
+    def largura(self) -> Optional[int]:
+        return self.meta.get("largura")
+
+    @property
+    def num_nos(self) -> Optional[int]:
+        if self.altura is None or self.largura is None:
+            return None
+        return self.altura * self.largura
+
+    @property
+    def simetrico(self) -> bool:
+        return bool(self.meta.get("simetrico", False))
+
+    @property
+    def pesos_simetricos(self) -> bool:
+        return self.w_reverso is None
+
+    def arcos(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Arcos (u, v, w) do grafo direcionado: num arquivo simétrico, os dois
+        sentidos de cada par; senão, as próprias colunas.
+        """
+        if not self.simetrico:
+            return self.u, self.v, self.w
+        return arcos_simetricos(self.u, self.v, self.w, self.w_reverso,
+                                self.direcao, self.meta.get("vizinhanca"))
+
+    def __repr__(self) -> str:
+        return (f"GrafoMapeado({self.caminho!r}, {self.num_arestas} arestas, "
+                f"ordem={'sim' if self.ordem is not None else 'não'})")
+
+
+def salvar_grafo(caminho: str,
+                 u: np.ndarray,
+                 v: np.ndarray,
+                 w: np.ndarray,
+                 meta: Optional[Dict] = None,
+                 ordem: Union[bool, np.ndarray, None] = None,
+                 colunas_extras: Optional[Dict[str, np.ndarray]] = None) -> str:
+    """
+    Grava as colunas (u, v, w) no formato .grafo.
+
+    - meta: dicionário JSON (ex.: altura, largura, vizinhança, origem).
+    - ordem: True calcula e grava o argsort estável de w (a ordem do Kruskal);
+      um array grava a permutação fornecida; None/False não grava.
+    - colunas_extras: "w_reverso" e/ou "direcao" (grafos simétricos).
+
+    Retorna o caminho gravado (com a extensão .grafo, se faltar).
+    """
+    if not caminho.endswith(EXTENSAO):
+        caminho += EXTENSAO
+    num_arestas = len(u)
+    if len(v) != num_arestas or len(w) != num_arestas:
+        raise ValueError(f"Colunas com tamanhos diferentes: u={len(u)}, v={len(v)}, w={len(w)}")
+
+    colunas = {"u": u, "v": v, "w": w}
+    if ordem is True:
+        ordem = np.argsort(np.asarray(w), kind="stable")
+    if ordem is not None and ordem is not False:
+        colunas["ordem"] = ordem
+    for nome, coluna in (colunas_extras or {}).items():
+        if nome not in _DTYPES:
+            raise ValueError(f"Coluna desconhecida: {nome!r}")
+        if coluna is not None:
+            colunas[nome] = coluna
+
+    # Deslocamentos dependem do tamanho do cabeçalho, que depende dos deslocamentos:
+    # reserva o cabeçalho com folga (o JSON é preenchido com espaços até o fim)
+    def montar_cabecalho(inicio_dados: int) -> Dict:
+        descricao, posicao = {}, inicio_dados
+        for nome in colunas:
+            descricao[nome] = {"dtype": _DTYPES[nome], "deslocamento": posicao}
+            posicao = _alinhar(posicao + num_arestas * np.dtype(_DTYPES[nome]).itemsize)
+        return {"versao": VERSAO, "num_arestas": num_arestas,
+                "colunas": descricao, "meta": meta or {}}
+
+    tamanho_reservado = len(json.dumps(montar_cabecalho(1 << 62)).encode("utf-8"))
+    inicio_dados = _alinhar(len(ASSINATURA) + 4 + tamanho_reservado)
+    texto = json.dumps(montar_cabecalho(inicio_dados)).encode("utf-8")
+    texto = texto.ljust(inicio_dados - len(ASSINATURA) - 4, b" ")
+
+    with open(caminho, "wb") as f:
+        f.write(ASSINATURA)
+        f.write(np.uint32(len(texto)).astype("<u4").tobytes())
+        f.write(texto)
+        for nome, coluna in colunas.items():
+            f.seek(_alinhar(f.tell()))
+            np.asarray(coluna).astype(_DTYPES[nome], copy=False).tofile(f)
+        # Garante que o arquivo cubra o alinhamento da última coluna
+        f.truncate(_alinhar(f.tell()))
+
+    return caminho
+
+
+def ler_cabecalho(caminho: str) -> Dict:
+    """
+    Lê e valida o cabeçalho JSON de um arquivo .grafo (sem tocar nas colunas).
+    """
+    with open(caminho, "rb") as f:
+        if f.read(len(ASSINATURA)) != ASSINATURA:
+            raise ValueError(f"'{caminho}' não é um arquivo {EXTENSAO}")
+        tamanho = int(np.frombuffer(f.read(4), dtype="<u4")[0])
+        cabecalho = json.loads(f.read(tamanho).decode("utf-8"))
+    if cabecalho.get("versao", 0) > VERSAO:
+        raise ValueError(f"'{caminho}' usa a versão {cabecalho['versao']} do formato "
+                         f"(suportada até {VERSAO})")
+    return cabecalho
+
+
+def abrir_grafo(caminho: str, modo: str = "r") -> GrafoMapeado:
+    """
+    Abre um arquivo .grafo mapeando as colunas com np.memmap (cópia zero).
+    modo: "r" (somente leitura), "r+" (edita no próprio arquivo) ou "c" (cópia na escrita).
+    """
+    cabecalho = ler_cabecalho(caminho)
+    num_arestas = cabecalho["num_arestas"]
+    colunas = {}
+    for nome, descricao in cabecalho["colunas"].items():
+        if num_arestas == 0:
+            # np.memmap não aceita mapeamentos vazios
+            colunas[nome] = np.empty(0, dtype=descricao["dtype"])
+            continue
+        colunas[nome] = np.memmap(caminho, dtype=descricao["dtype"], mode=modo,
+                                  offset=descricao["deslocamento"], shape=(num_arestas,))
+    return GrafoMapeado(caminho, cabecalho, colunas)
@@ -3,23 +3,30 @@
 base_dados.py
 Unifica:
  - leitura e normalização de imagem
- - construção de grafo DIRECIONADO (4 ou 8 vizinhos)
+ - construção de grafo DIRECIONADO (4, 8 vizinhos ou estêncil NxN)
  - cálculo de pesos entre pixels (distância de cor)
- - salvamento em .npz e .csv
+ - salvamento em .grafo (colunas mapeadas em memória), .npz e .csv
  - funções simples de inspeção/visualização
 
 Uso:
-  python base_dados.py --img imagens/exemplo.jpg --out dados/edges_saida --maxsize 300 --neigh 4
+  python base_dados.py --img imagens/exemplo.jpg --out dados/edges_saida --maxsize 300 --neigh 4 [--csv nenhum] [--sem-plots] [--cache]
 """
 
 from typing import Tuple, List, Dict
 import numpy as np
 import cv2
 import os
-import csv
-from tqdm import tqdm
+import gzip
+import threading
 import matplotlib.pyplot as plt
 
+from grade import ArestasSimetricas, gerar_arestas_grade, arestas_direcionadas_para_arrays
+from pesos import calcular_pesos
+from armazenamento_grafo import GrafoMapeado, abrir_grafo, salvar_grafo
+from cache_etapas import CacheEtapas, hash_arquivo
+from cores import converter_espaco_cor
+from instrumentacao import contar, etapa, medir_etapa
+
 # -----------------------
 # Utilitários de ID <-> coordenada
 # -----------------------
@@ -32,6 +39,22 @@ def id_para_coord(indice: int, largura: int) -> Tuple[int, int]:
 # -----------------------
 # Leitura e normalização de imagem
 # -----------------------
+def redimensionar_max_lado(imagem: np.ndarray, max_lado: int = None) -> np.ndarray:
+    """
+    Reduz a imagem (média por área) mantendo a proporção para max(width,height) <= max_lado.
+    Imagens que já cabem (ou max_lado=None) voltam sem cópia.
+    """
+    if max_lado is None:
+        return imagem
+    altura, largura = imagem.shape[:2]
+    escala = min(1.0, max_lado / max(altura, largura))
+    if escala >= 1.0:
+        return imagem
+    nova_largura = max(1, int(largura * escala))
+    nova_altura = max(1, int(altura * escala))
+    return cv2.resize(imagem, (nova_largura, nova_altura), interpolation=cv2.INTER_AREA)
+
+@medir_etapa("preprocessamento")
 def carregar_imagem_rgb_normalizada(caminho_imagem: str, max_lado: int = None) -> np.ndarray:
     """
     Carrega imagem e retorna array RGB float32 em [0,1].
@@ -42,16 +65,8 @@ def carregar_imagem_rgb_normalizada(caminho_imagem: str, max_lado: int = None) -
     img_bgr = cv2.imread(caminho_imagem, cv2.IMREAD_COLOR)
     if img_bgr is None:
         raise ValueError("Erro ao carregar imagem com cv2.imread")
-    img_rgb = cv2.cvtColor(img_bgr, cv2.COLOR_BGR2RGB)
-    if max_lado is not None:
-        altura, largura = img_rgb.shape[:2]
-        escala = min(1.0, max_lado / max(altura, largura))
-        if escala < 1.0:
-            nova_largura = int(largura * escala)
-            nova_altura = int(altura * escala)
-            img_rgb = cv2.resize(img_rgb, (nova_largura, nova_altura), interpolation=cv2.INTER_AREA)
-    img_float = img_rgb.astype(np.float32) / 255.0
-    return img_float
+    # Só a imagem já reduzida é convertida (cores.py: RGB float32 / 255)
+    return converter_espaco_cor(redimensionar_max_lado(img_bgr, max_lado), "rgb")
 
 # -----------------------
 # Construção do grafo DIRECIONADO
@@ -59,25 +74,15 @@ def carregar_imagem_rgb_normalizada(caminho_imagem: str, max_lado: int = None) -
 def gerar_arestas_direcionadas(altura: int, largura: int, vizinhanca: str = "4") -> List[Tuple[int,int]]:
     """
     Gera lista de arestas direcionadas (u,v) sem pesos.
-    vizinhanca: "4" ou "8".
+    vizinhanca: "4", "8" ou estêncil "NxN" (ex.: "5x5") — ver grade.offsets_vizinhanca.
     Nota: cada par de vizinhos será representado em ambos os sentidos porque a função varre todos os pixels.
+    A ordem é a mesma da antiga varredura pixel a pixel; para obter arrays int32
+    em vez da lista de tuplas, use grade.gerar_arestas_grade(..., direcionado=True),
+    ou grade.ArestasSimetricas para guardar cada par uma vez só.
     """
-    arestas: List[Tuple[int,int]] = []
-    # offsets para vizinhança 4
-    offsets_4 = [(0,1),(1,0),(0,-1),(-1,0)]
-    # offsets adicionais para vizinhança 8 (diagonais)
-    offsets_8 = offsets_4 + [(-1,-1),(-1,1),(1,-1),(1,1)]
-    offsets = offsets_4 if vizinhanca == "4" else offsets_8  # mudar de "4" para "8" para aumentar quantidade de ligações
-
-    for linha in range(altura):
-        for coluna in range(largura):
-            u = coord_para_id(linha, coluna, largura)
-            for dr, dc in offsets:
-                nl, nc = linha + dr, coluna + dc
-                if 0 <= nl < altura and 0 <= nc < largura:
-                    v = coord_para_id(nl, nc, largura)
-                    arestas.append((u, v))
-    return arestas
+    # mudar de "4" para "8" para aumentar quantidade de ligações
+    u, v = gerar_arestas_grade(altura, largura, vizinhanca, direcionado=True)
+    return list(zip(u.tolist(), v.tolist()))
 
 # -----------------------
 # Cálculo de pesos
@@ -86,66 +91,176 @@ def calcular_pesos_por_cor(img_rgb_normalizada: np.ndarray, lista_arestas: List[
     """
     Para cada aresta (u,v), calcula peso w = distância entre cor de u e v.
     Retorna lista de (u, v, w).
+    metrica: qualquer métrica de pesos.METRICAS ("euclidiana", "l1", "delta_e", ...).
+    O cálculo é vetorizado (pesos.calcular_pesos); com os arrays u/v em mãos,
+    prefira chamá-lo direto e manter a coluna float32.
     """
-
-    altura, largura = img_rgb_normalizada.shape[:2]
-
-    def cor_por_id(idx: int) -> np.ndarray:
-        l, c = id_para_coord(idx, largura)
-        return img_rgb_normalizada[l, c]  # vetor [R,G,B]
-
-    pesos: List[Tuple[int,int,float]] = []
-    # usar tqdm para ver progresso em imagens maiores
-    for (u, v) in tqdm(lista_arestas, desc="Calculando pesos"):
-        cor_u = cor_por_id(u)
-        cor_v = cor_por_id(v)
-        if metrica == "euclidiana" or metrica == "euclidiana_rgb":
-            w = float(np.linalg.norm(cor_u - cor_v))
-        else:
-            raise NotImplementedError("Apenas 'euclidiana' implementado")
-        pesos.append((u, v, w))
-    return pesos
+    arestas_arr = np.asarray(lista_arestas, dtype=np.int64).reshape(-1, 2)
+    u_arr = arestas_arr[:, 0]
+    v_arr = arestas_arr[:, 1]
+    w_arr = calcular_pesos(img_rgb_normalizada, u_arr, v_arr, metrica=metrica)
+    return list(zip(u_arr.tolist(), v_arr.tolist(), w_arr.tolist()))
 
 # -----------------------
 # Salvamento / Leitura
 # -----------------------
+def colunas_arestas(pesos_arestas) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Colunas (u, v, w) das arestas, seja qual for o formato recebido:
+    lista de (u, v, w), tupla de arrays (u, v, w) ou objeto com atributos u, v, w.
+    Com arrays, nada é copiado. Um grafo simétrico (ArestasSimetricas) é
+    expandido nos dois sentidos.
+    """
+    return arestas_direcionadas_para_arrays(pesos_arestas)
+
 def salvar_arestas_npz(caminho_saida: str, altura: int, largura: int, pesos_arestas: List[Tuple[int,int,float]], metadados: Dict = None):
     """
     Salva arrays u, v, w e metadados em arquivo .npz comprimido.
+    pesos_arestas: lista de (u, v, w) ou arrays (u, v, w) (ver colunas_arestas).
     """
-    u_arr = np.array([t[0] for t in pesos_arestas], dtype=np.int32)
-    v_arr = np.array([t[1] for t in pesos_arestas], dtype=np.int32)
-    w_arr = np.array([t[2] for t in pesos_arestas], dtype=np.float32)
+    u_arr, v_arr, w_arr = colunas_arestas(pesos_arestas)
+    u_arr = np.asarray(u_arr, dtype=np.int32)
+    v_arr = np.asarray(v_arr, dtype=np.int32)
+    w_arr = np.asarray(w_arr, dtype=np.float32)
     meta = metadados.copy() if metadados else {}
     meta.update({"altura": altura, "largura": largura})
     # meta salvo como objeto para manter dicionário
     np.savez_compressed(caminho_saida + ".npz", u=u_arr, v=v_arr, w=w_arr, meta=np.array([meta], dtype=object))
     print(f"Salvo {len(u_arr)} arestas em {caminho_saida}.npz")
 
+def salvar_arestas_grafo(caminho_saida: str, altura: int, largura: int, pesos_arestas, metadados: Dict = None, com_ordem: bool = True) -> str:
+    """
+    Salva u, v, w no formato .grafo (armazenamento_grafo): cabeçalho JSON + colunas
+    brutas, sem compressão nem pickle. Com com_ordem=True, grava também a ordem
+    das arestas por peso, que o kruskal_mst reaproveita sem reordenar.
+    Um grafo simétrico (ArestasSimetricas) é gravado uma vez por par (a
+    ordem gravada é a dos pares, que é a do Kruskal da Entrega 1); ao abrir,
+    grafo.arcos() devolve os dois sentidos.
+    """
+    meta = metadados.copy() if metadados else {}
+    meta.update({"altura": altura, "largura": largura})
+    if isinstance(pesos_arestas, ArestasSimetricas):
+        meta.update({"simetrico": True, "vizinhanca": pesos_arestas.vizinhanca})
+        extras = {"direcao": pesos_arestas.direcao, "w_reverso": pesos_arestas.w_reverso}
+        caminho = salvar_grafo(caminho_saida, pesos_arestas.u, pesos_arestas.v, pesos_arestas.w,
+                               meta, ordem=com_ordem, colunas_extras=extras)
+        print(f"Salvo {pesos_arestas.num_pares} pares ({pesos_arestas.num_arcos} arcos) em {caminho}")
+        return caminho
+    u_arr, v_arr, w_arr = colunas_arestas(pesos_arestas)
+    caminho = salvar_grafo(caminho_saida, u_arr, v_arr, w_arr, meta, ordem=com_ordem)
+    print(f"Salvo {len(u_arr)} arestas em {caminho}")
+    return caminho
+
+def carregar_arestas_grafo(caminho_grafo: str) -> Tuple[int, int, GrafoMapeado, Dict]:
+    """
+    Abre um .grafo e retorna (altura, largura, grafo, meta), onde grafo.u, grafo.v
+    e grafo.w são np.memmap (cópia zero). O grafo pode ser passado direto para
+    EdmondsCore.construir_grafo_entrada, colunas_arestas ou kruskal_mst.
+    """
+    grafo = abrir_grafo(caminho_grafo)
+    return grafo.altura, grafo.largura, grafo, grafo.meta
+
 def carregar_arestas_npz(caminho_npz: str) -> Tuple[int,int,List[Tuple[int,int,float]],Dict]:
     """
     Carrega arquivo .npz gerado por salvar_arestas_npz e retorna (altura, largura, lista_de_(u,v,w), meta)
+    Formato antigo (precisa de allow_pickle e monta a lista inteira);
+    para arquivos novos, prefira carregar_arestas_grafo.
     """
     d = np.load(caminho_npz, allow_pickle=True)
     u_arr = d["u"].astype(np.int32)
     v_arr = d["v"].astype(np.int32)
     w_arr = d["w"].astype(np.float32)
-    meta = d["meta"][0].item() if "meta" in d else {}
+    meta = d["meta"][0] if "meta" in d else {}
     altura = meta.get("altura")
     largura = meta.get("largura")
     lista_pesos = list(zip(u_arr.tolist(), v_arr.tolist(), w_arr.tolist()))
     return altura, largura, lista_pesos, meta
 
-def salvar_arestas_csv(caminho_csv: str, pesos_arestas: List[Tuple[int,int,float]]):
+def _digitos_ascii(x: np.ndarray, largura_min: int = 1) -> np.ndarray:
+    """
+    Matriz (D, n) com os dígitos ASCII de cada inteiro não-negativo de x,
+    alinhados à direita. Zeros à esquerda (além de largura_min) viram o byte 0,
+    que é descartado na montagem das linhas.
+    """
+    maximo = int(x.max()) if len(x) else 0
+    num_digitos = max(len(str(maximo)), largura_min)
+    matriz = np.empty((num_digitos, len(x)), dtype=np.uint8)
+    resto = x.copy()
+    for j in range(num_digitos - 1, -1, -1):
+        np.add(resto % 10, 48, out=matriz[j], casting="unsafe")
+        resto //= 10
+        if j < num_digitos - largura_min:
+            matriz[j][x < 10 ** (num_digitos - 1 - j)] = 0
+    return matriz
+
+def _formatar_linhas_csv(u: np.ndarray, v: np.ndarray, w: np.ndarray) -> bytes:
+    """
+    Formata um bloco de arestas como linhas "u,v,w\r\n" (w com 6 casas),
+    byte a byte igual ao csv.writer com f"{w:.6f}", montando os caracteres
+    com operações de array em vez de uma string Python por aresta.
+    """
+    w = np.asarray(w)
+    # Caminho vetorizado só vale para pesos float32 finitos: w * 1e6 é exato em
+    # float64 e np.rint arredonda meio-para-par, como a formatação do Python
+    if not (np.isfinite(w).all() and np.array_equal(w.astype(np.float32), w)):
+        return "".join(f"{a},{b},{c:.6f}\r\n" for a, b, c in
+                       zip(np.asarray(u).tolist(), np.asarray(v).tolist(), w.tolist())).encode()
+
+    n = len(w)
+    escalado = np.rint(np.abs(w.astype(np.float64)) * 1e6).astype(np.int64)
+    sinal = np.where(np.signbit(w), ord("-"), 0).astype(np.uint8)[None, :]
+    separador = lambda c: np.full((1, n), ord(c), dtype=np.uint8)
+    colunas = np.vstack([
+        _digitos_ascii(np.asarray(u, dtype=np.int64)), separador(","),
+        _digitos_ascii(np.asarray(v, dtype=np.int64)), separador(","),
+        sinal, _digitos_ascii(escalado // 1000000), separador("."),
+        _digitos_ascii(escalado % 1000000, largura_min=6),
+        separador("\r"), separador("\n"),
+    ])
+    linhas = np.ascontiguousarray(colunas.T)
+    return linhas[linhas != 0].tobytes()
+
+def salvar_arestas_csv(caminho_csv: str,
+                       pesos_arestas: List[Tuple[int,int,float]],
+                       comprimir: bool = None,
+                       tamanho_bloco: int = 1 << 20,
+                       em_segundo_plano: bool = False):
     """
     Salva arestas em CSV com cabeçalho u,v,w — útil para inspeção humana (Excel/Sheets).
+    Aceita a lista de (u, v, w) ou arrays (ver colunas_arestas); as linhas são
+    formatadas em blocos de `tamanho_bloco` arestas direto dos arrays e
+    gravadas à medida que ficam prontas.
+    - comprimir: grava gzip (padrão: só se o caminho terminar em .gz;
+      com True, .gz é acrescentado ao nome se faltar).
+    - em_segundo_plano: grava numa thread e retorna o threading.Thread já
+      iniciado (use .join() para esperar); senão retorna None.
+    Um grafo simétrico com pesos simétricos sai com uma linha por par
+    (o arco de volta tem o mesmo peso).
     """
-    with open(caminho_csv, mode="w", newline="") as f:
-        writer = csv.writer(f)
-        writer.writerow(["u","v","w"])
-        for u, v, w in pesos_arestas:
-            writer.writerow([u, v, f"{w:.6f}"])
-    print(f"CSV salvo em {caminho_csv}")
+    if comprimir is None:
+        comprimir = caminho_csv.endswith(".gz")
+    elif comprimir and not caminho_csv.endswith(".gz"):
+        caminho_csv += ".gz"
+    if isinstance(pesos_arestas, ArestasSimetricas) and pesos_arestas.pesos_simetricos:
+        u_arr, v_arr, w_arr = pesos_arestas.u, pesos_arestas.v, pesos_arestas.w
+    else:
+        u_arr, v_arr, w_arr = colunas_arestas(pesos_arestas)
+
+    def gravar():
+        abrir = (lambda c: gzip.open(c, "wb", compresslevel=6)) if comprimir else (lambda c: open(c, "wb"))
+        with abrir(caminho_csv) as f:
+            f.write(b"u,v,w\r\n")
+            for inicio in range(0, len(u_arr), tamanho_bloco):
+                fim = inicio + tamanho_bloco
+                f.write(_formatar_linhas_csv(u_arr[inicio:fim], v_arr[inicio:fim], w_arr[inicio:fim]))
+        print(f"CSV salvo em {caminho_csv}")
+
+    if em_segundo_plano:
+        escritor = threading.Thread(target=gravar, name="salvar_arestas_csv")
+        escritor.start()
+        return escritor
+    gravar()
+    return None
 
 # -----------------------
 # Inspeção rápida / Visualizações
@@ -154,14 +269,18 @@ def estatisticas_rapidas(altura: int, largura: int, pesos_arestas: List[Tuple[in
     """
     Imprime informações básicas para verificação.
     """
+    u_arr, v_arr, w_arr = colunas_arestas(pesos_arestas)
     n_nos = altura * largura
-    n_arestas = len(pesos_arestas)
+    n_arestas = len(u_arr)
     print("=== ESTATÍSTICAS RÁPIDAS ===")
     print(f"Pixels (nós): {n_nos}")
     print(f"Arestas direcionadas: {n_arestas}")
+    if isinstance(pesos_arestas, ArestasSimetricas):
+        print(f"Pares guardados (uma vez cada): {pesos_arestas.num_pares}"
+              f" — pesos {'simétricos' if pesos_arestas.pesos_simetricos else 'assimétricos'}")
     print(f"Arestas por nó (média): {n_arestas / n_nos:.2f}")
     print("Amostra de até 10 arestas (u, v, w):")
-    for t in pesos_arestas[:10]:
+    for t in zip(u_arr[:10].tolist(), v_arr[:10].tolist(), w_arr[:10].tolist()):
         print(t)
     # checagem de contagem com fórmula para 4/8
     n_undirected_4 = altura * (largura - 1) + (altura - 1) * largura
@@ -171,7 +290,10 @@ def estatisticas_rapidas(altura: int, largura: int, pesos_arestas: List[Tuple[in
     print("============================")
 
 def plot_histograma_pesos(pesos_arestas: List[Tuple[int,int,float]], numero_bins: int = 50, salvar_caminho: str = None, exibir: bool = True):
-    pesos = np.array([t[2] for t in pesos_arestas], dtype=np.float32)
+    if isinstance(pesos_arestas, ArestasSimetricas) and pesos_arestas.pesos_simetricos:
+        pesos = np.asarray(pesos_arestas.w, dtype=np.float32)  # um valor por par
+    else:
+        pesos = np.asarray(colunas_arestas(pesos_arestas)[2], dtype=np.float32)
     plt.figure(figsize=(6,4))
     plt.hist(pesos, bins=numero_bins)
     plt.title("Histograma de pesos (distância de cor)")
@@ -200,7 +322,8 @@ def desenhar_overlay_grafo(img_rgb_normalizada: np.ndarray, lista_arestas: List[
         for coluna in range(largura):
             idx = coord_para_id(linha, coluna, largura)
             G.add_node(idx, pos=(coluna, altura - 1 - linha))
-    amostra_arestas = [(u, v) for (u, v, _) in lista_arestas[:max_arestas]]
+    u_arr, v_arr, _ = colunas_arestas(lista_arestas)
+    amostra_arestas = zip(u_arr[:max_arestas].tolist(), v_arr[:max_arestas].tolist())
     for u, v in amostra_arestas:
         G.add_edge(u, v)
     pos = nx.get_node_attributes(G, 'pos')
@@ -219,22 +342,55 @@ def pipeline_unificado(caminho_imagem: str,
                        caminho_saida_base: str,
                        max_lado: int = 200,
                        vizinhanca: str = "4",
-                       gerar_plots: bool = True) -> Tuple[np.ndarray, List[Tuple[int,int,float]]]:
+                       gerar_plots: bool = True,
+                       retornar_arrays: bool = False,
+                       modo_csv: str = "imediato",
+                       comprimir_csv: bool = False,
+                       cache: CacheEtapas = None):
     """
-    Executa pipeline completo: leitura -> gerar arestas direcionadas -> calcular pesos -> salvar .npz e .csv -> inspeção.
+    Executa pipeline completo: leitura -> gerar arestas direcionadas -> calcular pesos -> salvar .grafo e .csv -> inspeção.
     Retorna (imagem_normalizada, lista_de_(u,v,w)).
+    O grafo direcionado é simétrico: cada par de vizinhos é guardado e pesado
+    uma vez só (grade.ArestasSimetricas), e o .grafo/.csv saem com metade do tamanho.
+    Com retornar_arrays=True, retorna (imagem_normalizada, ArestasSimetricas),
+    pronto para Edmonds.EdmondsCore.construir_grafo_entrada (que recebe os dois
+    arcos de cada par) sem passar por uma lista de tuplas.
+    modo_csv: "imediato" grava o .csv antes de seguir, "segundo_plano" grava
+    numa thread enquanto o resto do pipeline roda (o processo espera a thread
+    terminar antes de sair) e "nenhum" pula o CSV. comprimir_csv grava .csv.gz.
+    cache (cache_etapas.CacheEtapas): a imagem normalizada e os pesos são
+    reaproveitados entre execuções com a mesma imagem, max_lado e vizinhança
+    (os arquivos de saída continuam sendo gravados).
     """
-    img = carregar_imagem_rgb_normalizada(caminho_imagem, max_lado)
+    if modo_csv not in ("imediato", "segundo_plano", "nenhum"):
+        raise ValueError(f"modo_csv inválido: {modo_csv!r} (use 'imediato', 'segundo_plano' ou 'nenhum')")
+    if cache is None:
+        img = carregar_imagem_rgb_normalizada(caminho_imagem, max_lado)
+    else:
+        chave_imagem = cache.chave("imagem", hash_arquivo(caminho_imagem), max_lado=max_lado, espaco_cor="rgb")
+        img = cache.array(chave_imagem, lambda: carregar_imagem_rgb_normalizada(caminho_imagem, max_lado))
     altura, largura = img.shape[:2]
     print(f"Imagem carregada {os.path.basename(caminho_imagem)} — {largura}x{altura}")
-    arestas = gerar_arestas_direcionadas(altura, largura, vizinhanca)
-    print(f"Arestas direcionadas geradas: {len(arestas)}")
-    pesos = calcular_pesos_por_cor(img, arestas)
+    with etapa("grafo_pesos"):
+        if cache is None:
+            pesos = ArestasSimetricas.da_imagem(img, vizinhanca)
+        else:
+            chave_pesos = cache.chave("pesos", chave_imagem, vizinhanca=vizinhanca,
+                                      metrica="euclidiana", simetrico=True)
+            grafo = cache.arestas(chave_pesos, lambda: ArestasSimetricas.da_imagem(img, vizinhanca),
+                                  meta={"altura": altura, "largura": largura,
+                                        "vizinhanca": vizinhanca, "simetrico": True})
+            pesos = ArestasSimetricas(grafo.u, grafo.v, grafo.w, grafo.w_reverso, grafo.direcao, vizinhanca)
+        contar("pares", pesos.num_pares)
+    print(f"Arestas direcionadas geradas: {pesos.num_arcos} ({pesos.num_pares} pares)")
 
-    # salvar .npz e .csv
+    # salvar .grafo e .csv
     metadados = {"origem": os.path.basename(caminho_imagem), "vizinhanca": vizinhanca}
-    salvar_arestas_npz(caminho_saida_base, altura, largura, pesos, metadados)
-    salvar_arestas_csv(caminho_saida_base + ".csv", pesos)
+    with etapa("salvamento"):
+        salvar_arestas_grafo(caminho_saida_base, altura, largura, pesos, metadados)
+        if modo_csv != "nenhum":
+            salvar_arestas_csv(caminho_saida_base + ".csv", pesos, comprimir=comprimir_csv,
+                               em_segundo_plano=(modo_csv == "segundo_plano"))
 
     # inspeção
     estatisticas_rapidas(altura, largura, pesos)
@@ -242,35 +398,45 @@ def pipeline_unificado(caminho_imagem: str,
         plot_histograma_pesos(pesos, numero_bins=50, salvar_caminho=caminho_saida_base + "_hist.png", exibir=True)
         if max(altura, largura) <= 150:
             desenhar_overlay_grafo(img, pesos, max_arestas=500)
-    return img, pesos
+    if retornar_arrays:
+        return img, pesos
+    u_arr, v_arr, w_arr = pesos.arcos()
+    return img, list(zip(u_arr.tolist(), v_arr.tolist(), w_arr.tolist()))
 
 # -----------------------
 # Execução via CLI
 # -----------------------
 if __name__ == "__main__":
-    # Caminho da imagem que será processada
-    caminho_imagem = "/home/ana/Grafos---Trabalho-de-Segmentacao-de-Imagem/jiji.jpg"  
-
-    # Prefixo dos arquivos de saída (vai gerar .npz e .csv)
-    caminho_saida = "/home/ana/Grafos---Trabalho-de-Segmentacao-de-Imagem/src/dados"
-    # Mudar o nome se quiser separar os resultados
+    import argparse
 
+    parser = argparse.ArgumentParser(description="Gera o grafo direcionado ponderado de uma imagem (.grafo e .csv).")
+    # Caminho da imagem que será processada
+    parser.add_argument("--img", required=True, help="imagem de entrada")
+    # Prefixo dos arquivos de saída (vai gerar .grafo e .csv)
+    parser.add_argument("--out", default="dados", help="prefixo dos arquivos de saída (padrão: dados)")
     # Tamanho máximo permitido para o lado maior da imagem
-    max_lado_imagem = None  
-    # Aumentar para 300–400 deixa mais detalhes, mas pesa mais na memória
-
-    # Tipo de vizinhança: "4" ou "8"
-    vizinhanca_pixels = "8"
-    # Trocar para "8" aumenta a quantidade de ligações no grafo
-
-    # Gerar (True) ou não gerar (False) as imagens de visualização
-    gerar_plots = True  
+    # (aumentar para 300–400 deixa mais detalhes, mas pesa mais na memória)
+    parser.add_argument("--maxsize", type=int, default=None, help="lado maior máximo (padrão: tamanho original)")
+    # Tipo de vizinhança: "8" aumenta a quantidade de ligações no grafo
+    parser.add_argument("--neigh", default="8", help="'4', '8' ou estêncil 'NxN' (padrão: 8)")
+    parser.add_argument("--csv", default="imediato", choices=["imediato", "segundo_plano", "nenhum"],
+                        help="quando gravar o .csv (padrão: imediato)")
+    # Gerar ou não gerar as imagens de visualização
+    parser.add_argument("--sem-plots", action="store_true", help="não gera histograma/overlay")
+    # Reaproveita imagem e pesos de execuções anteriores (ver cache_etapas.py)
+    parser.add_argument("--cache", nargs="?", const="", default=None, metavar="DIR",
+                        help="usa o cache de etapas (padrão: ~/.cache/segmentacao_mst)")
+    args = parser.parse_args()
+    cache = None if args.cache is None else CacheEtapas(args.cache or None)
 
-    # Chamada direta do pipeline
     pipeline_unificado(
-        caminho_imagem,
-        caminho_saida,
-        max_lado=max_lado_imagem,
-        vizinhanca=vizinhanca_pixels,
-        gerar_plots=gerar_plots
+        args.img,
+        args.out,
+        max_lado=args.maxsize,
+        vizinhanca=args.neigh,
+        gerar_plots=not args.sem_plots,
+        modo_csv=args.csv,
+        cache=cache
     )
+    if cache is not None:
+        print(cache.resumo())
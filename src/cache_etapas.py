@@ -0,0 +1,283 @@
+"""
+cache_etapas.py
+Cache em disco das etapas caras do pipeline (imagem pré-processada, pesos
+das arestas, MST), endereçado pelo conteúdo: a chave é o hash dos bytes da
+imagem + os parâmetros da etapa (max_lado, vizinhança, espaço de cor,
+métrica...). Mudar só o limiar ou o caminho de saída reaproveita tudo e a
+nova execução paga apenas a segmentação.
+
+Os artefatos são mapeáveis em memória:
+ - arrays (imagem) em .npy, abertos com np.load(mmap_mode="r");
+ - arestas (pesos, MST) no formato .grafo de armazenamento_grafo, com a
+   ordem do Kruskal gravada quando pedida.
+Conjuntos de arrays (ex.: a hierarquia de segmentação) vão num .npz, lido
+inteiro.
+
+O diretório tem um limite de tamanho com despejo LRU (o mtime de cada
+arquivo é o relógio: um acerto "toca" o arquivo) e o objeto mantém as
+estatísticas de acertos e faltas por etapa.
+
+Uso:
+    cache = CacheEtapas()                      # ~/.cache/segmentacao_mst
+    chave_img = cache.chave("imagem", hash_arquivo(caminho), max_lado=200)
+    img = cache.array(chave_img, lambda: carregar(caminho), etapa="imagem")
+    chave_pesos = cache.chave("pesos", chave_img, vizinhanca="8", metrica="euclidiana")
+    grafo = cache.arestas(chave_pesos, lambda: (u, v, calcular_pesos(img, u, v)), ordem=True)
+"""
+
+import hashlib
+import json
+import os
+import zipfile
+from typing import Callable, Dict, Optional
+
+import numpy as np
+
+from armazenamento_grafo import EXTENSAO, GrafoMapeado, abrir_grafo, salvar_grafo
+from instrumentacao import contar
+
+VERSAO_CACHE = 1
+LIMITE_PADRAO_MB = 2048
+EXTENSOES_CACHE = (".npy", ".npz", EXTENSAO)
+
+# Hash por (caminho, tamanho, mtime): o mesmo arquivo não é relido no processo
+_HASHES_ARQUIVO: Dict[tuple, str] = {}
+
+
+def hash_arquivo(caminho: str, tamanho_bloco: int = 1 << 20) -> str:
+    """
+    SHA-256 dos bytes do arquivo (lido em blocos).
+    """
+    info = os.stat(caminho)
+    identidade = (os.path.abspath(caminho), info.st_size, info.st_mtime_ns)
+    if identidade not in _HASHES_ARQUIVO:
+        resumo = hashlib.sha256()
+        with open(caminho, "rb") as f:
+            for bloco in iter(lambda: f.read(tamanho_bloco), b""):
+                resumo.update(bloco)
+        _HASHES_ARQUIVO[identidade] = resumo.hexdigest()
+    return _HASHES_ARQUIVO[identidade]
+
+
+def _ler_npz(caminho: str) -> Dict[str, np.ndarray]:
+    try:
+        with np.load(caminho) as arquivo:
+            return {nome: arquivo[nome] for nome in arquivo.files}
+    except zipfile.BadZipFile as erro:
+        raise ValueError(f"{caminho}: {erro}") from erro   # truncado: vira uma falta
+
+
+def diretorio_padrao() -> str:
+    """
+    $SEGMENTACAO_CACHE, ou ~/.cache/segmentacao_mst.
+    """
+    return os.environ.get("SEGMENTACAO_CACHE") or \
+        os.path.join(os.path.expanduser("~"), ".cache", "segmentacao_mst")
+
+
+class CacheEtapas:
+    """
+    Cache de artefatos por chave num diretório, com limite de tamanho (LRU).
+
+    - diretorio: onde ficam os arquivos (padrão: diretorio_padrao()).
+    - limite_mb: tamanho máximo do diretório; ao passar, os arquivos usados
+      há mais tempo são apagados ($SEGMENTACAO_CACHE_MB muda o padrão).
+    """
+
+    def __init__(self, diretorio: Optional[str] = None, limite_mb: Optional[float] = None):
+        self.diretorio = diretorio or diretorio_padrao()
+        if limite_mb is None:
+            limite_mb = float(os.environ.get("SEGMENTACAO_CACHE_MB", LIMITE_PADRAO_MB))
+        self.limite_bytes = int(limite_mb * 2**20)
+        self.estatisticas: Dict[str, Dict[str, int]] = {}
+        os.makedirs(self.diretorio, exist_ok=True)
+
+    # --------------------------------------------------------------------------
+    # Chaves
+    # --------------------------------------------------------------------------
+    @staticmethod
+    def chave(etapa: str, *origens: str, **parametros) -> str:
+        """
+        Chave de um artefato: hash da etapa, das chaves/hashes de que ele
+        depende (ex.: hash da imagem, chave da etapa anterior) e dos parâmetros.
+        """
+        descricao = json.dumps({"versao": VERSAO_CACHE, "etapa": etapa, "origens": origens,
+                                "parametros": parametros}, sort_keys=True, default=str)
+        return f"{etapa}-{hashlib.sha256(descricao.encode('utf-8')).hexdigest()[:32]}"
+
+    def caminho(self, chave: str, extensao: str) -> str:
+        return os.path.join(self.diretorio, chave + extensao)
+
+    # --------------------------------------------------------------------------
+    # Artefatos
+    # --------------------------------------------------------------------------
+    def array(self, chave: str, calcular: Callable[[], np.ndarray], etapa: Optional[str] = None) -> np.ndarray:
+        """
+        Array da chave (mapeado do .npy, somente leitura); numa falta, chama
+        calcular(), grava o resultado e o devolve.
+        """
+        caminho = self.caminho(chave, ".npy")
+        carregado = self._carregar(caminho, lambda: np.load(caminho, mmap_mode="r"))
+        etapa = etapa or chave.split("-")[0]
+        if carregado is not None:
+            self._registrar(etapa, acerto=True)
+            return carregado
+
+        self._registrar(etapa, acerto=False)
+        resultado = np.asarray(calcular())
+        self._gravar(caminho, lambda temporario: np.save(temporario, resultado))
+        return resultado
+
+    def arrays_npz(self, chave: str, calcular: Callable[[], Dict[str, np.ndarray]],
+                   etapa: Optional[str] = None) -> Dict[str, np.ndarray]:
+        """
+        Dicionário {nome: array} da chave (um .npz); numa falta, chama
+        calcular(), grava o resultado e o devolve.
+        """
+        caminho = self.caminho(chave, ".npz")
+        carregado = self._carregar(caminho, lambda: _ler_npz(caminho))
+        etapa = etapa or chave.split("-")[0]
+        if carregado is not None:
+            self._registrar(etapa, acerto=True)
+            return carregado
+
+        self._registrar(etapa, acerto=False)
+        resultado = {nome: np.asarray(array) for nome, array in calcular().items()}
+        self._gravar(caminho, lambda temporario: np.savez(temporario, **resultado))
+        return resultado
+
+    def arestas(self, chave: str, calcular: Callable, etapa: Optional[str] = None,
+                ordem: bool = False, meta=None) -> GrafoMapeado:
+        """
+        Arestas da chave como GrafoMapeado (.grafo mapeado em memória). Numa
+        falta, calcular() devolve uma tupla (u, v, w) de arrays ou um objeto
+        com atributos u, v, w (e, se houver, w_reverso/direcao, como
+        grade.ArestasSimetricas). O GrafoMapeado devolvido é aceito por
+        kruskal_mst, segmentar_mst e EdmondsCore como as próprias arestas.
+        ordem=True grava também a ordem do Kruskal (argsort estável de w).
+        meta: dicionário do cabeçalho, ou função que o devolve (chamada só
+        numa falta, depois de calcular()).
+        """
+        caminho = self.caminho(chave, EXTENSAO)
+        etapa = etapa or chave.split("-")[0]
+        carregado = self._carregar(caminho, lambda: abrir_grafo(caminho))
+        if carregado is not None:
+            self._registrar(etapa, acerto=True)
+            return carregado
+
+        self._registrar(etapa, acerto=False)
+        resultado = calcular()
+        if isinstance(resultado, tuple):
+            u, v, w = resultado
+            extras = {}
+        else:
+            u, v, w = resultado.u, resultado.v, resultado.w
+            extras = {nome: getattr(resultado, nome, None) for nome in ("w_reverso", "direcao")}
+        if callable(meta):
+            meta = meta()
+        self._gravar(caminho, lambda temporario: salvar_grafo(temporario, u, v, w, meta=meta,
+                                                              ordem=ordem, colunas_extras=extras))
+        return abrir_grafo(caminho)
+
+    def _carregar(self, caminho: str, abrir: Callable):
+        if not os.path.exists(caminho):
+            return None
+        try:
+            carregado = abrir()
+        except (OSError, ValueError):
+            # Arquivo truncado ou de outra versão: vira uma falta
+            self._apagar(caminho)
+            return None
+        os.utime(caminho)   # relógio do LRU
+        return carregado
+
+    def _gravar(self, caminho: str, escrever: Callable[[str], object]):
+        """
+        Grava num temporário e renomeia (outro processo nunca lê um arquivo
+        pela metade); depois aplica o limite de tamanho.
+        """
+        raiz, extensao = os.path.splitext(caminho)
+        temporario = f"{raiz}.tmp{os.getpid()}{extensao}"
+        try:
+            escrever(temporario)
+            os.replace(temporario, caminho)
+        finally:
+            if os.path.exists(temporario):
+                os.remove(temporario)
+        self.aplicar_limite(preservar=caminho)
+
+    def _apagar(self, caminho: str):
+        try:
+            os.remove(caminho)
+        except FileNotFoundError:
+            pass
+
+    # --------------------------------------------------------------------------
+    # Tamanho e despejo
+    # --------------------------------------------------------------------------
+    def _entradas(self):
+        """
+        (mtime, tamanho, caminho) de cada artefato do diretório.
+        """
+        entradas = []
+        for nome in os.listdir(self.diretorio):
+            if nome.endswith(EXTENSOES_CACHE) and ".tmp" not in nome:
+                caminho = os.path.join(self.diretorio, nome)
+                try:
+                    info = os.stat(caminho)
+                except FileNotFoundError:
+                    continue
+                entradas.append((info.st_mtime_ns, info.st_size, caminho))
+        return entradas
+
+    def tamanho_total(self) -> int:
+        return sum(tamanho for _, tamanho, _ in self._entradas())
+
+    def aplicar_limite(self, preservar: Optional[str] = None) -> int:
+        """
+        Apaga os artefatos usados há mais tempo até caber no limite.
+        `preservar` (o recém-gravado, que ainda vai ser aberto) nunca sai aqui.
+        Retorna quantos arquivos foram apagados.
+        """
+        entradas = sorted(self._entradas())
+        total = sum(tamanho for _, tamanho, _ in entradas)
+        removidos = 0
+        for _, tamanho, caminho in entradas:
+            if total <= self.limite_bytes:
+                break
+            if caminho == preservar:
+                continue
+            self._apagar(caminho)
+            total -= tamanho
+            removidos += 1
+        if removidos:
+            self._contar_total("despejos", removidos)
+        return removidos
+
+    def limpar(self):
+        for _, _, caminho in self._entradas():
+            self._apagar(caminho)
+
+    # --------------------------------------------------------------------------
+    # Estatísticas
+    # --------------------------------------------------------------------------
+    def _registrar(self, etapa: str, acerto: bool):
+        campo = "acertos" if acerto else "faltas"
+        estatistica = self.estatisticas.setdefault(etapa, {"acertos": 0, "faltas": 0})
+        estatistica[campo] += 1
+        contar(f"cache_{campo}")
+
+    def _contar_total(self, campo: str, valor: int):
+        total = self.estatisticas.setdefault("total", {})
+        total[campo] = total.get(campo, 0) + valor
+
+    def resumo(self) -> str:
+        linhas = [f"Cache {self.diretorio} ({self.tamanho_total() / 2**20:.1f} de "
+                  f"{self.limite_bytes / 2**20:.0f} MB):"]
+        for etapa, estatistica in self.estatisticas.items():
+            if etapa != "total":
+                linhas.append(f"  {etapa:<16} {estatistica['acertos']} acerto(s), {estatistica['faltas']} falta(s)")
+        despejos = self.estatisticas.get("total", {}).get("despejos", 0)
+        if despejos:
+            linhas.append(f"  {despejos} arquivo(s) despejado(s) pelo limite")
+        return "\n".join(linhas)
@@ -0,0 +1,196 @@
+"""
+cores.py
+Espaços de cor do projeto, todos como imagens float32 normalizadas (~0-1,
+para que a distância entre vizinhos e os limiares sejam comparáveis):
+
+ - "rgb":   R, G, B / 255;
+ - "lab":   L*a*b* de 8 bits do OpenCV / 255 (o formato histórico de
+            preprocs.preprocessar_imagem: L*·255/100, a* + 128, b* + 128);
+ - "lab32": o mesmo L*a*b* na mesma escala, calculado em float32 a partir do
+            RGB (sem a quantização de 8 bits);
+ - "hsv":   H/360, S, V;
+ - "ycrcb": Y, Cr, Cb do OpenCV.
+
+As duas variantes de Lab são uma transformação linear do L*a*b* CIE (D65),
+então a média de cor de um segmento pode ser feita direto na imagem que já
+foi calculada para os pesos e só a paleta (N cores) volta para RGB
+(lab_normalizado_para_rgb): a imagem inteira não é convertida de novo.
+
+ImagemCores guarda as conversões de uma imagem decodificada uma vez:
+    cores = ImagemCores(cv2.imread(caminho))
+    cores["lab"], cores["rgb"]          # cada uma calculada só no primeiro acesso
+"""
+
+from typing import Dict
+
+import cv2
+import numpy as np
+
+# Branco de referência D65 e matrizes sRGB <-> XYZ (as mesmas do skimage.color)
+_BRANCO_D65 = np.array([0.95047, 1.0, 1.08883], dtype=np.float32)
+_RGB_PARA_XYZ = np.array([[0.412453, 0.357580, 0.180423],
+                          [0.212671, 0.715160, 0.072169],
+                          [0.019334, 0.119193, 0.950227]], dtype=np.float32)
+_XYZ_PARA_RGB = np.linalg.inv(_RGB_PARA_XYZ.astype(np.float64)).astype(np.float32)
+
+# L*a*b* CIE <-> escala normalizada: normalizado = (lab + deslocamento) / escala
+_ESCALA_LAB = np.array([100.0, 255.0, 255.0], dtype=np.float32)
+_DESLOCAMENTO_LAB = np.array([0.0, 128.0, 128.0], dtype=np.float32)
+
+ESPACOS_LAB = ("lab", "lab32")
+
+
+def _linearizar_srgb(rgb: np.ndarray) -> np.ndarray:
+    return np.where(rgb > 0.04045, ((rgb + 0.055) / 1.055) ** 2.4, rgb / 12.92).astype(np.float32)
+
+
+def _comprimir_srgb(rgb_linear: np.ndarray) -> np.ndarray:
+    rgb_linear = np.maximum(rgb_linear, 0)
+    return np.where(rgb_linear > 0.0031308, 1.055 * rgb_linear ** (1 / 2.4) - 0.055,
+                    12.92 * rgb_linear).astype(np.float32)
+
+
+def rgb_para_lab_cie(rgb: np.ndarray) -> np.ndarray:
+    """
+    RGB [0, 1] (..., 3) -> L*a*b* CIE D65 em float32 (L* 0-100).
+    """
+    xyz = _linearizar_srgb(np.asarray(rgb, dtype=np.float32)) @ _RGB_PARA_XYZ.T
+    xyz /= _BRANCO_D65
+    f = np.where(xyz > 0.008856, np.cbrt(xyz), 7.787 * xyz + 16.0 / 116.0)
+    lab = np.empty_like(xyz)
+    lab[..., 0] = 116.0 * f[..., 1] - 16.0
+    lab[..., 1] = 500.0 * (f[..., 0] - f[..., 1])
+    lab[..., 2] = 200.0 * (f[..., 1] - f[..., 2])
+    return lab
+
+
+def lab_cie_para_rgb(lab: np.ndarray) -> np.ndarray:
+    """
+    L*a*b* CIE D65 (..., 3) -> RGB [0, 1] float32 (cortado no gamut).
+    """
+    lab = np.asarray(lab, dtype=np.float32)
+    fy = (lab[..., 0] + 16.0) / 116.0
+    # z negativo (fora do gamut) vai para 0, como no skimage
+    f = np.stack([fy + lab[..., 1] / 500.0, fy, np.maximum(fy - lab[..., 2] / 200.0, 0.0)], axis=-1)
+    xyz = np.where(f > 0.2068966, f ** 3, (f - 16.0 / 116.0) / 7.787) * _BRANCO_D65
+    return np.clip(_comprimir_srgb(xyz @ _XYZ_PARA_RGB.T), 0.0, 1.0)
+
+
+def lab_normalizado_para_cie(lab_normalizado: np.ndarray) -> np.ndarray:
+    return np.asarray(lab_normalizado, dtype=np.float32) * _ESCALA_LAB - _DESLOCAMENTO_LAB
+
+
+def lab_cie_para_normalizado(lab: np.ndarray) -> np.ndarray:
+    return (np.asarray(lab, dtype=np.float32) + _DESLOCAMENTO_LAB) / _ESCALA_LAB
+
+
+def lab_normalizado_para_rgb(lab_normalizado: np.ndarray) -> np.ndarray:
+    """
+    "lab"/"lab32" normalizado -> RGB [0, 1] (usado na paleta de cores médias).
+    """
+    return lab_cie_para_rgb(lab_normalizado_para_cie(lab_normalizado))
+
+
+def _lab8(imagem_bgr: np.ndarray) -> np.ndarray:
+    return cv2.cvtColor(imagem_bgr, cv2.COLOR_BGR2Lab).astype(np.float32) / 255.0
+
+
+def _rgb(imagem_bgr: np.ndarray) -> np.ndarray:
+    return cv2.cvtColor(imagem_bgr, cv2.COLOR_BGR2RGB).astype(np.float32) / 255.0
+
+
+def _lab32_de_rgb(rgb: np.ndarray) -> np.ndarray:
+    return lab_cie_para_normalizado(rgb_para_lab_cie(rgb))
+
+
+def _hsv_de_rgb(rgb: np.ndarray) -> np.ndarray:
+    hsv = cv2.cvtColor(np.ascontiguousarray(rgb, dtype=np.float32), cv2.COLOR_RGB2HSV)
+    hsv[..., 0] /= 360.0
+    return hsv
+
+
+def _ycrcb_de_rgb(rgb: np.ndarray) -> np.ndarray:
+    return cv2.cvtColor(np.ascontiguousarray(rgb, dtype=np.float32), cv2.COLOR_RGB2YCrCb)
+
+
+# Espaço -> (a partir do BGR uint8, a partir do RGB float32 já calculado)
+ESPACOS_COR = {
+    "rgb": (_rgb, lambda rgb: rgb),
+    "lab": (_lab8, None),
+    "lab32": (lambda bgr: _lab32_de_rgb(_rgb(bgr)), _lab32_de_rgb),
+    "hsv": (lambda bgr: _hsv_de_rgb(_rgb(bgr)), _hsv_de_rgb),
+    "ycrcb": (lambda bgr: _ycrcb_de_rgb(_rgb(bgr)), _ycrcb_de_rgb),
+}
+
+
+def _validar_espaco(espaco: str):
+    if espaco not in ESPACOS_COR:
+        raise ValueError(f"Espaço de cor '{espaco}' desconhecido. Disponíveis: {sorted(ESPACOS_COR)}")
+
+
+def converter_espaco_cor(imagem_bgr: np.ndarray, espaco: str = "lab") -> np.ndarray:
+    """
+    Converte uma imagem BGR uint8 (como sai do cv2.imread) para o espaço de
+    cor pedido, normalizado (float32).
+    """
+    _validar_espaco(espaco)
+    return ESPACOS_COR[espaco][0](imagem_bgr)
+
+
+def converter_rgb(rgb: np.ndarray, espaco: str) -> np.ndarray:
+    """
+    Converte uma imagem RGB [0, 1] (ex.: base_dados.carregar_imagem_rgb_normalizada).
+    "lab" (8 bits) precisa dos bytes originais: a partir de RGB float ele sai como "lab32".
+    """
+    _validar_espaco(espaco)
+    conversao = ESPACOS_COR[espaco][1] or _lab32_de_rgb
+    return conversao(np.asarray(rgb, dtype=np.float32))
+
+
+class ImagemCores:
+    """
+    Uma imagem decodificada uma vez e as suas versões em cada espaço de cor,
+    calculadas só quando pedidas e compartilhadas entre quem as usa (pesos,
+    renderização...). As derivadas de RGB reaproveitam o RGB já calculado.
+    """
+
+    def __init__(self, imagem_bgr: np.ndarray):
+        self.imagem_bgr = imagem_bgr
+        self._espacos: Dict[str, np.ndarray] = {}
+
+    @classmethod
+    def de_arquivo(cls, caminho: str) -> "ImagemCores":
+        imagem_bgr = cv2.imread(caminho)
+        if imagem_bgr is None:
+            raise ValueError(f"Não foi possível ler a imagem em '{caminho}'")
+        return cls(imagem_bgr)
+
+    @property
+    def dimensoes(self):
+        return self.imagem_bgr.shape[:2]
+
+    def __getitem__(self, espaco: str) -> np.ndarray:
+        if espaco not in self._espacos:
+            _validar_espaco(espaco)
+            de_bgr, de_rgb = ESPACOS_COR[espaco]
+            if espaco != "rgb" and de_rgb is not None and "rgb" in self._espacos:
+                self._espacos[espaco] = de_rgb(self._espacos["rgb"])
+            else:
+                self._espacos[espaco] = de_bgr(self.imagem_bgr)
+        return self._espacos[espaco]
+
+    def __contains__(self, espaco: str) -> bool:
+        return espaco in self._espacos
+
+    def lab(self) -> np.ndarray:
+        """
+        Lab normalizado para médias de cor: o que já estiver calculado
+        ("lab" ou "lab32"); senão, "lab" (conversão de 8 bits, a mais barata).
+        """
+        for espaco in ESPACOS_LAB:
+            if espaco in self._espacos:
+                return self._espacos[espaco]
+        return self["lab"]
+
+    def liberar(self, espaco: str):
+        self._espacos.pop(espaco, None)
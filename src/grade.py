@@ -0,0 +1,408 @@
+"""
+grade.py
+Construção vetorizada das arestas de um grafo em grade (imagem).
+
+Substitui os laços duplos em Python de `criar_grafo_adjacencia` (Entrega 1) e
+`base_dados.gerar_arestas_direcionadas`: as arestas saem como dois arrays
+int32 `u` e `v`, calculados só com aritmética de arrays.
+
+Vizinhanças suportadas:
+ - "4" e "8" (as usadas hoje no projeto);
+ - estênceis quadrados de raio arbitrário, no formato "NxN" com N ímpar
+   (ex.: "3x3" equivale a "8", "5x5" conecta cada pixel a 24 vizinhos).
+
+Ordem das arestas (determinística):
+ - varre os pixels em ordem raster (linha a linha) e, para cada pixel, os
+   deslocamentos na ordem devolvida por `offsets_vizinhanca`;
+ - "8" não-direcionado reproduz exatamente `criar_grafo_adjacencia` e
+   "4"/"8" direcionados reproduzem `gerar_arestas_direcionadas`.
+"""
+
+from itertools import chain
+from typing import Iterator, List, Optional, Tuple, Union
+import numpy as np
+
+from pesos import calcular_pesos, metrica_simetrica, obter_metrica
+
+Vizinhanca = Union[str, int]
+
+# Ordens históricas de cada módulo (mantidas para não mudar a saída)
+_OFFSETS_4_DIRECIONADO = [(0, 1), (1, 0), (0, -1), (-1, 0)]
+_OFFSETS_8_DIRECIONADO = _OFFSETS_4_DIRECIONADO + [(-1, -1), (-1, 1), (1, -1), (1, 1)]
+_OFFSETS_4_FRENTE = [(0, 1), (1, 0)]
+# Direita, Baixo-Esquerda, Baixo, Baixo-Direita (ordem de criar_grafo_adjacencia)
+_OFFSETS_8_FRENTE = [(0, 1), (1, -1), (1, 0), (1, 1)]
+
+
+def _lado_estencil(vizinhanca: Vizinhanca) -> int:
+    """
+    Interpreta "NxN" e devolve N (ímpar, >= 3).
+    """
+    texto = str(vizinhanca).lower().replace(" ", "")
+    partes = texto.split("x")
+    if len(partes) != 2 or not all(p.isdigit() for p in partes) or partes[0] != partes[1]:
+        raise ValueError(f"Vizinhança inválida: {vizinhanca!r} (use '4', '8' ou 'NxN', ex.: '5x5')")
+    lado = int(partes[0])
+    if lado < 3 or lado % 2 == 0:
+        raise ValueError(f"Estêncil {vizinhanca!r} precisa ter lado ímpar >= 3")
+    return lado
+
+
+def offsets_vizinhanca(vizinhanca: Vizinhanca = "8", direcionado: bool = False) -> List[Tuple[int, int]]:
+    """
+    Devolve a lista de deslocamentos (dlinha, dcoluna) do estêncil.
+
+    direcionado=False: só a "metade para frente" (cada par de vizinhos aparece uma vez).
+    direcionado=True: todos os deslocamentos (cada par aparece nos dois sentidos).
+    """
+    chave = str(vizinhanca)
+    if chave == "4":
+        return list(_OFFSETS_4_DIRECIONADO if direcionado else _OFFSETS_4_FRENTE)
+    if chave == "8":
+        return list(_OFFSETS_8_DIRECIONADO if direcionado else _OFFSETS_8_FRENTE)
+
+    raio = _lado_estencil(vizinhanca) // 2
+    offsets = [(dl, dc)
+               for dl in range(-raio, raio + 1)
+               for dc in range(-raio, raio + 1)
+               if (dl, dc) != (0, 0)]
+    if not direcionado:
+        offsets = [(dl, dc) for dl, dc in offsets if dl > 0 or (dl == 0 and dc > 0)]
+    return offsets
+
+
+def _validade_faixa(altura: int,
+                    largura: int,
+                    offsets: np.ndarray,
+                    linha_inicio: int,
+                    linha_fim: int) -> np.ndarray:
+    """
+    Máscara (h, W, k): True onde o pixel de origem (linhas [linha_inicio, linha_fim))
+    tem vizinho dentro da imagem na direção k.
+    """
+    dl, dc = offsets[:, 0], offsets[:, 1]
+
+    # Validade separável: (linha + dl) dentro da imagem E (coluna + dc) dentro da imagem
+    linhas = np.arange(linha_inicio, linha_fim)[:, None] + dl[None, :]   # (h, k)
+    colunas = np.arange(largura)[:, None] + dc[None, :]                  # (W, k)
+    linha_ok = (linhas >= 0) & (linhas < altura)
+    coluna_ok = (colunas >= 0) & (colunas < largura)
+    return linha_ok[:, None, :] & coluna_ok[None, :, :]
+
+
+def _arestas_faixa(altura: int,
+                   largura: int,
+                   offsets: np.ndarray,
+                   linha_inicio: int,
+                   linha_fim: int,
+                   retornar_direcao: bool = False):
+    """
+    Arestas cuja origem está nas linhas [linha_inicio, linha_fim) da grade.
+    Com retornar_direcao=True, devolve também o índice do deslocamento de cada aresta.
+    """
+    valido = _validade_faixa(altura, largura, offsets, linha_inicio, linha_fim)
+
+    # A indexação booleana percorre (h, W, k) em ordem C:
+    # pixel a pixel em ordem raster e, dentro do pixel, offset a offset.
+    ids = np.arange(linha_inicio * largura, linha_fim * largura, dtype=np.int32)
+    ids = ids.reshape(linha_fim - linha_inicio, largura, 1)
+    deltas = (offsets[:, 0] * largura + offsets[:, 1]).astype(np.int32)
+
+    u = np.broadcast_to(ids, valido.shape)[valido]
+    v = (ids + deltas)[valido]
+    if retornar_direcao:
+        direcao = np.broadcast_to(np.arange(len(offsets), dtype=np.int8), valido.shape)[valido]
+        return u, v, direcao
+    return u, v
+
+
+def gerar_arestas_grade(altura: int,
+                        largura: int,
+                        vizinhanca: Vizinhanca = "8",
+                        direcionado: bool = False,
+                        retornar_direcao: bool = False):
+    """
+    Gera as arestas (u, v) da grade altura x largura sem nenhum laço por pixel.
+
+    Retorna:
+    - (u, v): dois arrays int32 de mesmo tamanho; a aresta i liga u[i] a v[i].
+    - (u, v, direcao) com retornar_direcao=True: direcao[i] (int8) é o índice
+      de offsets_vizinhanca(vizinhanca, direcionado) usado pela aresta i.
+    """
+    offsets = np.asarray(offsets_vizinhanca(vizinhanca, direcionado), dtype=np.int64)
+    return _arestas_faixa(altura, largura, offsets, 0, altura, retornar_direcao)
+
+
+class GridGraph:
+    """
+    Grafo implícito de uma grade de pixels.
+
+    Numa grade regular, cada aresta é determinada por (pixel de origem, direção),
+    então nada de lista de arestas é guardado: os pesos ficam em "planos" H x W,
+    um por deslocamento do estêncil (planos[k][l, c] = peso da aresta que sai
+    de (l, c) na direção offsets[k]; np.inf onde o vizinho cai fora da imagem).
+    A memória é proporcional a pixels x direções.
+
+    As arestas só são enumeradas quando alguém pede (arestas, arestas_ponderadas,
+    iterar_arestas), na mesma ordem de gerar_arestas_grade.
+    """
+
+    def __init__(self, altura: int, largura: int, vizinhanca: Vizinhanca = "8", direcionado: bool = False):
+        self.altura = altura
+        self.largura = largura
+        self.vizinhanca = vizinhanca
+        self.direcionado = direcionado
+        self.offsets = offsets_vizinhanca(vizinhanca, direcionado)
+        self.num_nos = altura * largura
+        self.planos: Optional[np.ndarray] = None  # (k, H, W) float32, preenchido por calcular_pesos
+
+        self._offsets_arr = np.asarray(self.offsets, dtype=np.int64)
+        self._indice_offset = {off: k for k, off in enumerate(self.offsets)}
+
+    @property
+    def dimensoes(self) -> Tuple[int, int]:
+        return (self.altura, self.largura)
+
+    @property
+    def num_direcoes(self) -> int:
+        return len(self.offsets)
+
+    def _fatias(self, k: int):
+        """
+        Fatias (origem, destino) das posições válidas da direção k.
+        """
+        dl, dc = self.offsets[k]
+        l0, c0 = max(0, -dl), max(0, -dc)
+        origem = (slice(l0, max(l0, min(self.altura, self.altura - dl))),
+                  slice(c0, max(c0, min(self.largura, self.largura - dc))))
+        destino = (slice(origem[0].start + dl, origem[0].stop + dl),
+                   slice(origem[1].start + dc, origem[1].stop + dc))
+        return origem, destino
+
+    def mascara_direcao(self, k: int) -> np.ndarray:
+        """
+        Matriz booleana H x W: True onde existe aresta na direção k.
+        """
+        mascara = np.zeros((self.altura, self.largura), dtype=bool)
+        origem, _ = self._fatias(k)
+        mascara[origem] = True
+        return mascara
+
+    @property
+    def num_arestas(self) -> int:
+        total = 0
+        for dl, dc in self.offsets:
+            total += max(0, self.altura - abs(dl)) * max(0, self.largura - abs(dc))
+        return total
+
+    def vizinhos(self, pixel: int) -> Iterator[Tuple[int, Optional[float]]]:
+        """
+        Itera sobre os vizinhos de `pixel`, devolvendo (vizinho, peso).
+        O peso é None enquanto calcular_pesos não tiver sido chamado.
+        Num grafo não-direcionado, todos os vizinhos do estêncil completo aparecem.
+        """
+        linha, coluna = divmod(pixel, self.largura)
+        for dl, dc in offsets_vizinhanca(self.vizinhanca, direcionado=True):
+            nl, nc = linha + dl, coluna + dc
+            if not (0 <= nl < self.altura and 0 <= nc < self.largura):
+                continue
+            peso = None
+            if self.planos is not None:
+                k = self._indice_offset.get((dl, dc))
+                if k is not None:
+                    peso = float(self.planos[k, linha, coluna])
+                else:
+                    # aresta guardada no sentido oposto (grafo não-direcionado)
+                    peso = float(self.planos[self._indice_offset[(-dl, -dc)], nl, nc])
+            yield nl * self.largura + nc, peso
+
+    def calcular_pesos(self, imagem: np.ndarray, metrica: str = "euclidiana") -> np.ndarray:
+        """
+        Preenche os planos de pesos a partir da imagem (H x W x C), uma direção
+        por vez, usando só fatias da imagem (nenhum array de índices).
+        """
+        funcao = obter_metrica(metrica)
+        imagem = np.asarray(imagem, dtype=np.float32)
+        if imagem.ndim == 2:
+            imagem = imagem[:, :, None]
+        canais = imagem.shape[2]
+
+        planos = np.full((self.num_direcoes, self.altura, self.largura), np.inf, dtype=np.float32)
+        for k in range(self.num_direcoes):
+            origem, destino = self._fatias(k)
+            cor_u = imagem[origem].reshape(-1, canais)
+            cor_v = imagem[destino].reshape(-1, canais)
+            if cor_u.size == 0:
+                continue
+            planos[k][origem] = funcao(cor_u, cor_v).reshape(imagem[origem].shape[:2])
+        self.planos = planos
+        return planos
+
+    def arestas(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Materializa (u, v) como arrays int32, na ordem de gerar_arestas_grade.
+        """
+        return _arestas_faixa(self.altura, self.largura, self._offsets_arr, 0, self.altura)
+
+    def _pesos_faixa(self, linha_inicio: int, linha_fim: int) -> np.ndarray:
+        if self.planos is None:
+            raise ValueError("Pesos ainda não calculados: chame calcular_pesos(imagem) antes")
+        # (k, h, W) -> (h, W, k): mesma ordem pixel a pixel / offset a offset
+        faixa = np.moveaxis(self.planos[:, linha_inicio:linha_fim, :], 0, -1)
+        return faixa[_validade_faixa(self.altura, self.largura, self._offsets_arr, linha_inicio, linha_fim)]
+
+    def arestas_ponderadas(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Materializa (w, u, v) como arrays (float32, int32, int32).
+        """
+        u, v = self.arestas()
+        return self._pesos_faixa(0, self.altura), u, v
+
+    def iterar_arestas(self, linhas_por_bloco: int = 256) -> Iterator[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+        """
+        Enumera (w, u, v) em blocos de linhas, sem materializar o grafo todo.
+        """
+        for inicio in range(0, self.altura, linhas_por_bloco):
+            fim = min(inicio + linhas_por_bloco, self.altura)
+            u, v = _arestas_faixa(self.altura, self.largura, self._offsets_arr, inicio, fim)
+            yield self._pesos_faixa(inicio, fim), u, v
+
+
+def arcos_simetricos(u: np.ndarray,
+                     v: np.ndarray,
+                     w: np.ndarray,
+                     w_reverso: Optional[np.ndarray] = None,
+                     direcao: Optional[np.ndarray] = None,
+                     vizinhanca: Optional[Vizinhanca] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Expande um conjunto de arestas guardadas uma vez (u, v, w) nos dois arcos
+    u -> v (peso w) e v -> u (peso w_reverso, ou w se for None).
+
+    Se `direcao` (índice do deslocamento "para frente" de cada aresta) e a
+    `vizinhanca` forem dados, os arcos saem na ordem exata de
+    gerar_arestas_grade(..., direcionado=True); senão, todas as idas e depois
+    todas as voltas.
+    Retorna (u, v, w) dos arcos.
+    """
+    u = np.asarray(u)
+    v = np.asarray(v)
+    w = np.asarray(w)
+    origem = np.concatenate([u, v])
+    destino = np.concatenate([v, u])
+    pesos = np.concatenate([w, w if w_reverso is None else np.asarray(w_reverso)])
+    if direcao is None or vizinhanca is None:
+        return origem, destino, pesos
+
+    # Posição de cada arco na lista direcionada: (pixel de origem, deslocamento)
+    indice = {off: k for k, off in enumerate(offsets_vizinhanca(vizinhanca, direcionado=True))}
+    frente = offsets_vizinhanca(vizinhanca, direcionado=False)
+    ida = np.asarray([indice[(dl, dc)] for dl, dc in frente], dtype=np.int64)
+    volta = np.asarray([indice[(-dl, -dc)] for dl, dc in frente], dtype=np.int64)
+    direcao = np.asarray(direcao, dtype=np.int64)
+    chave = np.concatenate([u * len(indice) + ida[direcao], v * len(indice) + volta[direcao]])
+    ordem = np.argsort(chave, kind="stable")
+    return origem[ordem], destino[ordem], pesos[ordem]
+
+
+class ArestasSimetricas:
+    """
+    Grafo direcionado simétrico (todo par de vizinhos nos dois sentidos)
+    guardado uma única vez: u, v, w são as arestas "para frente" e os arcos de
+    volta são só uma visão (arcos()). Com a mesma distância nos dois sentidos,
+    metade da memória e do cálculo de pesos da lista direcionada.
+
+    w_reverso: pesos v -> u, só para métricas realmente assimétricas
+    (None = pesos simétricos).
+    direcao / vizinhanca: se presentes, arcos() reproduz a ordem de
+    gerar_arestas_grade(..., direcionado=True).
+    """
+
+    def __init__(self, u: np.ndarray, v: np.ndarray, w: np.ndarray,
+                 w_reverso: Optional[np.ndarray] = None,
+                 direcao: Optional[np.ndarray] = None,
+                 vizinhanca: Optional[Vizinhanca] = None):
+        self.u = u
+        self.v = v
+        self.w = w
+        self.w_reverso = w_reverso
+        self.direcao = direcao
+        self.vizinhanca = vizinhanca
+
+    @classmethod
+    def da_imagem(cls, imagem: np.ndarray, vizinhanca: Vizinhanca = "4",
+                  metrica: str = "euclidiana") -> "ArestasSimetricas":
+        """
+        Arestas da grade da imagem com pesos calculados uma vez por par;
+        o sentido de volta só é calculado se a métrica for assimétrica.
+        """
+        altura, largura = imagem.shape[:2]
+        u, v, direcao = gerar_arestas_grade(altura, largura, vizinhanca, retornar_direcao=True)
+        w = calcular_pesos(imagem, u, v, metrica=metrica)
+        w_reverso = None if metrica_simetrica(metrica) else calcular_pesos(imagem, v, u, metrica=metrica)
+        return cls(u, v, w, w_reverso, direcao, vizinhanca)
+
+    @property
+    def pesos_simetricos(self) -> bool:
+        return self.w_reverso is None
+
+    @property
+    def num_pares(self) -> int:
+        return len(self.u)
+
+    @property
+    def num_arcos(self) -> int:
+        return 2 * len(self.u)
+
+    def arcos(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Os dois sentidos materializados como (u, v, w), formato de EdmondsCore.
+        """
+        return arcos_simetricos(self.u, self.v, self.w, self.w_reverso, self.direcao, self.vizinhanca)
+
+
+def arestas_para_arrays(arestas_ponderadas) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Normaliza as formas de grafo ponderado usadas no projeto para arrays (w, u, v):
+     - GridGraph com pesos calculados;
+     - tupla (w, u, v) de arrays;
+     - objeto com atributos w, u, v (ex.: armazenamento_grafo.GrafoMapeado);
+     - lista de tuplas (peso, u, v), formato da Entrega 1.
+    """
+    if isinstance(arestas_ponderadas, GridGraph):
+        return arestas_ponderadas.arestas_ponderadas()
+    if all(hasattr(arestas_ponderadas, atributo) for atributo in ("w", "u", "v")):
+        return arestas_ponderadas.w, arestas_ponderadas.u, arestas_ponderadas.v
+    if isinstance(arestas_ponderadas, tuple) and len(arestas_ponderadas) == 3 \
+            and all(isinstance(col, np.ndarray) for col in arestas_ponderadas):
+        w, u, v = arestas_ponderadas
+        return w, u, v
+    if len(arestas_ponderadas) == 0:
+        return np.empty(0, np.float32), np.empty(0, np.int32), np.empty(0, np.int32)
+    # Um único fromiter sobre as tuplas achatadas (IDs < 2**31 cabem exatos em float64)
+    tabela = np.fromiter(chain.from_iterable(arestas_ponderadas), dtype=np.float64,
+                         count=3 * len(arestas_ponderadas)).reshape(-1, 3)
+    return tabela[:, 0], tabela[:, 1].astype(np.int32), tabela[:, 2].astype(np.int32)
+
+
+def arestas_direcionadas_para_arrays(arestas_com_peso) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Equivalente a arestas_para_arrays para o formato de src/ (u, v, w):
+     - tupla (u, v, w) de arrays;
+     - objeto com método arcos() (ArestasSimetricas, arquivo .grafo simétrico):
+       os dois sentidos são expandidos;
+     - objeto com atributos u, v, w (ex.: um arquivo de arestas já aberto);
+     - lista de tuplas (u, v, w), formato de base_dados.
+    Retorna (u, v, w) como arrays (int32, int32, float).
+    """
+    if isinstance(arestas_com_peso, tuple) and len(arestas_com_peso) == 3 \
+            and all(isinstance(col, np.ndarray) for col in arestas_com_peso):
+        return arestas_com_peso
+    if hasattr(arestas_com_peso, "arcos"):
+        return arestas_com_peso.arcos()
+    if all(hasattr(arestas_com_peso, atributo) for atributo in ("u", "v", "w")):
+        return arestas_com_peso.u, arestas_com_peso.v, arestas_com_peso.w
+    if len(arestas_com_peso) == 0:
+        return np.empty(0, np.int32), np.empty(0, np.int32), np.empty(0, np.float32)
+    tabela = np.fromiter(chain.from_iterable(arestas_com_peso), dtype=np.float64,
+                         count=3 * len(arestas_com_peso)).reshape(-1, 3)
+    return tabela[:, 0].astype(np.int32), tabela[:, 1].astype(np.int32), tabela[:, 2]
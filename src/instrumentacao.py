@@ -0,0 +1,301 @@
+"""
+instrumentacao.py
+Medição das etapas do pipeline (pré-processamento, grafo, pesos, MST,
+segmentação, visualização): tempo de parede, tempo de CPU, memória e
+contadores do domínio (arestas, uniões, tamanho dos caminhos do find, segmentos).
+
+Uso:
+    with Instrumentacao(rastrear_memoria=True) as inst:
+        ... pipeline ...
+    inst.salvar_json("relatorio.json")
+
+Os módulos do pipeline só chamam as funções do módulo:
+    @medir_etapa("mst")
+    def kruskal_mst(...): ...
+
+    with etapa("pesos"):
+        ...
+        contar("arestas", len(u))
+Sem uma Instrumentacao ativa, essas chamadas não fazem nada (custo de uma
+checagem), então o código instrumentado roda normalmente em qualquer lugar.
+
+ProgressoEmLotes agrupa as atualizações de uma barra de progresso (tqdm ou
+qualquer objeto com update(n)) para que laços quentes não paguem uma chamada
+por item.
+"""
+
+import functools
+import json
+import os
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional
+
+try:
+    import resource  # só existe em sistemas Unix
+except ImportError:
+    resource = None
+
+# Função chamada ao fim de cada etapa: callback(nome_da_etapa, medidas)
+CallbackEtapa = Callable[[str, Dict], None]
+
+_ATIVA: Optional["Instrumentacao"] = None
+
+
+def _rss_atual_mb() -> Optional[float]:
+    """
+    Memória residente atual do processo (Linux: /proc/self/statm).
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            paginas = int(f.read().split()[1])
+        return paginas * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def _rss_pico_mb() -> Optional[float]:
+    """
+    Pico de memória residente do processo até agora (getrusage).
+    """
+    if resource is None:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux informa em KiB; macOS em bytes
+    return pico / 2**20 if os.uname().sysname == "Darwin" else pico / 2**10
+
+
+class Instrumentacao:
+    """
+    Coleta as medidas de cada etapa enquanto estiver ativa (bloco with ou
+    ativar()/desativar()).
+
+    - rastrear_memoria: liga o tracemalloc e registra o pico de memória
+      alocada em cada etapa (mais preciso que o RSS, porém deixa as
+      alocações mais lentas; desligado por padrão).
+    - callback: chamado com (nome, medidas) ao fim de cada etapa.
+
+    Etapas podem ser aninhadas (ex.: a MST calculada dentro da segmentação);
+    os contadores vão para a etapa mais interna. Uma etapa executada várias
+    vezes acumula tempos e contadores e conta as chamadas; uma etapa aberta
+    dentro de outra de mesmo nome não é medida de novo.
+    """
+
+    def __init__(self, rastrear_memoria: bool = False, callback: Optional[CallbackEtapa] = None):
+        self.rastrear_memoria = rastrear_memoria
+        self.callback = callback
+        self.etapas: Dict[str, Dict] = {}
+        self.contadores: Dict[str, float] = {}   # contadores fora de qualquer etapa
+        self._pilha: List[str] = []
+        self._picos: List = []   # por etapa aberta: (memória no início, maior pico), em bytes
+        self._iniciou_tracemalloc = False
+        self._inicio = None
+        self._anterior: Optional["Instrumentacao"] = None
+        # Pico do tracemalloc (MB) na última ativação e em todas elas
+        self.pico_ativacao_mb: Optional[float] = None
+        self.pico_mb: Optional[float] = None
+
+    # --------------------------------------------------------------------------
+    # Ativação
+    # --------------------------------------------------------------------------
+    def ativar(self) -> "Instrumentacao":
+        global _ATIVA
+        self._anterior, _ATIVA = _ATIVA, self
+        if self.rastrear_memoria and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._iniciou_tracemalloc = True
+        if self.rastrear_memoria:
+            self.pico_ativacao_mb = 0.0
+        self._inicio = (time.perf_counter(), time.process_time())
+        return self
+
+    def desativar(self):
+        global _ATIVA
+        if self._inicio is not None:
+            parede, cpu = self._inicio
+            self.total = {"parede_s": time.perf_counter() - parede, "cpu_s": time.process_time() - cpu}
+        self._registrar_pico()
+        if self._iniciou_tracemalloc:
+            tracemalloc.stop()
+            self._iniciou_tracemalloc = False
+        _ATIVA = self._anterior
+
+    def __enter__(self) -> "Instrumentacao":
+        return self.ativar()
+
+    def __exit__(self, *exc):
+        self.desativar()
+        return False
+
+    # --------------------------------------------------------------------------
+    # Medição
+    # --------------------------------------------------------------------------
+    @contextmanager
+    def etapa(self, nome: str):
+        if nome in self._pilha:
+            # Reentrada (ex.: função decorada chamada dentro de uma etapa de
+            # mesmo nome): o bloco externo já mede tudo, não conta de novo.
+            yield self
+            return
+        rastreando = self.rastrear_memoria and tracemalloc.is_tracing()
+        if rastreando:
+            # O reset_peak abaixo apagaria o pico até aqui: ele vai antes para
+            # todas as etapas abertas (e para o total)
+            self._acumular_picos()
+            memoria_antes = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        parede, cpu = time.perf_counter(), time.process_time()
+        self._pilha.append(nome)
+        self._picos.append((memoria_antes, 0.0) if rastreando else None)
+        try:
+            yield self
+        finally:
+            if rastreando and tracemalloc.is_tracing():
+                self._acumular_picos()
+            aberta = self._picos.pop()
+            self._pilha.pop()
+            medidas = self._medidas(nome)
+            medidas["chamadas"] += 1
+            medidas["parede_s"] += time.perf_counter() - parede
+            medidas["cpu_s"] += time.process_time() - cpu
+            if aberta is not None:
+                pico = (aberta[1] - aberta[0]) / 2**20
+                medidas["pico_alocado_mb"] = max(medidas.get("pico_alocado_mb", 0.0), pico)
+            medidas["rss_mb"] = _rss_atual_mb()
+            medidas["rss_pico_mb"] = _rss_pico_mb()
+            if self.callback is not None:
+                self.callback(nome, medidas)
+
+    def _acumular_picos(self):
+        """
+        Leva o pico atual do tracemalloc (bytes) a todas as etapas abertas,
+        cada uma guardada em self._picos como (memória no início, maior pico).
+        """
+        pico = tracemalloc.get_traced_memory()[1]
+        self._picos = [None if aberta is None else (aberta[0], max(aberta[1], pico))
+                       for aberta in self._picos]
+        self._registrar_pico()
+
+    def _registrar_pico(self):
+        """
+        Acumula o pico do tracemalloc (memória rastreada desde a ativação).
+        """
+        if not (self.rastrear_memoria and tracemalloc.is_tracing()):
+            return
+        pico = tracemalloc.get_traced_memory()[1] / 2**20
+        self.pico_ativacao_mb = max(self.pico_ativacao_mb or 0.0, pico)
+        self.pico_mb = max(self.pico_mb or 0.0, pico)
+
+    def _medidas(self, nome: str) -> Dict:
+        return self.etapas.setdefault(nome, {"chamadas": 0, "parede_s": 0.0, "cpu_s": 0.0, "contadores": {}})
+
+    def contar(self, nome: str, valor: float = 1):
+        destino = self._medidas(self._pilha[-1])["contadores"] if self._pilha else self.contadores
+        destino[nome] = destino.get(nome, 0) + valor
+
+    # --------------------------------------------------------------------------
+    # Relatório
+    # --------------------------------------------------------------------------
+    def relatorio(self) -> Dict:
+        return {
+            "etapas": self.etapas,
+            "contadores": self.contadores,
+            "total": getattr(self, "total", None),
+            "pico_tracemalloc_mb": self.pico_mb,
+            "rss_pico_mb": _rss_pico_mb(),
+        }
+
+    def salvar_json(self, caminho: str):
+        with open(caminho, "w", encoding="utf-8") as f:
+            json.dump(self.relatorio(), f, indent=2, ensure_ascii=False)
+
+    def resumo(self) -> str:
+        """
+        Tabela de texto com uma linha por etapa.
+        """
+        largura = max([16] + [len(nome) + 2 for nome in self.etapas])
+        linhas = [f"{'etapa':<{largura}}{'parede (s)':>12}{'cpu (s)':>10}{'pico (MB)':>11}  contadores"]
+        for nome, m in self.etapas.items():
+            # O rss_pico_mb é o do processo inteiro (nunca diminui), não o da etapa
+            pico = m.get("pico_alocado_mb")
+            pico = f"{pico:.1f}" if pico is not None else "-"
+            contadores = ", ".join(f"{c}={v:g}" for c, v in m["contadores"].items())
+            linhas.append(f"{nome:<{largura}}{m['parede_s']:>12.3f}{m['cpu_s']:>10.3f}{pico:>11}  {contadores}")
+        return "\n".join(linhas)
+
+
+def instrumentacao_ativa() -> Optional[Instrumentacao]:
+    return _ATIVA
+
+
+@contextmanager
+def etapa(nome: str):
+    """
+    Mede o bloco como a etapa `nome` da instrumentação ativa (se houver).
+    """
+    if _ATIVA is None:
+        yield None
+        return
+    with _ATIVA.etapa(nome) as inst:
+        yield inst
+
+
+def medir_etapa(nome: str):
+    """
+    Decorador: cada chamada da função é medida como a etapa `nome`.
+    """
+    def decorador(funcao):
+        @functools.wraps(funcao)
+        def medida(*args, **kwargs):
+            if _ATIVA is None:
+                return funcao(*args, **kwargs)
+            with _ATIVA.etapa(nome):
+                return funcao(*args, **kwargs)
+        return medida
+    return decorador
+
+
+def contar(nome: str, valor: float = 1):
+    """
+    Soma `valor` ao contador `nome` da etapa atual (se houver instrumentação ativa).
+    """
+    if _ATIVA is not None:
+        _ATIVA.contar(nome, valor)
+
+
+class ProgressoEmLotes:
+    """
+    Repassa update(n) para a barra só a cada `a_cada` itens ou `intervalo_s`
+    segundos (o que vier primeiro); fechar/sair do bloco entrega o restante.
+    """
+
+    def __init__(self, barra, a_cada: int = 1 << 16, intervalo_s: float = 0.1):
+        self.barra = barra
+        self.a_cada = a_cada
+        self.intervalo_s = intervalo_s
+        self._pendente = 0
+        self._ultimo = time.perf_counter()
+
+    def update(self, n: int = 1):
+        if self.barra is None:
+            return
+        self._pendente += n
+        if self._pendente >= self.a_cada or time.perf_counter() - self._ultimo >= self.intervalo_s:
+            self.descarregar()
+
+    def descarregar(self):
+        if self.barra is not None and self._pendente:
+            self.barra.update(self._pendente)
+        self._pendente = 0
+        self._ultimo = time.perf_counter()
+
+    def close(self):
+        self.descarregar()
+
+    def __enter__(self) -> "ProgressoEmLotes":
+        return self
+
+    def __exit__(self, *exc):
+        self.descarregar()
+        return False
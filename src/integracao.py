@@ -21,6 +21,8 @@ except ImportError:
     print("ERRO: O arquivo 'Edmonds' não foi encontrado.")
     sys.exit(1)
 
+import superpixels
+
 def main():
     # --- PARÂMETROS ---
     # Ajuste o caminho da imagem aqui para testar
@@ -30,6 +32,9 @@ def main():
     # use um tamanho pequeno (ex: 50 ou 100 pixels de lado).
     max_lado = 50 
     vizinhanca = "4"
+    # > 0: o EdmondsCore roda no grafo de regiões de superpixels desse tamanho
+    # (superpixels.py) em vez do grafo de pixels
+    tamanho_superpixel = 0
     
     print("=========================================")
     print(" INICIANDO INTEGRAÇÃO PESSOA 1 + PESSOA 2")
@@ -51,18 +56,28 @@ def main():
 
     # Chama a função pipeline do arquivo da Pessoa 1
     # Nota: O pipeline_unificado já carrega, cria grafo e calcula pesos
-    img, lista_pesos = base_dados.pipeline_unificado(
+    # retornar_arrays=True: os pares (guardados uma vez) vão direto para o EdmondsCore,
+    # que expande os dois arcos de cada par
+    img, arestas = base_dados.pipeline_unificado(
         caminho_imagem=caminho_imagem,
         caminho_saida_base="dados_teste",
         max_lado=max_lado,
         vizinhanca=vizinhanca,
-        gerar_plots=False # Desliga plots da P1 para focar no terminal
+        gerar_plots=False, # Desliga plots da P1 para focar no terminal
+        retornar_arrays=True
     )
     
     h, w, _ = img.shape
     num_nos = h * w
     print(f"   -> Grafo gerado: {num_nos} nós (pixels).")
-    print(f"   -> Total de arestas calculadas: {len(lista_pesos)}")
+    print(f"   -> Total de arestas calculadas: {arestas.num_arcos}")
+
+    regioes = None
+    if tamanho_superpixel > 0:
+        regioes = superpixels.superpixels_slic(img, tamanho_superpixel)
+        arestas = superpixels.grafo_regioes(img, regioes, vizinhanca)
+        num_nos = superpixels.num_regioes(regioes)
+        print(f"   -> Grafo de regiões: {num_nos} superpixels, {arestas.num_arcos} arestas.")
 
     # ---------------------------------------------------------
     # 2. Executar Algoritmo Core A (Pessoa 2)
@@ -71,7 +86,7 @@ def main():
     
     edmonds = Edmonds.EdmondsCore(num_nos=num_nos, raiz=0)
     
-    edmonds.construir_grafo_entrada(lista_pesos)
+    edmonds.construir_grafo_entrada(arestas)
     
     # Fase de Seleção
     pais = edmonds.selecionar_pais_minimos()
@@ -79,6 +94,11 @@ def main():
     
     # Fase de Detecção de Ciclo
     ciclo = edmonds.detectar_primeiro_ciclo(pais)
+    ciclo_id = edmonds.detectar_ciclos(pais)
+    num_ciclos = int(ciclo_id.max()) + 1 if len(ciclo_id) else 0
+
+    # Fase de Contração (solver completo, Tarjan/Gabow)
+    pais_arb, custo_arb = edmonds.resolver_arborescencia()
 
     # ---------------------------------------------------------
     # 3. Análise dos Resultados
@@ -87,23 +107,25 @@ def main():
     print("-----------------------------------------")
     
     if ciclo:
-        print(f"🔴 RESULTADO: Ciclo Detectado!")
+        print(f"🔴 Seleção gulosa: Ciclo Detectado!")
         print(f"   Tamanho do ciclo: {len(ciclo)} nós")
         print(f"   Nós envolvidos (ID): {ciclo}")
         
         # Converter IDs para coordenadas (Linha, Coluna) para ficar legível
-        coords_ciclo = [base_dados.id_para_coord(idx, w) for idx in ciclo]
-        print(f"   Coords (L, C): {coords_ciclo}")
-        
-        print("\n   PRÓXIMO PASSO (Buno aqui):")
-        print("   -> Contrair esses nós em um Super-Nó.")
-        print("   -> Ajustar pesos das arestas que entram/saem desse grupo.")
-        print("   -> Chamar recursão.")
+        if regioes is None:
+            coords_ciclo = [base_dados.id_para_coord(idx, w) for idx in ciclo]
+            print(f"   Coords (L, C): {coords_ciclo}")
+        print(f"   Total de ciclos na seleção: {num_ciclos} ({int((ciclo_id >= 0).sum())} nós)")
+        print("   -> Ciclos contraídos em super-nós pelo solver completo.")
     else:
-        print(f"🟢 RESULTADO: Nenhum ciclo encontrado!")
-        print("   A seleção gulosa formou uma Arborescência válida.")
-        print("\n   PRÓXIMO PASSO (Rayssa):")
-        print("   -> A solução é ótima. Basta desenhar a imagem segmentada.")
+        print(f"🟢 Seleção gulosa: Nenhum ciclo encontrado!")
+        print("   A seleção gulosa já formou uma Arborescência válida.")
+
+    print(f"\n   Arborescência mínima (raiz {edmonds.raiz}):")
+    print(f"   -> {int((pais_arb >= 0).sum())} arestas escolhidas")
+    print(f"   -> Custo total: {custo_arb:.6f}")
+    print("\n   PRÓXIMO PASSO (Rayssa):")
+    print("   -> Desenhar a imagem segmentada a partir de 'pais_arb'.")
 
     print("=========================================")
 
@@ -0,0 +1,133 @@
+"""
+pesos.py
+Cálculo vetorizado dos pesos das arestas (distância de cor entre pixels).
+
+Recebe os arrays de arestas `u`, `v` (como os de grade.gerar_arestas_grade)
+e a imagem (H x W x C) e devolve todos os pesos numa coluna float32, sem
+laço por aresta e sem converter IDs em coordenadas à mão: a imagem é vista
+como uma tabela (H*W) x C e as cores são buscadas por indexação direta.
+
+Métricas disponíveis (ver METRICAS / registrar_metrica):
+ - "euclidiana"          distância Euclidiana (padrão; "euclidiana_rgb" é sinônimo)
+ - "euclidiana_quadrada" quadrado da distância Euclidiana (evita a raiz)
+ - "l1"                  soma das diferenças absolutas (Manhattan)
+ - "delta_e"             CIE76 ΔE*ab; espera a imagem em L*a*b* (L em 0..100)
+ - "delta_e2000"         CIEDE2000 ΔE00 (via scikit-image); também espera L*a*b*
+
+Todas são simétricas (d(a, b) = d(b, a)), então grafos direcionados guardam
+cada par uma vez (grade.ArestasSimetricas). Uma métrica registrada com
+simetrica=False tem o sentido de volta calculado à parte.
+
+Para imagens grandes, o cálculo é feito em blocos de `tamanho_bloco` arestas,
+escrevendo direto no buffer `saida` (que pode ser fornecido por quem chama),
+de forma que os arrays temporários nunca passem do tamanho de um bloco.
+"""
+
+from typing import Callable, Dict, Optional
+import numpy as np
+
+# Uma métrica recebe as cores (n x C, float32) das duas pontas das arestas
+# e devolve um array (n,) com as distâncias.
+FuncaoMetrica = Callable[[np.ndarray, np.ndarray], np.ndarray]
+
+TAMANHO_BLOCO_PADRAO = 1 << 20
+
+
+def _euclidiana_quadrada(cor_u: np.ndarray, cor_v: np.ndarray) -> np.ndarray:
+    dif = cor_u - cor_v
+    np.multiply(dif, dif, out=dif)
+    return dif.sum(axis=1)
+
+
+def _euclidiana(cor_u: np.ndarray, cor_v: np.ndarray) -> np.ndarray:
+    return np.sqrt(_euclidiana_quadrada(cor_u, cor_v))
+
+
+def _l1(cor_u: np.ndarray, cor_v: np.ndarray) -> np.ndarray:
+    dif = cor_u - cor_v
+    np.abs(dif, out=dif)
+    return dif.sum(axis=1)
+
+
+def _delta_e2000(cor_u: np.ndarray, cor_v: np.ndarray) -> np.ndarray:
+    # Import tardio: scikit-image só é necessário para esta métrica
+    from skimage.color import deltaE_ciede2000
+    return deltaE_ciede2000(cor_u, cor_v, channel_axis=1)
+
+
+METRICAS: Dict[str, FuncaoMetrica] = {
+    "euclidiana": _euclidiana,
+    "euclidiana_rgb": _euclidiana,
+    "euclidiana_quadrada": _euclidiana_quadrada,
+    "l1": _l1,
+    # CIE76: ΔE*ab é a distância Euclidiana no espaço L*a*b*
+    "delta_e": _euclidiana,
+    "delta_e2000": _delta_e2000,
+}
+
+# Nomes de métricas em que d(a, b) pode ser diferente de d(b, a)
+METRICAS_ASSIMETRICAS = set()
+
+
+def registrar_metrica(nome: str, funcao: FuncaoMetrica, simetrica: bool = True):
+    """
+    Adiciona (ou substitui) uma métrica de cor usada por calcular_pesos.
+    simetrica=False avisa que d(a, b) != d(b, a): os dois sentidos das
+    arestas passam a ter pesos próprios.
+    """
+    METRICAS[nome] = funcao
+    if simetrica:
+        METRICAS_ASSIMETRICAS.discard(nome)
+    else:
+        METRICAS_ASSIMETRICAS.add(nome)
+
+
+def metrica_simetrica(metrica: str) -> bool:
+    obter_metrica(metrica)
+    return metrica not in METRICAS_ASSIMETRICAS
+
+
+def obter_metrica(metrica: str) -> FuncaoMetrica:
+    try:
+        return METRICAS[metrica]
+    except KeyError:
+        raise NotImplementedError(
+            f"Métrica '{metrica}' não implementada. Disponíveis: {sorted(METRICAS)}"
+        ) from None
+
+
+def calcular_pesos(imagem: np.ndarray,
+                   u: np.ndarray,
+                   v: np.ndarray,
+                   metrica: str = "euclidiana",
+                   saida: Optional[np.ndarray] = None,
+                   tamanho_bloco: int = TAMANHO_BLOCO_PADRAO) -> np.ndarray:
+    """
+    Calcula w[i] = distância(cor(u[i]), cor(v[i])) para todas as arestas.
+
+    Parâmetros:
+    - imagem: matriz (H x W x C) ou (H x W); convertida para float32 se preciso.
+    - u, v: arrays de IDs de pixel (linha * largura + coluna).
+    - metrica: nome de uma métrica em METRICAS.
+    - saida: buffer float32 opcional de tamanho len(u) (ex.: um np.memmap).
+    - tamanho_bloco: quantas arestas processar por vez.
+
+    Retorna:
+    - np.ndarray: a coluna de pesos (o próprio `saida`, quando fornecido).
+    """
+    funcao = obter_metrica(metrica)
+
+    imagem = np.asarray(imagem, dtype=np.float32)
+    cores = imagem.reshape(imagem.shape[0] * imagem.shape[1], -1)
+
+    num_arestas = len(u)
+    if saida is None:
+        saida = np.empty(num_arestas, dtype=np.float32)
+    elif len(saida) != num_arestas:
+        raise ValueError(f"Buffer de saída com {len(saida)} posições para {num_arestas} arestas")
+
+    for inicio in range(0, num_arestas, tamanho_bloco):
+        fim = min(inicio + tamanho_bloco, num_arestas)
+        saida[inicio:fim] = funcao(cores[u[inicio:fim]], cores[v[inicio:fim]])
+
+    return saida
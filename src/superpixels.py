@@ -0,0 +1,265 @@
+"""
+superpixels.py
+Pré-agregação opcional dos pixels em superpixels compactos e o grafo de
+adjacência de regiões (RAG) entre eles.
+
+Quase todas as uniões do Kruskal na grade de pixels juntam vizinhos de cor
+praticamente igual. Agrupando antes os pixels em regiões de ~tamanho x tamanho
+pixels, a MST, o corte por limiar e o EdmondsCore rodam num grafo com
+centenas de vezes menos nós e arestas; no fim os rótulos das regiões são
+projetados de volta para os pixels.
+
+ - superpixels_grade: blocos fixos tamanho x tamanho (sem custo, bordas "em escada");
+ - superpixels_slic: agrupamento no estilo SLIC (k-means local em cor + posição),
+   inteiramente com operações de array; segue as bordas da imagem;
+ - grafo_regioes: arestas entre regiões vizinhas com o peso agregado das
+   arestas de pixel da fronteira ("media", "minimo") ou a distância entre as
+   cores médias ("centros"). Sai como grade.ArestasSimetricas, aceito por
+   kruskal_mst / segmentar_mst (atributos w, u, v) e por EdmondsCore (arcos());
+ - projetar_rotulos: rótulos por região -> rótulos por pixel.
+
+Uso:
+    regioes = superpixels_slic(imagem, tamanho=8)
+    rag = grafo_regioes(imagem, regioes)
+    mst = kruskal_mst(rag, num_regioes(regioes))
+    rotulos_regioes = segmentar_mst(mst, limiar, num_regioes(regioes), (1, num_regioes(regioes)))
+    rotulos_map = projetar_rotulos(rotulos_regioes, regioes)
+"""
+
+from typing import Tuple
+import numpy as np
+
+from grade import ArestasSimetricas, gerar_arestas_grade
+from instrumentacao import contar, medir_etapa
+from pesos import calcular_pesos
+from union_find import UnionFind
+
+AGREGACOES = ("media", "minimo", "centros")
+
+
+def num_regioes(superpixels: np.ndarray) -> int:
+    return int(superpixels.max()) + 1
+
+
+def superpixels_grade(altura: int, largura: int, tamanho: int = 8) -> np.ndarray:
+    """
+    Regiões fixas de tamanho x tamanho pixels (as da borda podem ser menores),
+    numeradas em ordem raster.
+    """
+    colunas_blocos = -(-largura // tamanho)
+    linhas = np.arange(altura, dtype=np.int32) // tamanho
+    colunas = np.arange(largura, dtype=np.int32) // tamanho
+    return linhas[:, None] * colunas_blocos + colunas[None, :]
+
+
+def estatisticas_regioes(imagem: np.ndarray, superpixels: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    (tamanhos, cores_medias) de cada região, por bincount.
+    """
+    n = num_regioes(superpixels)
+    ids = superpixels.ravel()
+    tamanhos = np.bincount(ids, minlength=n)
+    cores = imagem.reshape(len(ids), -1)
+    somas = np.stack([np.bincount(ids, weights=cores[:, c], minlength=n) for c in range(cores.shape[1])], axis=1)
+    return tamanhos, (somas / np.maximum(tamanhos, 1)[:, None]).astype(np.float32)
+
+
+def _pares_vizinhos(altura: int, largura: int):
+    """
+    Fatias (a, b) dos pares de vizinhos horizontais e verticais.
+    """
+    return [((slice(None), slice(0, largura - 1)), (slice(None), slice(1, largura))),
+            ((slice(0, altura - 1), slice(None)), (slice(1, altura), slice(None)))]
+
+
+def _componentes_conexas(rotulos: np.ndarray) -> np.ndarray:
+    """
+    Separa cada rótulo em componentes 4-conexas e renumera 0..K-1.
+    Trabalha sobre os trechos horizontais de mesmo rótulo (poucos, já que as
+    regiões são compactas): só os trechos verticalmente vizinhos e de mesmo
+    rótulo passam pelo Union-Find.
+    """
+    altura, largura = rotulos.shape
+    inicio_trecho = np.ones((altura, largura), dtype=bool)
+    inicio_trecho[:, 1:] = rotulos[:, 1:] != rotulos[:, :-1]
+    trecho = np.cumsum(inicio_trecho.ravel()).reshape(altura, largura) - 1
+    num_trechos = int(trecho[-1, -1]) + 1
+
+    iguais = rotulos[1:] == rotulos[:-1]
+    pares = np.unique(trecho[:-1][iguais].astype(np.int64) * num_trechos + trecho[1:][iguais])
+    uf = UnionFind(num_trechos)
+    uf.union_many(pares // num_trechos, pares % num_trechos)
+    _, compactos = np.unique(uf.raizes()[trecho], return_inverse=True)
+    return compactos.astype(np.int32).reshape(altura, largura)
+
+
+def _absorver_fragmentos(rotulos: np.ndarray, tamanho_minimo: int, rodadas: int = 4) -> np.ndarray:
+    """
+    Junta cada região com menos de `tamanho_minimo` pixels à sua maior
+    vizinha (se ela for maior, com desempate pelo ID), em algumas rodadas,
+    e renumera 0..K-1.
+    """
+    altura, largura = rotulos.shape
+    for _ in range(rodadas):
+        tamanhos = np.bincount(rotulos.ravel())
+        n = len(tamanhos)
+        pequena = tamanhos < tamanho_minimo
+        if not pequena.any():
+            break
+        # Maior vizinha de cada região, pela chave (tamanho, ID)
+        chave = tamanhos.astype(np.int64) * n + np.arange(n)
+        maior_vizinha = np.full(n, -1, dtype=np.int64)
+        for a, b in _pares_vizinhos(altura, largura):
+            ra, rb = rotulos[a].ravel(), rotulos[b].ravel()
+            borda = ra != rb
+            ra, rb = ra[borda], rb[borda]
+            np.maximum.at(maior_vizinha, ra, chave[rb])
+            np.maximum.at(maior_vizinha, rb, chave[ra])
+        destino = np.arange(n)
+        absorve = pequena & (maior_vizinha > chave)
+        if not absorve.any():
+            break
+        destino[absorve] = maior_vizinha[absorve] % n
+        # Cadeias (fragmento -> vizinha maior -> ...) terminam numa região que fica
+        while True:
+            salto = destino[destino]
+            if np.array_equal(salto, destino):
+                break
+            destino = salto
+        _, rotulos = np.unique(destino[rotulos], return_inverse=True)
+        rotulos = rotulos.astype(np.int32).reshape(altura, largura)
+    return rotulos
+
+
+@medir_etapa("superpixels")
+def superpixels_slic(imagem: np.ndarray, tamanho: int = 8, compacidade: float = 0.1,
+                     iteracoes: int = 5, tamanho_minimo: int = None) -> np.ndarray:
+    """
+    Superpixels no estilo SLIC: centros numa grade de passo `tamanho`, e a
+    cada iteração todo pixel vai para o centro mais próximo entre os das 3x3
+    células em volta da sua, pela distância
+
+        ||cor - cor_centro||² + (compacidade / tamanho)² · ||posição - posição_centro||²
+
+    Os centros são recalculados como médias (bincount). Por fim cada região
+    é separada em componentes conexas e os fragmentos menores que
+    `tamanho_minimo` (padrão: tamanho²/4) são absorvidos por um vizinho.
+
+    compacidade está na escala das cores normalizadas (0-1): 0.1 equivale ao
+    m = 10 do SLIC original em L*a*b*. Maior = regiões mais regulares.
+    Retorna o mapa (H x W, int32) de regiões 0..N-1.
+    """
+    imagem = np.asarray(imagem, dtype=np.float32)
+    if imagem.ndim == 2:
+        imagem = imagem[:, :, None]
+    altura, largura, canais = imagem.shape
+    linhas_blocos, colunas_blocos = -(-altura // tamanho), -(-largura // tamanho)
+    n = linhas_blocos * colunas_blocos
+
+    # Imagem vista como blocos (linha_bloco, linha, coluna_bloco, coluna): o
+    # centro candidato de cada pixel vem por broadcast, sem indexação por pixel.
+    # A borda é completada repetindo a imagem e descartada no fim.
+    altura_p, largura_p = linhas_blocos * tamanho, colunas_blocos * tamanho
+    preenchida = np.pad(imagem, ((0, altura_p - altura), (0, largura_p - largura), (0, 0)), mode="edge")
+    blocos = [preenchida[:, :, c].reshape(linhas_blocos, tamanho, colunas_blocos, tamanho)
+              for c in range(canais)]
+    linhas_p = np.arange(altura_p, dtype=np.float32).reshape(linhas_blocos, tamanho, 1, 1)
+    colunas_p = np.arange(largura_p, dtype=np.float32).reshape(1, 1, colunas_blocos, tamanho)
+    id_bloco = np.arange(n).reshape(linhas_blocos, 1, colunas_blocos, 1)
+    peso_posicao = np.float32((compacidade / tamanho) ** 2)
+
+    cores = imagem.reshape(altura * largura, canais)
+    linhas, colunas = np.divmod(np.arange(altura * largura, dtype=np.int64), largura)
+    rotulos = superpixels_grade(altura, largura, tamanho).ravel()
+
+    # Centros (cor, linha, coluna) com uma moldura de centros "infinitos" fora da grade
+    centros = np.full((linhas_blocos + 2, colunas_blocos + 2, canais + 2), np.inf, dtype=np.float32)
+    for _ in range(iteracoes):
+        contagem = np.bincount(rotulos, minlength=n)
+        medias = np.stack([np.bincount(rotulos, weights=coluna, minlength=n)
+                           for coluna in (*cores.T, linhas, colunas)], axis=1)
+        atuais = centros[1:-1, 1:-1].reshape(n, canais + 2)
+        # Regiões que ficaram vazias mantêm o centro anterior
+        ocupado = contagem > 0
+        atuais[ocupado] = medias[ocupado] / contagem[ocupado, None]
+        centros[1:-1, 1:-1] = atuais.reshape(linhas_blocos, colunas_blocos, canais + 2)
+
+        melhor = np.full((linhas_blocos, tamanho, colunas_blocos, tamanho), np.inf, dtype=np.float32)
+        novos = np.zeros(melhor.shape, dtype=np.int64)
+        for dl in (-1, 0, 1):
+            for dc in (-1, 0, 1):
+                centro = centros[1 + dl:1 + dl + linhas_blocos, 1 + dc:1 + dc + colunas_blocos]
+                centro = centro[:, None, :, None, :]
+                distancia = peso_posicao * ((linhas_p - centro[..., canais]) ** 2 +
+                                            (colunas_p - centro[..., canais + 1]) ** 2)
+                for c in range(canais):
+                    distancia += (blocos[c] - centro[..., c]) ** 2
+                troca = distancia < melhor
+                np.copyto(melhor, distancia, where=troca)
+                np.copyto(novos, id_bloco + (dl * colunas_blocos + dc), where=troca)
+        novos = novos.reshape(altura_p, largura_p)[:altura, :largura].ravel()
+        if np.array_equal(novos, rotulos):
+            break
+        rotulos = novos
+
+    regioes = _componentes_conexas(rotulos.reshape(altura, largura))
+    if tamanho_minimo is None:
+        tamanho_minimo = max(1, tamanho * tamanho // 4)
+    regioes = _absorver_fragmentos(regioes, tamanho_minimo)
+    contar("pixels", altura * largura)
+    contar("regioes", num_regioes(regioes))
+    return regioes
+
+
+@medir_etapa("grafo_regioes")
+def grafo_regioes(imagem: np.ndarray, superpixels: np.ndarray, vizinhanca="4",
+                  metrica: str = "euclidiana", agregacao: str = "media") -> ArestasSimetricas:
+    """
+    Grafo de adjacência das regiões: uma aresta (a, b), a < b, para cada par
+    de regiões com pixels vizinhos (na `vizinhanca` dada). Peso:
+     - "media":   média das distâncias de cor das arestas de pixel da fronteira;
+     - "minimo":  a menor delas (o ponto mais parecido da fronteira);
+     - "centros": distância entre as cores médias das duas regiões.
+    Agregações por ordenação da chave do par + reduceat/bincount.
+    """
+    if agregacao not in AGREGACOES:
+        raise ValueError(f"Agregação '{agregacao}' desconhecida. Disponíveis: {list(AGREGACOES)}")
+    altura, largura = superpixels.shape
+    n = num_regioes(superpixels)
+    ids = superpixels.ravel()
+
+    u, v = gerar_arestas_grade(altura, largura, vizinhanca)
+    ru, rv = ids[u], ids[v]
+    borda = ru != rv
+    u, v, ru, rv = u[borda], v[borda], ru[borda], rv[borda]
+    contar("arestas_fronteira", len(u))
+
+    chave = np.minimum(ru, rv).astype(np.int64) * n + np.maximum(ru, rv)
+    ordem = np.argsort(chave, kind="stable")
+    chave = chave[ordem]
+    inicios = np.flatnonzero(np.r_[True, chave[1:] != chave[:-1]]) if len(chave) else np.empty(0, np.int64)
+    pares = chave[inicios]
+    a, b = (pares // n).astype(np.int32), (pares % n).astype(np.int32)
+
+    if agregacao == "centros":
+        _, cores_medias = estatisticas_regioes(imagem, superpixels)
+        w = calcular_pesos(cores_medias.reshape(n, 1, -1), a, b, metrica=metrica)
+    elif len(inicios) == 0:
+        w = np.empty(0, dtype=np.float32)
+    else:
+        w_pixels = calcular_pesos(imagem, u[ordem], v[ordem], metrica=metrica)
+        if agregacao == "minimo":
+            w = np.minimum.reduceat(w_pixels, inicios)
+        else:
+            contagem = np.diff(np.r_[inicios, len(w_pixels)])
+            w = (np.add.reduceat(w_pixels.astype(np.float64), inicios) / contagem).astype(np.float32)
+
+    contar("arestas_regioes", len(a))
+    return ArestasSimetricas(a, b, w)
+
+
+def projetar_rotulos(rotulos_regioes: np.ndarray, superpixels: np.ndarray) -> np.ndarray:
+    """
+    Rótulo de cada pixel = rótulo da sua região.
+    """
+    return np.asarray(rotulos_regioes).ravel()[superpixels]
@@ -0,0 +1,175 @@
+"""
+union_find.py
+Estrutura de conjuntos disjuntos (Union-Find) única do projeto, usada pela
+MST (Kruskal) e pela segmentação.
+
+- `parent` e `size` são arrays NumPy int32 (nada de listas de objetos Python);
+- `find` é iterativo com "path halving" (cada nó visitado passa a apontar
+  para o avô), então cadeias longas de uniões — ex.: uma imagem em degradê —
+  não estouram o limite de recursão;
+- "union by size": a árvore menor é pendurada na raiz da maior;
+- operações em lote: `find_many` (vetor de IDs), `union_many` (arrays de
+  arestas) e `raizes` (achata todas as árvores de uma vez, vetorizado).
+- com uma instrumentacao.Instrumentacao ativa, `union_many` registra os
+  contadores "unioes", "buscas_find" e "passos_find" da etapa atual.
+"""
+
+from typing import Optional
+import numpy as np
+
+from instrumentacao import contar, instrumentacao_ativa
+
+
+def _unir_lista(parent, size, arestas, limite, indices_unidos):
+    """
+    Laço do union_many sobre listas Python (path halving + union by size).
+    """
+    for i, (a, b) in enumerate(arestas):
+        while parent[a] != a:
+            parent[a] = parent[parent[a]]
+            a = parent[a]
+        while parent[b] != b:
+            parent[b] = parent[parent[b]]
+            b = parent[b]
+        if a == b:
+            continue
+        if size[a] < size[b]:
+            a, b = b, a
+        parent[b] = a
+        size[a] += size[b]
+        indices_unidos.append(i)
+        if len(indices_unidos) == limite:
+            break
+
+
+def _unir_lista_contando(parent, size, arestas, limite, indices_unidos):
+    """
+    Mesmo laço de _unir_lista, contando as buscas e os passos dados pelo find
+    (para a instrumentação). Retorna (passos, buscas).
+    """
+    passos = buscas = 0
+    for i, (a, b) in enumerate(arestas):
+        buscas += 2
+        while parent[a] != a:
+            parent[a] = parent[parent[a]]
+            a = parent[a]
+            passos += 1
+        while parent[b] != b:
+            parent[b] = parent[parent[b]]
+            b = parent[b]
+            passos += 1
+        if a == b:
+            continue
+        if size[a] < size[b]:
+            a, b = b, a
+        parent[b] = a
+        size[a] += size[b]
+        indices_unidos.append(i)
+        if len(indices_unidos) == limite:
+            break
+    return passos, buscas
+
+
+class UnionFind:
+
+    def __init__(self, n: int):
+        """
+        Inicializa a estrutura para 'n' elementos (pixels).
+        Cada elemento começa em seu próprio conjunto.
+        """
+        # parent[i] == i  <=>  i é a raiz de um conjunto
+        self.parent = np.arange(n, dtype=np.int32)
+        # size[r]: tamanho do conjunto cuja raiz é r (só vale para raízes)
+        self.size = np.ones(n, dtype=np.int32)
+        # Número de conjuntos distintos (segmentos)
+        self.num_components = n
+
+    def find(self, x: int) -> int:
+        """
+        Raiz do conjunto de 'x', com path halving (sem recursão).
+        """
+        parent = self.parent
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return int(x)
+
+    def union(self, x: int, y: int) -> bool:
+        """
+        Une os conjuntos de 'x' e 'y' (union by size).
+        Retorna True se houve união, False se já estavam no mesmo conjunto.
+        """
+        raiz_x = self.find(x)
+        raiz_y = self.find(y)
+        if raiz_x == raiz_y:
+            return False  # já estão no mesmo conjunto → criaria ciclo
+
+        if self.size[raiz_x] < self.size[raiz_y]:
+            raiz_x, raiz_y = raiz_y, raiz_x
+        self.parent[raiz_y] = raiz_x
+        self.size[raiz_x] += self.size[raiz_y]
+        self.num_components -= 1
+        return True
+
+    def find_many(self, ids: np.ndarray) -> np.ndarray:
+        """
+        Raízes de um array de IDs, por "pointer jumping" vetorizado.
+        Os IDs consultados passam a apontar direto para a raiz.
+        """
+        ids = np.asarray(ids)
+        raizes = self.parent[ids]
+        while True:
+            proximos = self.parent[raizes]
+            if np.array_equal(proximos, raizes):
+                break
+            raizes = proximos
+        self.parent[ids] = raizes
+        return raizes
+
+    def union_many(self, u: np.ndarray, v: np.ndarray, max_unioes: Optional[int] = None) -> np.ndarray:
+        """
+        Processa as arestas (u[i], v[i]) em ordem, como chamadas sucessivas de union.
+        Para depois de `max_unioes` uniões, se informado (ex.: num_nos - 1 no Kruskal).
+
+        Retorna:
+        - np.ndarray (bool): True nas arestas que efetivamente uniram dois conjuntos.
+        """
+        # O laço é inerentemente sequencial; trabalhar sobre listas locais
+        # evita o custo de indexar arrays NumPy elemento a elemento.
+        parent = self.parent.tolist()
+        size = self.size.tolist()
+        limite = -1 if max_unioes is None else max_unioes
+        indices_unidos = []
+
+        if limite != 0:
+            arestas = zip(np.asarray(u).tolist(), np.asarray(v).tolist())
+            if instrumentacao_ativa() is None:
+                _unir_lista(parent, size, arestas, limite, indices_unidos)
+            else:
+                # Só com instrumentação ligada o laço paga a contagem dos passos do find
+                passos, buscas = _unir_lista_contando(parent, size, arestas, limite, indices_unidos)
+                contar("buscas_find", buscas)
+                contar("passos_find", passos)
+            contar("unioes", len(indices_unidos))
+
+        self.parent[:] = parent
+        self.size[:] = size
+        self.num_components -= len(indices_unidos)
+
+        unidas = np.zeros(len(u), dtype=bool)
+        unidas[indices_unidos] = True
+        return unidas
+
+    def raizes(self) -> np.ndarray:
+        """
+        Achata todas as árvores (parent[i] passa a ser a raiz de i) e
+        devolve uma cópia do array de raízes.
+        """
+        parent = self.parent
+        while True:
+            avos = parent[parent]
+            if np.array_equal(avos, parent):
+                break
+            parent = avos
+        self.parent[:] = parent
+        return parent.copy()